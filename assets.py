@@ -0,0 +1,150 @@
+"""Local cache of pre-sized office images.
+
+Each tier image is resolved once (local file or remote URL), shrunk to a
+fixed-width JPEG thumbnail and written to an on-disk cache. Renders are
+served from a bounded in-memory LRU, so the Real Estate tab does no external
+I/O and every card has a predictable payload size. If a source can't be
+fetched (offline or air-gapped installs) a generated placeholder is used.
+"""
+import hashlib
+import io
+import logging
+import os
+import threading
+import urllib.request
+from collections import OrderedDict
+
+from PIL import Image, ImageDraw
+
+log = logging.getLogger(__name__)
+
+
+class AssetCache:
+    """Process-wide thumbnail cache: memory LRU in front of a disk cache."""
+
+    def __init__(self, cache_dir, width=400, quality=70, max_bytes=8 * 1024 * 1024,
+                 offline=False, fetch_timeout=5):
+        self.cache_dir = cache_dir
+        self.width = width
+        self.height = width * 2 // 3  # 3:2 cards
+        self.quality = quality
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self.fetch_timeout = fetch_timeout
+
+        self._lru = OrderedDict()
+        self._lru_bytes = 0
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        os.makedirs(cache_dir, exist_ok=True)
+
+    # --- Public API ---
+    def thumbnail(self, name, source):
+        # JPEG bytes for the tier image; never raises for a bad source
+        key = self._key(source)
+        with self._lock:
+            data = self._lru.get(key)
+            if data is not None:
+                self._lru.move_to_end(key)
+                return data
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        # One resolver per image; other sessions wait instead of refetching
+        with key_lock:
+            with self._lock:
+                data = self._lru.get(key)
+            if data is None:
+                data = self._load_or_build(key, name, source)
+                self._remember(key, data)
+        return data
+
+    def warm(self, items):
+        # items: iterable of (name, source); run off the script thread
+        for name, source in items:
+            self.thumbnail(name, source)
+
+    def warm_in_background(self, items):
+        items = list(items)
+        thread = threading.Thread(target=self.warm, args=(items,), name="asset-warm", daemon=True)
+        thread.start()
+        return thread
+
+    def path(self, source):
+        # Where the source's thumbnail is (or will be) on disk
+        return os.path.join(self.cache_dir, f"{self._key(source)}.jpg")
+
+    # --- Internals ---
+    def _key(self, source):
+        raw = f"{source}|{self.width}|{self.quality}".encode()
+        return hashlib.sha1(raw).hexdigest()
+
+    def _remember(self, key, data):
+        with self._lock:
+            if key in self._lru:
+                return
+            self._lru[key] = data
+            self._lru_bytes += len(data)
+            while self._lru_bytes > self.max_bytes and len(self._lru) > 1:
+                _, evicted = self._lru.popitem(last=False)
+                self._lru_bytes -= len(evicted)
+
+    def _load_or_build(self, key, name, source):
+        path = self.path(source)
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                return f.read()
+
+        image = self._fetch(source)
+        if image is None:
+            # Placeholders aren't written to disk so a later online run retries
+            return self._encode(self._placeholder(name))
+
+        data = self._encode(self._fit(image))
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        return data
+
+    def _fetch(self, source):
+        # The decoded image, or None; a bad source is never fatal here
+        if "://" in source and self.offline:
+            return None
+        try:
+            if "://" not in source:
+                image = Image.open(source)
+            else:
+                with urllib.request.urlopen(source, timeout=self.fetch_timeout) as resp:
+                    image = Image.open(io.BytesIO(resp.read()))
+            image.load()  # Decode now, so a truncated file fails here and not in _fit
+            return image
+        except Exception as exc:  # IncompleteRead, DecompressionBombError, ... all mean "no image"
+            log.warning("Could not load office image %s: %s: %s", source, type(exc).__name__, exc)
+            return None
+
+    def _fit(self, image):
+        # Center-crop to the card ratio, then downscale
+        image = image.convert("RGB")
+        target = self.width / self.height
+        w, h = image.size
+        if w / h > target:
+            new_w = int(h * target)
+            left = (w - new_w) // 2
+            image = image.crop((left, 0, left + new_w, h))
+        else:
+            new_h = int(w / target)
+            top = (h - new_h) // 2
+            image = image.crop((0, top, w, top + new_h))
+        return image.resize((self.width, self.height), Image.LANCZOS)
+
+    def _placeholder(self, name):
+        image = Image.new("RGB", (self.width, self.height), "#1f2229")
+        draw = ImageDraw.Draw(image)
+        draw.rectangle((0, 0, self.width - 1, self.height - 1), outline="#333333")
+        draw.text((16, self.height // 2 - 6), name.upper(), fill="#00FF00")
+        return image
+
+    def _encode(self, image):
+        buf = io.BytesIO()
+        image.save(buf, format="JPEG", quality=self.quality, optimize=True, progressive=True)
+        return buf.getvalue()
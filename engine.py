@@ -0,0 +1,327 @@
+"""Headless game rules.
+
+``GameEngine`` holds the rules and the shared, read-only tables;
+``PlayerState`` holds everything one player owns. Nothing here imports
+Streamlit, so the rules can be driven and timed outside a server (see
+tools/bench_engine.py). streamlit_app.py keeps one PlayerState per session
+and only translates clicks into engine calls.
+"""
+import bisect
+import pickle
+import random
+import sys
+import time
+
+import game_data
+import settings
+from performance import PerformanceTracker
+from sampler import AdaptiveSampler, SamplerLayout
+from scheduler import LeitnerScheduler
+
+# Quiz flow; anything else is a stale click and is ignored
+#   idle -> question -> answered | demoted -> question -> ...
+PHASES = {
+    "idle": ("question",),
+    "question": ("question", "answered", "demoted"),  # question -> question is the Hedge skip
+    "answered": ("question",),
+    "demoted": ("question",),
+}
+
+# How new_question picks: weakness-weighted draws, or Leitner spaced repetition
+MODES = ("adaptive", "spaced")
+
+# Lifelines used on the current question, as bits of PlayerState.lifelines
+LIFELINE_HINT = 1
+LIFELINE_QUANT = 2
+
+
+class PlayerState:
+    """Everything one player owns.
+
+    Slotted, and held as small ints where it can be (question ID, staff and
+    eliminated options as bitmasks), to keep sessions small. The strings
+    (office, mode, result, phase) are shared constants.
+    """
+
+    __slots__ = (
+        "balance",             # Liquid Cash (Spendable)
+        "lifetime_earnings",   # Career Score (For Title)
+        "office_level",
+        "staff",               # Hired help: bit i = i-th role of the talent roster
+        "performance",         # Rolling windows, overall + per sector
+        "sampler",             # Weakness-weighted question picker
+        "scheduler",           # LeitnerScheduler, built the first time "spaced" is chosen
+        "mode",                # See MODES
+        "qid",                 # Current question's ID, -1 for none (see GameEngine.question)
+        "last_result",         # "Correct", "Incorrect", "Demoted"
+        "eliminated",          # Options removed by the Quant: bit i = option i
+        "lifelines",           # LIFELINE_* bits used on the current question
+        "asked_at",            # When the current question was shown (time.time())
+        "phase",               # See PHASES
+    )
+
+    def __init__(self, performance, sampler, office_level):
+        self.balance = 0
+        self.lifetime_earnings = 0
+        self.office_level = office_level
+        self.staff = 0
+        self.performance = performance
+        self.sampler = sampler
+        self.scheduler = None
+        self.mode = "adaptive"
+        self.qid = -1
+        self.last_result = None
+        self.eliminated = 0
+        self.lifelines = 0
+        self.asked_at = None
+        self.phase = "idle"
+
+
+class GameEngine:
+    """The game rules over a shared QuestionBank and the rule tables.
+
+    Defaults come from game_data and settings; the simulators override them
+    to try out other economies. ``metrics`` (a metrics.AppMetrics) is
+    optional; without it the engine records nothing.
+    """
+
+    def __init__(self, bank, payout=None, window_size=None, demotion_threshold=None,
+                 office_tiers=None, talent_roster=None, title_ladder=None,
+                 demotion_floors=None, rng=None, metrics=None):
+        self.bank = bank
+        self.payout = game_data.answer_payout if payout is None else payout
+        self.window_size = settings.WINDOW_SIZE if window_size is None else window_size
+        self.demotion_threshold = (settings.DEMOTION_THRESHOLD if demotion_threshold is None
+                                   else demotion_threshold)
+        self.office_tiers = game_data.office_tiers if office_tiers is None else office_tiers
+        self.talent_roster = game_data.talent_roster if talent_roster is None else talent_roster
+        ladder = game_data.title_ladder if title_ladder is None else title_ladder
+        self._title_floors = [floor for floor, _ in ladder]
+        self._titles = [title for _, title in ladder]
+        self.demotion_floors = game_data.demotion_floors if demotion_floors is None else demotion_floors
+        self.starting_office = next(iter(self.office_tiers))
+        self.rng = rng or random.Random()
+        self._layout = SamplerLayout(bank)  # Shared by every player's sampler
+        self._staff_bits = {role: 1 << i for i, role in enumerate(self.talent_roster)}
+        self.metrics = metrics
+
+    # --- Players ---
+    def new_player(self):
+        return PlayerState(PerformanceTracker(self.window_size), AdaptiveSampler(self.bank, self._layout),
+                           self.starting_office)
+
+    def snapshot(self, player):
+        # Plain, JSON-friendly form for the player store
+        return {
+            "balance": player.balance,
+            "lifetime_earnings": player.lifetime_earnings,
+            "office_level": player.office_level,
+            "staff": self.staff(player),
+            "performance": player.performance.to_state(),
+        }
+
+    def restore(self, snapshot):
+        player = self.new_player()
+        player.balance = snapshot["balance"]
+        player.lifetime_earnings = snapshot["lifetime_earnings"]
+        player.office_level = snapshot["office_level"]
+        for role in snapshot["staff"]:
+            player.staff |= self._staff_bits.get(role, 0)
+        player.performance = PerformanceTracker.from_state(self.window_size, snapshot["performance"])
+        return player
+
+    def pack(self, player):
+        # Everything the player owns, in-flight question included, as bytes
+        # (for sessions.SessionPool); the shared layout is left out. Question
+        # IDs, the sampler's trees and the Leitner boxes are only meaningful
+        # for this bank, so its fingerprint goes in too.
+        return pickle.dumps((self.bank.fingerprint, player), pickle.HIGHEST_PROTOCOL)
+
+    def unpack(self, data):
+        # None if the bytes were packed against another bank (or an older format)
+        packed = pickle.loads(data)
+        if not isinstance(packed, tuple) or packed[0] != self.bank.fingerprint:
+            return None
+        player = packed[1]
+        player.sampler.layout = self._layout
+        player.sampler.categories = self._layout.categories
+        if player.scheduler is not None:
+            player.scheduler.layout = self._layout
+        # Unpickled strings are fresh copies; share one interned copy instead
+        for name in ("office_level", "mode", "last_result", "phase"):
+            value = getattr(player, name)
+            if value is not None:
+                setattr(player, name, sys.intern(value))
+        return player
+
+    def set_mode(self, player, mode):
+        if mode not in MODES:
+            raise ValueError(f"Unknown mode {mode!r}")
+        if mode == "spaced" and player.scheduler is None:
+            player.scheduler = LeitnerScheduler(self.bank, self._layout, rng=self.rng)
+        player.mode = mode
+
+    def question(self, player):
+        # The current Question, or None
+        return self.bank[player.qid] if player.qid >= 0 else None
+
+    def staff(self, player):
+        # Hired roles, in roster order
+        return [role for role, bit in self._staff_bits.items() if player.staff & bit]
+
+    def has_staff(self, player, role):
+        return bool(player.staff & self._staff_bits[role])
+
+    # --- Career Logic (The Ladder) ---
+    def get_title(self, earnings):
+        return self._titles[bisect.bisect_right(self._title_floors, earnings) - 1]
+
+    # --- Quiz ---
+    def transition(self, player, phase):
+        if phase not in PHASES[player.phase]:
+            return False
+        player.phase = phase
+        return True
+
+    def new_question(self, player, category="All"):
+        # Returns the new Question, or None for a stale click. An unknown
+        # category falls back to the whole bank (caller can compare categories).
+        skipped = player.qid if player.phase == "question" else -1
+        if not self.transition(player, "question"):
+            return None
+
+        if player.mode == "spaced":
+            # Due reviews first, then unseen questions; a Hedge defers the skipped one
+            picker = player.scheduler
+            if skipped >= 0:
+                picker.defer(skipped)
+        else:
+            # Weighting: prioritize areas (and questions) where user is weak
+            picker = player.sampler
+        qid = picker.draw(category, self.rng)
+        if qid is None:
+            qid = picker.draw("All", self.rng)
+        return self._ask(player, qid)
+
+    def deal(self, player, qid, asked_at=None):
+        # Puts a given question in front of the player (a live room deals
+        # everyone the same one); None for a stale click
+        if not self.transition(player, "question"):
+            return None
+        return self._ask(player, qid, asked_at)
+
+    def _ask(self, player, qid, asked_at=None):
+        player.last_result = None
+        player.eliminated = 0
+        player.lifelines = 0
+        player.qid = qid
+        player.asked_at = time.time() if asked_at is None else asked_at
+        q = self.bank[qid]
+        if self.metrics is not None:
+            self.metrics.questions_served.inc(q.category)
+        return q
+
+    def check_answer(self, player, user_ans):
+        # Returns "Correct", "Incorrect" or "Demoted"; None for a stale click
+        if player.phase != "question":
+            return None
+        q = self.bank[player.qid]
+        is_correct = user_ans == q.answer
+        player.sampler.record(q.id, is_correct)
+        if player.scheduler is not None:
+            player.scheduler.record(q.id, is_correct)
+
+        if is_correct:
+            # Success Logic
+            player.balance += self.payout
+            player.lifetime_earnings += self.payout
+            player.last_result = "Correct"
+        else:
+            # Failure Logic
+            player.last_result = "Incorrect"
+        player.performance.record(q.category, is_correct)
+        if self.metrics is not None:
+            self.metrics.answers.inc(player.last_result)
+
+        # Feature 6: Risk of Ruin Protocol
+        if self.check_risk_of_ruin(player):
+            self.transition(player, "demoted")
+        else:
+            self.transition(player, "answered")
+        return player.last_result
+
+    def check_risk_of_ruin(self, player):
+        # Only check once the window is full (the ring buffer keeps it at window_size)
+        window = player.performance.overall
+        if window.is_full and window.accuracy < self.demotion_threshold:  # Survival Threshold
+            self.execute_demotion(player)
+            return True
+        return False
+
+    def execute_demotion(self, player):
+        # Feature 6 Implementation
+        player.last_result = "Demoted"
+        if self.metrics is not None:
+            self.metrics.demotions.inc()
+
+        # 1. Title Strip (Slash lifetime earnings effectively demoting title)
+        # We set them back to the start of the previous tier
+        earnings = player.lifetime_earnings
+        for above, reset_to in self.demotion_floors:
+            if earnings > above:
+                player.lifetime_earnings = reset_to
+                break
+        else:
+            player.lifetime_earnings = 0
+
+        # 2. Asset Seizure (Office Foreclosure)
+        player.office_level = self.starting_office
+
+        # 3. Staff Layoffs (Optional, but ruthless)
+        player.staff = 0
+
+        # 4. Reset Performance History (Give them a clean slate to rebuild)
+        player.performance.clear()
+
+    def use_quant(self, player):
+        if player.phase != "question":
+            return False
+        q = self.bank[player.qid]
+        # Find wrong options
+        wrong_options = [i for i, opt in enumerate(q.options) if opt != q.answer]
+        # Pick 2 to kill
+        if len(wrong_options) >= 2:
+            for i in self.rng.sample(wrong_options, 2):
+                player.eliminated |= 1 << i
+        player.lifelines |= LIFELINE_QUANT
+        return True
+
+    def use_hint(self, player):
+        # The Analyst Note only shows the rationale; this records that it was read
+        if player.phase != "question":
+            return False
+        player.lifelines |= LIFELINE_HINT
+        return True
+
+    # --- Shop ---
+    def buy_office(self, player, name):
+        # Returns the shortfall: 0 on success, otherwise how much more is needed
+        if player.office_level == name:
+            return 0
+        cost = self.office_tiers[name]["cost"]
+        if player.balance < cost:
+            return cost - player.balance
+        player.balance -= cost
+        player.office_level = name
+        return 0
+
+    def hire(self, player, role):
+        # Same contract as buy_office
+        if self.has_staff(player, role):
+            return 0
+        cost = self.talent_roster[role]["cost"]
+        if player.balance < cost:
+            return cost - player.balance
+        player.balance -= cost
+        player.staff |= self._staff_bits[role]
+        return 0
@@ -0,0 +1,275 @@
+"""Append-only log of every answer, with incrementally maintained aggregates.
+
+The rolling windows in performance.py only see the last few answers (and a
+demotion clears them), so each answer is also appended here as an event:
+time, question ID, category, correct, lifelines used and latency.
+``EventLog`` buffers events per player and a background thread appends
+them in batches to columnar Parquet chunks, one directory per player.
+
+The Analytics tab never reads the chunks. Every event also updates a small
+per-player table of (hour, category) counters in memory, which is saved
+next to the chunks, so its size depends on how many hours a player has
+been active, not on how many answers they gave. Only the most recently
+active players' tables stay in memory; the rest are read back from the
+summary when next needed.
+"""
+import atexit
+import hashlib
+import json
+import math
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+SCHEMA = pa.schema([
+    ("ts", pa.timestamp("ms", tz="UTC")),
+    ("qid", pa.int32()),
+    ("category", pa.dictionary(pa.int8(), pa.string())),
+    ("correct", pa.bool_()),
+    ("lifelines", pa.uint8()),     # engine.LIFELINE_* bits
+    ("latency", pa.float32()),     # Seconds from question shown to answer; NaN if unknown
+])
+BUCKET_SECONDS = 3600
+SUMMARY = "summary.json"
+SAFE_ID = re.compile(r"[A-Za-z0-9_-]{1,64}")
+
+
+class EventLog:
+    """Per-player answer events and their (hour, category) aggregates.
+
+    ``root`` is the directory for the Parquet chunks; without it events are
+    only aggregated in memory. Each flush appends one chunk per player with
+    new events, except that a newest chunk still under ``batch_size`` events
+    is topped up instead, so slow players do not pile up tiny files.
+
+    With a ``root``, the counters of at most ``max_players`` players are
+    kept, least recently used first out. A player with events not yet on
+    disk is never evicted, so a reload always matches the counters it
+    replaces. Without a ``root`` there is nothing to reload from, and every
+    player is kept.
+    """
+
+    def __init__(self, root=None, batch_size=512, flush_interval=5.0, max_players=2000):
+        self.root = root
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_players = max_players
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()  # One flush at a time
+        # player_id -> {(bucket, category): [answers, correct, latency_sum, timed, assisted]}, LRU first
+        self._cells = OrderedDict()
+        self._logged = {}    # player_id -> events in _cells
+        self._pending = {}   # player_id -> column lists not yet written
+        self._writing = ()   # Players in the batch being written
+        self._closed = False
+
+        if root:
+            os.makedirs(root, exist_ok=True)
+            self._stop = threading.Event()
+            self._thread = threading.Thread(target=self._run, name="event-log-writer", daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+
+    # --- Recording ---
+    def append(self, player_id, qid, category, correct, lifelines=0, latency=None, ts=None):
+        ts = time.time() if ts is None else ts
+        latency = math.nan if latency is None else float(latency)
+        key = (int(ts // BUCKET_SECONDS), category)
+        while True:
+            cells = self._player_cells(player_id)
+            with self._lock:
+                if self._cells.get(player_id) is not cells:
+                    continue  # Evicted since the lookup: load it again
+                cell = cells.get(key)
+                if cell is None:
+                    cell = cells[key] = [0, 0, 0.0, 0, 0]
+                cell[0] += 1
+                cell[1] += bool(correct)
+                if latency == latency:  # Not NaN
+                    cell[2] += latency
+                    cell[3] += 1
+                cell[4] += bool(lifelines)
+                self._logged[player_id] += 1
+                if self.root:
+                    cols = self._pending.get(player_id)
+                    if cols is None:
+                        cols = self._pending[player_id] = {name: [] for name in SCHEMA.names}
+                    cols["ts"].append(int(ts * 1000))
+                    cols["qid"].append(qid)
+                    cols["category"].append(category)
+                    cols["correct"].append(bool(correct))
+                    cols["lifelines"].append(int(lifelines))
+                    cols["latency"].append(latency)
+                return
+
+    def aggregates(self, player_id):
+        """Returns the player's (hour, category) counters as a DataFrame.
+
+        Columns: time, category, answers, correct, latency_sum, timed,
+        assisted. Built from the counters only, so it costs the same for
+        ten answers or a hundred thousand.
+        """
+        cells = self._player_cells(player_id)
+        with self._lock:
+            rows = [(bucket, category, *cell) for (bucket, category), cell in cells.items()]
+        frame = pd.DataFrame(rows, columns=["time", "category", "answers", "correct", "latency_sum",
+                                            "timed", "assisted"])
+        frame["time"] = pd.to_datetime(frame["time"] * BUCKET_SECONDS, unit="s", utc=True)
+        return frame.sort_values(["time", "category"], ignore_index=True)
+
+    def history(self, player_id):
+        # Every event on disk as one Arrow table (for export and tools)
+        folder = self._folder(player_id)
+        parts = self._parts(folder) if folder else []
+        if not parts:
+            return SCHEMA.empty_table()
+        return pa.concat_tables(pq.read_table(os.path.join(folder, part), schema=SCHEMA) for part in parts)
+
+    # --- Aggregates, loaded on first use and kept while recently used ---
+    def _player_cells(self, player_id):
+        with self._lock:
+            cells = self._cells.get(player_id)
+            if cells is not None:
+                self._cells.move_to_end(player_id)
+                return cells
+        cells, logged = self._load(player_id)
+        with self._lock:
+            if player_id not in self._cells:  # Another session of the same player may have won
+                self._cells[player_id] = cells
+                self._logged[player_id] = logged
+                self._evict(keep=player_id)
+            return self._cells[player_id]
+
+    def _evict(self, keep):
+        # Under the lock. Players with unwritten events stay, or a reload
+        # would miss them; so does ``keep``, the player just loaded.
+        if not self.root:
+            return
+        over = len(self._cells) - self.max_players
+        if over <= 0:
+            return
+        victims = []
+        for player_id in self._cells:
+            if player_id != keep and player_id not in self._pending and player_id not in self._writing:
+                victims.append(player_id)
+                if len(victims) == over:
+                    break
+        for player_id in victims:
+            del self._cells[player_id]
+            del self._logged[player_id]
+
+    def _load(self, player_id):
+        folder = self._folder(player_id)
+        if not folder or not os.path.isdir(folder):
+            return {}, 0
+        on_disk = sum(pq.read_metadata(os.path.join(folder, part)).num_rows for part in self._parts(folder))
+        try:
+            with open(os.path.join(folder, SUMMARY)) as f:
+                summary = json.load(f)
+            if summary["events"] == on_disk:
+                return {(bucket, category): cell for bucket, category, *cell in summary["cells"]}, on_disk
+        except (OSError, ValueError, KeyError):
+            pass
+        # Missing or behind the chunks (a crash between the two writes):
+        # rebuild once from the chunks
+        return self._rebuild(self.history(player_id)), on_disk
+
+    @staticmethod
+    def _rebuild(table):
+        events = table.select(["ts", "category", "correct", "lifelines", "latency"]).to_pandas()
+        if events.empty:
+            return {}
+        events["bucket"] = (events["ts"] - pd.Timestamp(0, tz="UTC")) // pd.Timedelta(seconds=BUCKET_SECONDS)
+        events["category"] = events["category"].astype(str)
+        events["timed"] = events["latency"].notna()
+        events["latency"] = events["latency"].fillna(0.0)
+        events["assisted"] = events["lifelines"] > 0
+        grouped = events.groupby(["bucket", "category"]).agg(
+            answers=("correct", "size"), correct=("correct", "sum"), latency_sum=("latency", "sum"),
+            timed=("timed", "sum"), assisted=("assisted", "sum"))
+        return {(int(bucket), category): [int(row.answers), int(row.correct), float(row.latency_sum),
+                                          int(row.timed), int(row.assisted)]
+                for (bucket, category), row in grouped.iterrows()}
+
+    # --- Disk ---
+    def _folder(self, player_id):
+        if not self.root:
+            return None
+        # Player IDs come from the URL; anything unusual is hashed into a safe name
+        name = player_id if SAFE_ID.fullmatch(player_id) else hashlib.sha1(player_id.encode()).hexdigest()
+        return os.path.join(self.root, name)
+
+    @staticmethod
+    def _parts(folder):
+        try:
+            return sorted(name for name in os.listdir(folder) if name.endswith(".parquet"))
+        except OSError:
+            return []
+
+    def _write(self, player_id, cols, summary):
+        folder = self._folder(player_id)
+        os.makedirs(folder, exist_ok=True)
+        table = pa.Table.from_pydict(cols, schema=SCHEMA)
+        parts = self._parts(folder)
+        if parts and pq.read_metadata(os.path.join(folder, parts[-1])).num_rows < self.batch_size:
+            name = parts[-1]
+            table = pa.concat_tables([pq.read_table(os.path.join(folder, name), schema=SCHEMA), table])
+        else:
+            name = f"part-{len(parts):06d}.parquet"
+        path = os.path.join(folder, name)
+        pq.write_table(table, f"{path}.tmp")
+        os.replace(f"{path}.tmp", path)
+        # The summary goes last: if it lags the chunks it is rebuilt on load,
+        # so a failure here must not get the events written twice
+        tmp = os.path.join(folder, f"{SUMMARY}.tmp")
+        try:
+            with open(tmp, "w") as f:
+                json.dump(summary, f, separators=(",", ":"))
+            os.replace(tmp, os.path.join(folder, SUMMARY))
+        except OSError:
+            pass
+
+    def flush(self):
+        # Takes the buffered events and a matching copy of the counters
+        # under one lock, so each summary covers exactly what is on disk
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+                self._writing = set(batch)
+                summaries = {
+                    player_id: {"events": self._logged[player_id],
+                                "cells": [[bucket, category, *cell]
+                                          for (bucket, category), cell in self._cells[player_id].items()]}
+                    for player_id in batch
+                }
+            for player_id, cols in batch.items():
+                try:
+                    self._write(player_id, cols, summaries[player_id])
+                except OSError:
+                    # Put the events back in front of newer ones and retry next tick
+                    with self._lock:
+                        newer = self._pending.get(player_id)
+                        if newer is not None:
+                            for name in SCHEMA.names:
+                                cols[name].extend(newer[name])
+                        self._pending[player_id] = cols
+            with self._lock:
+                self._writing = ()
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def close(self):
+        if not self.root or self._closed:
+            return
+        self._closed = True
+        self._stop.set()
+        self._thread.join(timeout=5)
+        self.flush()
@@ -0,0 +1,110 @@
+"""Timed practice exams.
+
+An exam is built once when it starts: a deck drawn without replacement and
+stratified across sectors, plus a shuffled option order for every
+question, all in small NumPy arrays. Answers arrive together when the exam
+form is submitted and are graded in one vectorized pandas pass that also
+yields the per-sector breakdown. Exams never touch the player's economy.
+"""
+import random
+import time
+
+import numpy as np
+import pandas as pd
+
+
+def stratify(available, total):
+    """Splits `total` questions as evenly as possible across categories.
+
+    `available` maps category -> how many questions it has; a category that
+    runs out hands its share to the others. Returns category -> count.
+    """
+    alloc = {cat: 0 for cat in available}
+    remaining = min(total, sum(available.values()))
+    open_cats = [cat for cat, n in available.items() if n]
+    while remaining and open_cats:
+        share = max(remaining // len(open_cats), 1)
+        for cat in list(open_cats):
+            take = min(share, available[cat] - alloc[cat], remaining)
+            alloc[cat] += take
+            remaining -= take
+            if alloc[cat] == available[cat]:
+                open_cats.remove(cat)
+            if not remaining:
+                break
+    return alloc
+
+
+class Exam:
+    """One practice exam: the deck, its option orders and the answer sheet.
+
+    ``perms[i]`` lists the bank's option indexes in the order question i is
+    shown (-1 pads shorter questions); ``key[i]`` is the shown position of
+    the right answer and ``answers[i]`` the position picked (-1 = blank).
+    """
+
+    def __init__(self, bank, size=100, minutes=90, rng=random):
+        self.categories = bank.categories
+        alloc = stratify({cat: len(bank.ids(cat)) for cat in bank.categories}, size)
+        qids = []
+        for cat, n in alloc.items():
+            qids.extend(rng.sample(bank.ids(cat), n))
+        rng.shuffle(qids)
+
+        n = len(qids)
+        width = max((len(bank[qid].options) for qid in qids), default=0)
+        self.qids = np.array(qids, dtype=np.int32)
+        self.cats = np.empty(n, dtype=np.int8)
+        self.perms = np.full((n, width), -1, dtype=np.int8)
+        self.key = np.empty(n, dtype=np.int8)
+        cat_pos = {cat: i for i, cat in enumerate(self.categories)}
+        for i, qid in enumerate(qids):
+            q = bank[qid]
+            order = rng.sample(range(len(q.options)), len(q.options))
+            self.perms[i, :len(order)] = order
+            self.key[i] = order.index(q.options.index(q.answer))
+            self.cats[i] = cat_pos[q.category]
+        self.answers = np.full(n, -1, dtype=np.int8)
+
+        self.started = time.time()
+        self.deadline = self.started + minutes * 60
+        self.submitted = None
+
+    def __len__(self):
+        return len(self.qids)
+
+    def options(self, bank, i):
+        # Question i's options in the order this exam shows them
+        q = bank[int(self.qids[i])]
+        return [q.options[j] for j in self.perms[i] if j >= 0]
+
+    @property
+    def remaining(self):
+        return max(self.deadline - time.time(), 0.0)
+
+    def submit(self, answers):
+        # answers: shown position per question, None for blanks
+        self.answers[:] = [-1 if a is None else a for a in answers]
+        self.submitted = time.time()
+
+    def grade(self):
+        """Returns (summary dict, per-sector DataFrame, DataFrame of misses)."""
+        sheet = pd.DataFrame({
+            "position": np.arange(len(self)),
+            "qid": self.qids,
+            "sector": pd.Categorical.from_codes(self.cats, categories=self.categories),
+            "answered": self.answers >= 0,
+            "correct": self.answers == self.key,
+        })
+        by_sector = sheet.groupby("sector", observed=True).agg(
+            questions=("qid", "size"), answered=("answered", "sum"), correct=("correct", "sum"))
+        by_sector["score"] = by_sector["correct"] / by_sector["questions"]
+        summary = {
+            "questions": len(sheet),
+            "answered": int(sheet["answered"].sum()),
+            "correct": int(sheet["correct"].sum()),
+            "score": float(sheet["correct"].mean()) if len(sheet) else 0.0,
+            "seconds": (self.submitted or time.time()) - self.started,
+            "overtime": bool(self.submitted and self.submitted > self.deadline),
+        }
+        return summary, by_sector, sheet[~sheet["correct"]]
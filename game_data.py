@@ -0,0 +1,114 @@
+"""Static game content: the question bank records and the shop tables.
+
+Kept out of streamlit_app.py so the literals are built once per process on
+import instead of on every script rerun.
+"""
+
+# ==========================================
+# QUESTIONS (50 Real Questions from your PDFs)
+# ==========================================
+questions_db = [
+    # --- FINANCIAL ANALYSIS (FI, FM) ---
+    {"category": "Financial Analysis", "question": "Which of the following is the accounting equation?", "options": ["Assets = Liabilities - Owner's Equity", "Liabilities = Owner's Equity + Assets", "Assets = Liabilities + Owner's Equity", "Owner's Equity = Assets X Liabilities"], "answer": "Assets = Liabilities + Owner's Equity", "rationale": "The accounting equation states that a business's assets are equal to its liabilities plus owner's equity. This is the foundation of the balance sheet."},
+    {"category": "Financial Analysis", "question": "What is the primary purpose of a balance sheet?", "options": ["To show profit over time", "To show cash flow", "To capture financial condition at a specific moment", "To show shareholder equity changes"], "answer": "To capture financial condition at a specific moment", "rationale": "A balance sheet gives a summary of a company's financial health (Assets, Liabilities, Equity) at a specific point in time."},
+    {"category": "Financial Analysis", "question": "Marginal analysis determines whether a business activity will result in:", "options": ["Marginal revenue >= Marginal cost", "Net revenue < Marginal revenue", "Marginal cost > Marginal revenue", "Sunk cost recovery"], "answer": "Marginal revenue >= Marginal cost", "rationale": "Marginal analysis compares the additional benefits of an activity to the additional costs. You proceed if benefits >= costs."},
+    {"category": "Financial Analysis", "question": "A variance analysis helps a business:", "options": ["Compare with competitors", "Make choices between alternatives", "Maintain budgetary control", "Predict trends"], "answer": "Maintain budgetary control", "rationale": "Variance analysis compares actual results to the budget to identify why differences (variances) occurred."},
+    {"category": "Financial Analysis", "question": "Which cost classification helps determine how well a manager performed?", "options": ["By function", "By controllability", "By behavior", "By relevance"], "answer": "By controllability", "rationale": "Controllability classifies costs based on whether a specific manager has the power to influence them."},
+    {"category": "Financial Analysis", "question": "If a company pays more in dividends than it earns in net income, retained earnings will:", "options": ["Increase", "Stay the same", "Be zero", "Decrease"], "answer": "Decrease", "rationale": "Retained earnings = Beginning Earnings + Net Income - Dividends. If Dividends > Net Income, the total decreases."},
+    {"category": "Financial Analysis", "question": "Cost allocation is the process of:", "options": ["Determining market price", "Assigning costs to cost objects", "Calculating taxes", "Forecasting sales"], "answer": "Assigning costs to cost objects", "rationale": "Cost allocation divides indirect costs (like rent or utilities) among different departments or products."},
+    {"category": "Financial Analysis", "question": "Which represents a 'Sunk Cost'?", "options": ["Training for an employee who quit", "Raw materials", "Electric bill", "Future rent"], "answer": "Training for an employee who quit", "rationale": "Sunk costs have already been incurred and cannot be recovered. They should not influence future decisions."},
+    {"category": "Financial Analysis", "question": "To calculate the future value of money, you need:", "options": ["Present value & discount rate", "Past value & principal", "Income & interest", "Past value & present value"], "answer": "Present value & discount rate", "rationale": "FV = PV * (1 + r)^n. You need the starting amount (Present Value) and the interest rate."},
+    {"category": "Financial Analysis", "question": "Dividends paid to stockholders are reported on the statement of equity as:", "options": ["Additions to net income", "Subtractions from net income", "Operating expenses", "Assets"], "answer": "Subtractions from net income", "rationale": "Dividends are distributions of profit, so they reduce the Retained Earnings of the company."},
+
+    # --- LAW, ETHICS & RISK (BL, RM) ---
+    {"category": "Law & Ethics", "question": "A legally binding contract requires:", "options": ["Written signature", "Agreement by one party", "Exchange of value (consideration)", "Notarization"], "answer": "Exchange of value (consideration)", "rationale": "For a contract to be binding, something of value must be exchanged between parties."},
+    {"category": "Law & Ethics", "question": "Insider trading involves:", "options": ["Buying stock in your own company", "Selling stock before a merger becomes public", "Discussing stock prices", "Analyzing public data"], "answer": "Selling stock before a merger becomes public", "rationale": "Trading based on material, non-public information is illegal insider trading."},
+    {"category": "Law & Ethics", "question": "A Ponzi scheme relies on:", "options": ["Product sales", "Funds from new investors", "Government bonds", "Stock dividends"], "answer": "Funds from new investors", "rationale": "Ponzi schemes use money from new investors to pay fake 'returns' to earlier investors."},
+    {"category": "Law & Ethics", "question": "Which of the following is a tax-deductible expense for a business?", "options": ["Personal vacation", "Computers for the office", "Traffic tickets", "Political contributions"], "answer": "Computers for the office", "rationale": "Necessary business equipment is tax-deductible. Personal expenses and fines are not."},
+    {"category": "Law & Ethics", "question": "What is 'fiduciary responsibility'?", "options": ["Acting in the client's best interest", "Generating highest commissions", "Following manager orders", "Maximizing short-term profit"], "answer": "Acting in the client's best interest", "rationale": "A fiduciary is legally obligated to prioritize the client's financial well-being over their own."},
+    {"category": "Law & Ethics", "question": "Compliance technology helps organizations primarily by:", "options": ["Improving customer service", "Reducing costs and errors", "Avoiding all regulations", "Hiring more staff"], "answer": "Reducing costs and errors", "rationale": "Automated compliance reduces the manual labor and human error associated with regulatory reporting."},
+    {"category": "Law & Ethics", "question": "To manage risk, a company might form a 'captive insurance company' when:", "options": ["Commercial insurance won't cover their specific risks", "They want to avoid taxes", "They are too small for insurance", "They have no risks"], "answer": "Commercial insurance won't cover their specific risks", "rationale": "Captive insurance is a subsidiary formed to insure the parent company's specific risks."},
+    {"category": "Law & Ethics", "question": "Enterprise Risk Management (ERM) involves:", "options": ["Ignoring small risks", "Identifying risks across the whole organization", "Focusing only on financial risk", "Buying insurance only"], "answer": "Identifying risks across the whole organization", "rationale": "ERM is a holistic approach to managing all types of risk (strategic, operational, financial, hazard) together."},
+    {"category": "Law & Ethics", "question": "If an employee discovers a safety violation, they should:", "options": ["Ignore it", "Report it to protect employees/customers", "Fix it secretly", "Quit"], "answer": "Report it to protect employees/customers", "rationale": "Reporting noncompliance prevents accidents and protects the well-being of stakeholders."},
+    {"category": "Law & Ethics", "question": "The Sarbanes-Oxley Act relates to:", "options": ["Environmental protection", "Financial record transparency", "Workplace safety", "Import tariffs"], "answer": "Financial record transparency", "rationale": "Sarbanes-Oxley (SOX) regulates financial reporting and auditing to prevent corporate fraud."},
+
+    # --- ECONOMICS (EC) ---
+    {"category": "Economics", "question": "Which economic indicator is considered 'leading' (predicts future movement)?", "options": ["Unemployment rate", "Stock market returns", "GDP", "Inflation"], "answer": "Stock market returns", "rationale": "The stock market often moves before the general economy, making it a leading indicator."},
+    {"category": "Economics", "question": "During a recession (contraction), what usually decreases?", "options": ["Unemployment", "Interest rates", "Consumer spending", "Government debt"], "answer": "Consumer spending", "rationale": "In a recession, confidence drops and people spend less money."},
+    {"category": "Economics", "question": "If the US Dollar weakens against the Euro, US exports to Europe become:", "options": ["More expensive", "Cheaper", "Unchanged", "Illegal"], "answer": "Cheaper", "rationale": "A weak domestic currency makes exports cheaper for foreign buyers to purchase."},
+    {"category": "Economics", "question": "The law of diminishing returns states that adding more workers will eventually:", "options": ["Increase output indefinitely", "Decrease output per worker", "Eliminate costs", "Improve quality"], "answer": "Decrease output per worker", "rationale": "Adding variable resources (labor) to fixed resources (machinery) eventually yields lower marginal output."},
+    {"category": "Economics", "question": "Inflation is the steady increase in:", "options": ["Stock prices", "Prices of goods and services", "Unemployment", "Savings rates"], "answer": "Prices of goods and services", "rationale": "Inflation measures the rising cost of a basket of consumer goods over time."},
+    {"category": "Economics", "question": "What type of market structure involves trading unlisted stock via a dealer network?", "options": ["Auction market", "Over-the-counter (OTC)", "Futures market", "Bond market"], "answer": "Over-the-counter (OTC)", "rationale": "OTC markets handle securities not listed on major exchanges like the NYSE."},
+    {"category": "Economics", "question": "Which type of unemployment is caused by a general economic downturn?", "options": ["Frictional", "Structural", "Cyclical", "Seasonal"], "answer": "Cyclical", "rationale": "Cyclical unemployment rises and falls with the business cycle (recessions/expansions)."},
+    {"category": "Economics", "question": "Gross Domestic Product (GDP) measures:", "options": ["Total tax revenue", "Total value of goods/services produced", "Stock market growth", "Consumer debt"], "answer": "Total value of goods/services produced", "rationale": "GDP is the standard measure of a country's total economic output."},
+    {"category": "Economics", "question": "When supply exceeds demand, prices tend to:", "options": ["Increase", "Decrease", "Stay the same", "Fluctuate wildly"], "answer": "Decrease", "rationale": "Surplus supply puts downward pressure on prices to clear the market."},
+    {"category": "Economics", "question": "A tax on imported goods is called a:", "options": ["Quota", "Subsidy", "Tariff", "Embargo"], "answer": "Tariff", "rationale": "Tariffs are taxes levied on imports to protect domestic industries or raise revenue."},
+
+    # --- SYSTEMS & DATA (NF, OP, SM) ---
+    {"category": "Systems & Data", "question": "Data cleansing is used to:", "options": ["Encrypt data", "Remove errors and duplicates", "Speed up internet", "Monitor employees"], "answer": "Remove errors and duplicates", "rationale": "Data cleansing ensures databases are accurate, consistent, and useful for analysis."},
+    {"category": "Systems & Data", "question": "What allows businesses to share information between different computer systems?", "options": ["Electronic Data Interchange (EDI)", "Word Processing", "Spreadsheets", "Flash drives"], "answer": "Electronic Data Interchange (EDI)", "rationale": "EDI is the standard format for exchanging business data between different companies' systems."},
+    {"category": "Systems & Data", "question": "Predictive analytics uses data to:", "options": ["Summarize the past", "Forecast future events", "Clean databases", "Audit taxes"], "answer": "Forecast future events", "rationale": "Predictive analytics uses historical data to model probable future outcomes."},
+    {"category": "Systems & Data", "question": "A central data repository ensures:", "options": ["Slower access", "Inconsistent data", "Up-to-date, consistent data", "Data isolation"], "answer": "Up-to-date, consistent data", "rationale": "Central repositories provide a 'single source of truth' for the entire organization."},
+    {"category": "Systems & Data", "question": "Tokenization protects online transactions by:", "options": ["Lowering prices", "Substituting data with a random symbol", "Increasing speed", "Removing taxes"], "answer": "Substituting data with a random symbol", "rationale": "Tokenization replaces sensitive data (like card numbers) with a useless 'token' to prevent theft."},
+    {"category": "Systems & Data", "question": "What is the first step in project planning?", "options": ["Identify stakeholders", "Determine budget", "Schedule tasks", "Evaluate results"], "answer": "Identify stakeholders", "rationale": "You must know who is involved and what they need before defining scope or budget."},
+    {"category": "Systems & Data", "question": "Lean operations focus on:", "options": ["Increasing waste", "Eliminating waste", "Increasing inventory", "Reducing quality"], "answer": "Eliminating waste", "rationale": "Lean methodology aims to maximize value by removing all non-value-added activities (waste)."},
+    {"category": "Systems & Data", "question": "The 'Critical Path' in project management represents:", "options": ["The shortest time to complete", "The longest path of planned activities", "The most expensive tasks", "The easiest tasks"], "answer": "The longest path of planned activities", "rationale": "The critical path determines the earliest possible end date; if a critical task slips, the project slips."},
+    {"category": "Systems & Data", "question": "Encryption protects data by:", "options": ["Deleting it", "Transforming it into secret code", "Backing it up", "Organizing it"], "answer": "Transforming it into secret code", "rationale": "Encryption makes data unreadable to unauthorized users without a decryption key."},
+    {"category": "Systems & Data", "question": "A 'dashboard' in finance is used to:", "options": ["Drive cars", "Visualize key performance indicators (KPIs)", "Write code", "File taxes"], "answer": "Visualize key performance indicators (KPIs)", "rationale": "Dashboards provide at-a-glance views of critical data metrics."},
+
+    # --- SOFT SKILLS (CO, CR, EI, HR, PD) ---
+    {"category": "Soft Skills", "question": "Initiative is defined as:", "options": ["Waiting for instructions", "Acting without being told", "Doing the bare minimum", "Asking for help constantly"], "answer": "Acting without being told", "rationale": "Initiative involves recognizing what needs to be done and doing it proactively."},
+    {"category": "Soft Skills", "question": "Active listening involves:", "options": ["Interrupting to ask questions", "Thinking about your reply", "Verbal acknowledgment and eye contact", "Multitasking"], "answer": "Verbal acknowledgment and eye contact", "rationale": "Active listening requires full attention and providing feedback (nodding, 'I see') to the speaker."},
+    {"category": "Soft Skills", "question": "To build trust with a client, a finance professional should:", "options": ["Hide risks", "Be transparent and honest", "Use complex jargon", "Guarantee returns"], "answer": "Be transparent and honest", "rationale": "Transparency builds long-term trust. Hiding risks or guaranteeing returns is unethical."},
+    {"category": "Soft Skills", "question": "When negotiating, 'Batna' stands for:", "options": ["Best Alternative to a Negotiated Agreement", "Better Ask The New Associate", "Business Assets To Net Assets", "Buy All The New Assets"], "answer": "Best Alternative to a Negotiated Agreement", "rationale": "BATNA is your backup plan if negotiations fail; knowing it gives you leverage."},
+    {"category": "Soft Skills", "question": "A 'Whistleblower' policy encourages employees to:", "options": ["Spy on coworkers", "Report unethical behavior without fear", "Gossip", "Leak secrets to competitors"], "answer": "Report unethical behavior without fear", "rationale": "Whistleblower protections ensure employees can report illegal acts without retaliation."},
+    {"category": "Soft Skills", "question": "Emotional Intelligence (EQ) includes:", "options": ["IQ score", "Self-awareness and empathy", "Math skills", "Memorization"], "answer": "Self-awareness and empathy", "rationale": "EQ is the ability to understand and manage your own emotions and those of others."},
+    {"category": "Soft Skills", "question": "In a job interview, 'Tell me about yourself' is a test of:", "options": ["Your life story", "Communication skills and professional summary", "Honesty", "Your hobbies"], "answer": "Communication skills and professional summary", "rationale": "Interviewers want a concise summary of your professional background and relevance to the role."},
+    {"category": "Soft Skills", "question": "Consensus building means:", "options": ["Voting", "Majority rule", "Reaching substantial agreement", "The leader decides"], "answer": "Reaching substantial agreement", "rationale": "Consensus means the group generally agrees and can support the decision, even if not everyone loves it."},
+    {"category": "Soft Skills", "question": "Which communication channel is best for sensitive bad news?", "options": ["Email", "Text message", "Face-to-face", "Memo"], "answer": "Face-to-face", "rationale": "Sensitive news requires reading non-verbal cues and showing empathy, best done in person."},
+    {"category": "Soft Skills", "question": "Networking is primarily about:", "options": ["Asking for jobs", "Building mutually beneficial relationships", "Collecting business cards", "Selling products"], "answer": "Building mutually beneficial relationships", "rationale": "Effective networking is about exchange and relationship building, not just taking."},
+]
+
+# Sectors, in display order. Imported banks (tools/import_questions.py)
+# may only use these unless the import allows more.
+categories = ("Financial Analysis", "Law & Ethics", "Economics", "Systems & Data", "Soft Skills")
+
+# ==========================================
+# SHOP TABLES
+# ==========================================
+office_tiers = {
+    "The Basement": {"cost": 0, "img": "https://images.unsplash.com/photo-1504384308090-c54be3855833?w=400"},
+    "The Bullpen": {"cost": 50000, "img": "https://images.unsplash.com/photo-1497215728101-856f4ea42174?w=400"},
+    "Associate Office": {"cost": 200000, "img": "https://images.unsplash.com/photo-1662973599908-724d27ae3443?w=400"},
+    "VP Suite": {"cost": 1000000, "img": "https://images.unsplash.com/photo-1600607686527-6fb886090705?w=400"},
+    "The Penthouse": {"cost": 10000000, "img": "https://images.unsplash.com/photo-1512918760383-5658fc14bc63?w=400"}
+}
+
+talent_roster = {
+    "Junior Analyst": {"cost": 20000, "desc": "Unlocks 'Research Note' (Hints)", "icon": "💡"},
+    "The Quant": {"cost": 75000, "desc": "Unlocks 'Algorithm' (Eliminate 2 wrong)", "icon": "📉"},
+    "Risk Manager": {"cost": 150000, "desc": "Unlocks 'Hedge' (Skip question)", "icon": "🛡️"}
+}
+
+# ==========================================
+# RULE TABLES
+# ==========================================
+answer_payout = 10000  # Deposited on every correct answer
+
+# Career ladder: (minimum lifetime earnings, title), ascending
+title_ladder = [
+    (0, "Unpaid Intern"),
+    (50000, "Junior Analyst"),
+    (150000, "Associate"),
+    (500000, "Vice President"),
+    (2000000, "Managing Director"),
+    (10000000, "Master of the Universe"),
+]
+
+# Demotion: lifetime earnings above the first value drop to the second
+# (the start of the previous tier); anything lower drops to 0
+demotion_floors = [
+    (2000000, 500000),
+    (500000, 150000),
+    (150000, 50000),
+]
@@ -0,0 +1,197 @@
+"""Process-wide leaderboard shared by every session.
+
+Players are kept in a skip list ordered by (lifetime earnings, rolling
+accuracy), so an update is O(log n) and the top K is the first K nodes.
+Streamlit runs each session on its own thread, so all mutations take one
+lock; readers get an immutable snapshot that is rebuilt at most once per
+version, so rendering the sidebar never sorts or walks the whole board.
+"""
+import atexit
+import json
+import os
+import random
+import threading
+from typing import NamedTuple
+
+
+class LeaderboardEntry(NamedTuple):
+    player_id: str
+    name: str
+    earnings: int
+    accuracy: float
+
+
+class _Node:
+    __slots__ = ("key", "entry", "next")
+
+    def __init__(self, key, entry, level):
+        self.key = key
+        self.entry = entry
+        self.next = [None] * level
+
+
+class SkipList:
+    """Ordered map from unique sortable keys to values (ascending)."""
+
+    MAX_LEVEL = 24
+    P = 0.25
+
+    def __init__(self, rng=None):
+        self._head = _Node(None, None, self.MAX_LEVEL)
+        self._level = 1
+        self._len = 0
+        self._rng = rng or random.Random()
+
+    def __len__(self):
+        return self._len
+
+    def _random_level(self):
+        level = 1
+        while level < self.MAX_LEVEL and self._rng.random() < self.P:
+            level += 1
+        return level
+
+    def _predecessors(self, key):
+        update = [self._head] * self.MAX_LEVEL
+        node = self._head
+        for lvl in range(self._level - 1, -1, -1):
+            nxt = node.next[lvl]
+            while nxt is not None and nxt.key < key:
+                node = nxt
+                nxt = node.next[lvl]
+            update[lvl] = node
+        return update
+
+    def insert(self, key, entry):
+        update = self._predecessors(key)
+        level = self._random_level()
+        if level > self._level:
+            self._level = level
+        node = _Node(key, entry, level)
+        for lvl in range(level):
+            node.next[lvl] = update[lvl].next[lvl]
+            update[lvl].next[lvl] = node
+        self._len += 1
+
+    def remove(self, key):
+        update = self._predecessors(key)
+        node = update[0].next[0]
+        if node is None or node.key != key:
+            return False
+        for lvl in range(len(node.next)):
+            update[lvl].next[lvl] = node.next[lvl]
+        while self._level > 1 and self._head.next[self._level - 1] is None:
+            self._level -= 1
+        self._len -= 1
+        return True
+
+    def first(self, k):
+        out = []
+        node = self._head.next[0]
+        while node is not None and len(out) < k:
+            out.append(node.entry)
+            node = node.next[0]
+        return out
+
+    def __iter__(self):
+        node = self._head.next[0]
+        while node is not None:
+            yield node.entry
+            node = node.next[0]
+
+
+class Leaderboard:
+    """Ranks players by lifetime earnings, then rolling accuracy.
+
+    ``path`` optionally persists the board as JSON: it is loaded on start and
+    rewritten by a background thread whenever the version has moved.
+    """
+
+    def __init__(self, path=None, snapshot_size=10, save_interval=5.0):
+        self.path = path
+        self.snapshot_size = snapshot_size
+        self.save_interval = save_interval
+        self._lock = threading.Lock()
+        self._list = SkipList()
+        self._keys = {}           # player_id -> current skip-list key
+        self._version = 0
+        self._snapshot = (0, ())  # (version, top entries)
+        self._saved_version = 0
+
+        if path:
+            self._load()
+            self._stop = threading.Event()
+            self._saver = threading.Thread(target=self._autosave, name="leaderboard-save", daemon=True)
+            self._saver.start()
+            atexit.register(self.close)
+
+    @staticmethod
+    def _key(entry):
+        # Ascending skip list, best first; player_id makes keys unique
+        return (-entry.earnings, -entry.accuracy, entry.player_id)
+
+    def __len__(self):
+        return len(self._list)
+
+    @property
+    def version(self):
+        return self._version
+
+    def update(self, player_id, earnings, accuracy, name=None):
+        entry = LeaderboardEntry(player_id, name or player_id[:6], int(earnings), float(accuracy or 0.0))
+        key = self._key(entry)
+        with self._lock:
+            old = self._keys.get(player_id)
+            if old == key:
+                return
+            if old is not None:
+                self._list.remove(old)
+            self._list.insert(key, entry)
+            self._keys[player_id] = key
+            self._version += 1
+
+    def snapshot(self):
+        # (version, top entries); rebuilt only when the board has changed
+        snap = self._snapshot
+        if snap[0] == self._version:
+            return snap
+        with self._lock:
+            if self._snapshot[0] != self._version:
+                self._snapshot = (self._version, tuple(self._list.first(self.snapshot_size)))
+            return self._snapshot
+
+    # --- Persistence ---
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                rows = json.load(f)
+        except (OSError, ValueError):
+            return
+        for row in rows:
+            self.update(row["player_id"], row["earnings"], row["accuracy"], row.get("name"))
+        self._saved_version = self._version
+
+    def save(self):
+        with self._lock:
+            version = self._version
+            rows = [entry._asdict() for entry in self._list]
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(rows, f, separators=(",", ":"))
+        os.replace(tmp, self.path)
+        self._saved_version = version
+
+    def _autosave(self):
+        while not self._stop.wait(self.save_interval):
+            if self._version != self._saved_version:
+                try:
+                    self.save()
+                except OSError:
+                    pass  # Try again next tick
+
+    def close(self):
+        if not self.path:
+            return
+        self._stop.set()
+        if self._version != self._saved_version:
+            self.save()
@@ -0,0 +1,229 @@
+"""Process-wide runtime metrics.
+
+Counters and histograms that the app and the engine update as they run,
+exposed as Prometheus text or JSON: through an opt-in HTTP thread
+(``DECA_METRICS_PORT``) or the app's ``?metrics`` view. Recording is a
+dict update under a lock, about a microsecond; ``tools/bench_metrics.py``
+measures the cost per rerun.
+"""
+import bisect
+import json
+import logging
+import sys
+import threading
+from array import array
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+log = logging.getLogger(__name__)
+
+# Seconds; Streamlit runs of this app take milliseconds
+TIME_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+BYTE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+class Counter:
+    """Monotonic counts, one per combination of label values."""
+
+    kind = "counter"
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def value(self, *label_values):
+        return self._values.get(label_values, 0)
+
+    def samples(self):
+        with self._lock:
+            return [(key, value) for key, value in self._values.items()]
+
+
+class Histogram:
+    """Bucketed observations (plus sum and count) per combination of label values."""
+
+    kind = "histogram"
+
+    def __init__(self, name, help, buckets, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        self._series = {}  # label values -> [bucket counts, sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [array("Q", [0]) * (len(self.buckets) + 1), 0.0, 0]
+            series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def samples(self):
+        with self._lock:
+            return [(key, (list(counts), total, n)) for key, (counts, total, n) in self._series.items()]
+
+
+class Registry:
+    """A named set of metrics with Prometheus-text and JSON renderers."""
+
+    def __init__(self):
+        self._metrics = []
+
+    def counter(self, name, help, labels=()):
+        metric = Counter(name, help, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help, buckets, labels=()):
+        metric = Histogram(name, help, buckets, labels)
+        self._metrics.append(metric)
+        return metric
+
+    @staticmethod
+    def _escape(value, quotes=True):
+        # Exposition format: backslash, newline and (in label values) double quote
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n")
+        return value.replace('"', '\\"') if quotes else value
+
+    @classmethod
+    def _labels(cls, names, values, extra=""):
+        pairs = [f'{name}="{cls._escape(value)}"' for name, value in zip(names, values)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def render_prometheus(self):
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {self._escape(metric.help, quotes=False)}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for key, value in metric.samples():
+                if metric.kind == "counter":
+                    lines.append(f"{metric.name}{self._labels(metric.labels, key)} {value}")
+                    continue
+                counts, total, n = value
+                cumulative = 0
+                for bound, count in zip(metric.buckets + ("+Inf",), counts):
+                    cumulative += count
+                    le = self._labels(metric.labels, key, f'le="{bound}"')
+                    lines.append(f"{metric.name}_bucket{le} {cumulative}")
+                lines.append(f"{metric.name}_sum{self._labels(metric.labels, key)} {total}")
+                lines.append(f"{metric.name}_count{self._labels(metric.labels, key)} {n}")
+        return "\n".join(lines) + "\n"
+
+    def to_dict(self):
+        out = {}
+        for metric in self._metrics:
+            series = []
+            for key, value in metric.samples():
+                entry = {"labels": dict(zip(metric.labels, key))}
+                if metric.kind == "counter":
+                    entry["value"] = value
+                else:
+                    counts, total, n = value
+                    entry.update(buckets=dict(zip([str(b) for b in metric.buckets] + ["+Inf"], counts)),
+                                 sum=total, count=n)
+                series.append(entry)
+            out[metric.name] = {"type": metric.kind, "help": metric.help, "series": series}
+        return out
+
+    def render_json(self):
+        return json.dumps(self.to_dict(), indent=2)
+
+
+class AppMetrics(Registry):
+    """The metrics this app records."""
+
+    def __init__(self):
+        super().__init__()
+        self.run_seconds = self.histogram(
+            "deca_run_seconds", "Script run time per scope (app or fragment key)", TIME_BUCKETS, ("scope",))
+        self.reruns = self.counter(
+            "deca_reruns_total", "st.rerun calls from callbacks, full app or fragments", ("scope",))
+        self.questions_served = self.counter(
+            "deca_questions_served_total", "Questions dealt per category", ("category",))
+        self.answers = self.counter(
+            "deca_answers_total", "Answers checked, by result", ("result",))
+        self.demotions = self.counter(
+            "deca_demotions_total", "Risk of Ruin demotions executed")
+        self.session_state_bytes = self.histogram(
+            "deca_session_state_bytes", "Sampled deep size of one session's state and its live player", BYTE_BUCKETS)
+        self.session_offloads = self.counter(
+            "deca_session_offloads_total", "Players offloaded to disk, by reason (idle, budget, shutdown)",
+            ("reason",))
+        self.session_loads = self.counter(
+            "deca_session_loads_total", "Offloaded players loaded back on their next visit")
+
+
+def deep_sizeof(obj, shared=(), shared_types=()):
+    """Bytes reachable from obj, counting each object once.
+
+    Objects in ``shared`` and instances of ``shared_types`` are process-wide
+    (the bank, the sampler layout) and are not charged to the session.
+    """
+    seen = {id(o) for o in shared}
+    total = 0
+    stack = [obj]
+    while stack:
+        o = stack.pop()
+        if id(o) in seen or isinstance(o, shared_types):
+            continue
+        seen.add(id(o))
+        total += sys.getsizeof(o)
+        if isinstance(o, dict):
+            stack.extend(o.keys())
+            stack.extend(o.values())
+        elif isinstance(o, (list, tuple, set, frozenset)):
+            stack.extend(o)
+        elif not isinstance(o, (str, bytes, bytearray, array, int, float)):
+            slots = getattr(type(o), "__slots__", ())
+            stack.extend(getattr(o, name) for name in slots if hasattr(o, name))
+            if hasattr(o, "__dict__"):
+                stack.append(o.__dict__)
+    return total
+
+
+def serve(registry, port, host="127.0.0.1"):
+    """Serve /metrics (Prometheus text) and /metrics.json from a daemon thread.
+
+    Returns the server, or None if the port can't be bound (e.g. already in
+    use): the app runs on without the exporter rather than failing.
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.startswith("/metrics.json"):
+                body, kind = registry.render_json(), "application/json"
+            elif self.path.startswith("/metrics"):
+                body, kind = registry.render_prometheus(), "text/plain; version=0.0.4"
+            else:
+                self.send_error(404)
+                return
+            data = body.encode()
+            self.send_response(200)
+            self.send_header("Content-Type", f"{kind}; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass  # Scrapes would flood the Streamlit log
+
+    try:
+        server = ThreadingHTTPServer((host, port), Handler)
+    except OSError as exc:
+        log.warning("Metrics exporter disabled, cannot listen on %s:%s: %s", host, port, exc)
+        return None
+    thread = threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True)
+    thread.start()
+    return server
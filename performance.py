@@ -0,0 +1,90 @@
+"""Rolling accuracy windows for the Risk of Ruin protocol and the dashboard."""
+
+
+class RollingWindow:
+    """Fixed-capacity window of answer results with a running count.
+
+    The results are the low ``capacity`` bits of one int, newest in bit 0,
+    so a window is a handful of small ints however long it runs. Appending,
+    reading accuracy and checking fullness are all O(1).
+    """
+
+    __slots__ = ("capacity", "correct", "_bits", "_len")
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.correct = 0
+        self._bits = 0
+        self._len = 0
+
+    def __len__(self):
+        return self._len
+
+    @property
+    def is_full(self):
+        return self._len == self.capacity
+
+    @property
+    def accuracy(self):
+        # None until there is at least one answer
+        return self.correct / self._len if self._len else None
+
+    def __iter__(self):
+        # Oldest to newest
+        bits = self._bits
+        for i in range(self._len - 1, -1, -1):
+            yield bits >> i & 1
+
+    def append(self, correct):
+        bit = 1 if correct else 0
+        if self._len == self.capacity:
+            self.correct -= self._bits >> (self.capacity - 1) & 1  # Oldest answer falls out
+        else:
+            self._len += 1
+        self._bits = (self._bits << 1 | bit) & ((1 << self.capacity) - 1)
+        self.correct += bit
+
+    def clear(self):
+        self.correct = 0
+        self._bits = 0
+        self._len = 0
+
+
+class PerformanceTracker:
+    """Overall window plus one parallel window per category."""
+
+    __slots__ = ("window_size", "overall", "by_category")
+
+    def __init__(self, window_size):
+        self.window_size = window_size
+        self.overall = RollingWindow(window_size)
+        self.by_category = {}
+
+    def record(self, category, correct):
+        self.overall.append(correct)
+        window = self.by_category.get(category)
+        if window is None:
+            window = self.by_category[category] = RollingWindow(self.window_size)
+        window.append(correct)
+
+    def clear(self):
+        self.overall.clear()
+        self.by_category.clear()
+
+    def to_state(self):
+        # Plain, JSON-friendly form for the player store
+        return {
+            "overall": list(self.overall),
+            "by_category": {cat: list(w) for cat, w in self.by_category.items()},
+        }
+
+    @classmethod
+    def from_state(cls, window_size, state):
+        tracker = cls(window_size)
+        for bit in state.get("overall", ()):
+            tracker.overall.append(bit)
+        for cat, bits in state.get("by_category", {}).items():
+            window = tracker.by_category[cat] = RollingWindow(window_size)
+            for bit in bits:
+                window.append(bit)
+        return tracker
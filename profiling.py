@@ -0,0 +1,176 @@
+"""Opt-in profiling of script and fragment runs.
+
+A ``RunProfile`` times one run: named sections (``section`` blocks and
+``lap`` marks in streamlit_app.py) and, unless only the timers were asked
+for, a deterministic cProfile of everything the run called. The cProfile is
+written out as collapsed stacks (``frame;frame;frame microseconds`` per
+line), which flamegraph.pl, speedscope and most flame graph viewers read.
+
+The run in progress is kept per thread (Streamlit runs each session's
+script on its own thread), so ``section`` and ``lap`` are no-ops, a
+thread-local read, when nothing is being profiled.
+"""
+import contextlib
+import cProfile
+import os
+import pstats
+import threading
+import time
+from collections import defaultdict
+
+_local = threading.local()
+
+
+class RunProfile:
+    """Section timings (and optionally a cProfile) of one script or fragment run.
+
+    Section names nest with "/": a ``section("real_estate")`` around a
+    ``section("office images")`` records both "real_estate" and
+    "real_estate/office images".
+    """
+
+    def __init__(self, scope, stacks=True):
+        self.scope = scope
+        self.sections = defaultdict(float)
+        self.seconds = None
+        self._path = []
+        self._profiler = None
+        if stacks:
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:
+                pass  # Another profiler is active (Python 3.12+ allows one per process): timers only
+            else:
+                self._profiler = profiler
+        self._started = self._lap = time.perf_counter()
+
+    def stop(self):
+        if self.seconds is None:
+            self.seconds = time.perf_counter() - self._started
+            if self._profiler is not None:
+                self._profiler.disable()
+        return self
+
+    def lap(self, name):
+        # Charges the time since the previous lap (or the start) to a top-level section
+        now = time.perf_counter()
+        self.sections[name] += now - self._lap
+        self._lap = now
+
+    @contextlib.contextmanager
+    def section(self, name):
+        self._path.append(name)
+        key = "/".join(self._path)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.sections[key] += time.perf_counter() - start
+            self._path.pop()
+
+    def write_collapsed(self, path):
+        # No-op without a cProfile; returns whether a file was written
+        if self._profiler is None:
+            return False
+        lines = collapsed_stacks(pstats.Stats(self._profiler).stats)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            f.writelines(f"{stack} {us}\n" for stack, us in lines)
+        return True
+
+
+def start(scope, stacks=True):
+    # Replaces any run left behind by an aborted one on this thread
+    _local.run = RunProfile(scope, stacks)
+    return _local.run
+
+
+def current():
+    return getattr(_local, "run", None)
+
+
+def finish():
+    # Stops the thread's run and returns it (None if nothing was running)
+    run = current()
+    _local.run = None
+    return None if run is None else run.stop()
+
+
+def lap(name):
+    run = current()
+    if run is not None:
+        run.lap(name)
+
+
+def section(name):
+    run = current()
+    return contextlib.nullcontext() if run is None else run.section(name)
+
+
+def _frame(func):
+    filename, line, name = func
+    if filename == "~":
+        label = name  # Built-ins: "<built-in method time.sleep>"
+    else:
+        label = f"{name} ({os.path.basename(filename)}:{line})"
+    # Viewers split frames on ";" and the count off at the last space, so spaces are fine
+    return label.replace(";", ",")
+
+
+def collapsed_stacks(stats, min_seconds=1e-6, max_depth=96):
+    """cProfile stats as (stack, microseconds) pairs, heaviest first.
+
+    cProfile records caller -> callee edges, not whole stacks, so each path
+    is rebuilt from the roots down: a function's time on a path is its
+    total time scaled by the share of its calls that came along that path.
+    Recursive calls are folded into the first frame of the function.
+    """
+    callees = defaultdict(list)
+    for func, (_, _, _, _, callers) in stats.items():
+        for caller, (_, _, _, edge) in callers.items():
+            callees[caller].append((func, edge))
+    roots = [func for func, entry in stats.items() if not entry[4]]
+
+    out = defaultdict(float)
+    path, on_path = [], set()
+
+    def walk(func, share):
+        _, _, own, total, _ = stats[func]
+        path.append(_frame(func))
+        on_path.add(func)
+        if own * share >= min_seconds:
+            out[";".join(path)] += own * share
+        if len(path) < max_depth:
+            for child, edge in callees[func]:
+                child_total = stats[child][3]
+                if child in on_path or child_total <= 0 or edge * share < min_seconds:
+                    continue
+                walk(child, share * edge / child_total)
+        on_path.discard(func)
+        path.pop()
+
+    for root in roots:
+        walk(root, 1.0)
+    return sorted(((stack, round(seconds * 1e6)) for stack, seconds in out.items() if seconds >= 0.5e-6),
+                  key=lambda item: -item[1])
+
+
+def slowest_sections(runs):
+    """Per section over ``runs`` ((scope, seconds, sections) tuples): slowest first.
+
+    Returns (section, runs it appeared in, total, mean, max) tuples in seconds.
+    Time a full run spent outside every section is reported as "(other)".
+    """
+    totals = {}
+    for scope, seconds, sections in runs:
+        top = sum(value for name, value in sections.items() if "/" not in name)
+        if scope == "app":
+            sections = dict(sections, **{"(other)": max(seconds - top, 0.0)})
+        for name, value in sections.items():
+            entry = totals.setdefault(name, [0, 0.0, 0.0])
+            entry[0] += 1
+            entry[1] += value
+            entry[2] = max(entry[2], value)
+    return sorted(((name, n, total, total / n, peak) for name, (n, total, peak) in totals.items()),
+                  key=lambda row: -row[2])
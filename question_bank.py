@@ -0,0 +1,157 @@
+"""Immutable, indexed question bank.
+
+Built once per process (see ``load_question_bank`` in resources.py) and
+shared read-only by every session, so nothing here may be mutated after
+construction. ``QuestionBank`` holds a list of records in memory;
+``CompiledBank`` reads a file built by tools/import_questions.py and pages
+questions in on demand.
+"""
+import bisect
+import hashlib
+import pathlib
+import random
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import NamedTuple
+
+
+# Compiled banks store options joined by the ASCII unit separator (cheaper to
+# split than JSON to parse); the importer's cleaning strips it from the text
+OPTION_SEP = "\x1f"
+
+
+class Question(NamedTuple):
+    id: int
+    category: str
+    question: str
+    options: tuple
+    answer: str
+    rationale: str
+
+
+class QuestionBank:
+    """Questions addressed by integer ID with a precomputed category index.
+
+    IDs are the positions in the bank, so lookups and per-category random
+    draws are O(1) and never rescan the question list. ``fingerprint``
+    identifies the content, for caches derived from the bank.
+    """
+
+    def __init__(self, records):
+        questions = []
+        by_category = {}
+        digest = hashlib.sha1()
+        for qid, rec in enumerate(records):
+            q = Question(
+                id=qid,
+                category=rec["category"],
+                question=rec["question"],
+                options=tuple(rec["options"]),
+                answer=rec["answer"],
+                rationale=rec["rationale"],
+            )
+            questions.append(q)
+            by_category.setdefault(q.category, []).append(qid)
+            digest.update(OPTION_SEP.join((q.category, q.question, q.answer, q.rationale) + q.options).encode())
+
+        self._questions = tuple(questions)
+        self._all_ids = tuple(range(len(questions)))
+        # Category -> tuple of IDs, in first-seen order of the source records
+        self._by_category = {cat: tuple(ids) for cat, ids in by_category.items()}
+        self.categories = tuple(self._by_category)
+        self.fingerprint = digest.hexdigest()
+
+    def __len__(self):
+        return len(self._all_ids)
+
+    def __getitem__(self, qid):
+        return self._questions[qid]
+
+    def __contains__(self, category):
+        return category in self._by_category
+
+    def ids(self, category="All"):
+        if category == "All":
+            return self._all_ids
+        return self._by_category.get(category, ())
+
+    def random_id(self, category="All", rng=random):
+        # Unknown categories return None so the caller decides how to fall back
+        ids = self.ids(category)
+        if not ids:
+            return None
+        return ids[rng.randrange(len(ids))]
+
+    def draw(self, category="All", rng=random):
+        qid = self.random_id(category, rng)
+        return None if qid is None else self[qid]
+
+
+class CompiledBank(QuestionBank):
+    """A bank compiled to SQLite by tools/import_questions.py.
+
+    The compiler numbers questions so each category is a contiguous ID
+    range, so startup only reads the small category table. Questions are
+    read from the memory-mapped file in fixed-size pages on first use and
+    kept in a bounded LRU, so startup time and resident memory stay flat as
+    the bank grows.
+    """
+
+    PAGE_SIZE = 16  # Draws are random, so small pages waste less per miss
+
+    def __init__(self, path, max_pages=1024, mmap_bytes=256 * 1024 * 1024):
+        self.path = path
+        self.max_pages = max_pages
+        self.mmap_bytes = mmap_bytes
+        self._uri = pathlib.Path(path).resolve().as_uri() + "?mode=ro"
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._pages = OrderedDict()
+
+        conn = self._connect()
+        rows = conn.execute("SELECT name, first_id, count FROM categories ORDER BY first_id").fetchall()
+        meta = dict(conn.execute("SELECT key, value FROM meta"))
+        self.categories = tuple(name for name, _, _ in rows)
+        self._by_category = {name: range(first, first + count) for name, first, count in rows}
+        self._firsts = [first for _, first, _ in rows]
+        self._all_ids = range(int(meta["count"]))
+        self.fingerprint = meta["fingerprint"]
+
+    def _connect(self):
+        # sqlite3 connections must not be shared across threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self._uri, uri=True)
+            conn.execute(f"PRAGMA mmap_size={int(self.mmap_bytes)}")
+            self._local.conn = conn
+        return conn
+
+    def _load_page(self, page_no):
+        start = page_no * self.PAGE_SIZE
+        rows = self._connect().execute(
+            "SELECT id, question, options, answer, rationale FROM questions WHERE id >= ? AND id < ? ORDER BY id",
+            (start, start + self.PAGE_SIZE),
+        ).fetchall()
+        page = []
+        for qid, question, options, answer, rationale in rows:
+            options = tuple(options.split(OPTION_SEP))
+            category = self.categories[bisect.bisect_right(self._firsts, qid) - 1]
+            page.append(Question(qid, category, question, options, options[answer], rationale))
+        return tuple(page)
+
+    def __getitem__(self, qid):
+        if not 0 <= qid < len(self._all_ids):
+            raise IndexError(qid)
+        page_no, offset = divmod(qid, self.PAGE_SIZE)
+        with self._lock:
+            page = self._pages.get(page_no)
+            if page is not None:
+                self._pages.move_to_end(page_no)
+                return page[offset]
+        page = self._load_page(page_no)  # Outside the lock; a racing load is harmless
+        with self._lock:
+            self._pages[page_no] = page
+            while len(self._pages) > self.max_pages:
+                self._pages.popitem(last=False)
+        return page[offset]
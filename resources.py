@@ -0,0 +1,96 @@
+"""Process-wide resources, built once per process and shared by every session.
+
+Each loader is an ``st.cache_resource``, so every session of the app gets
+the same bank, engine, player pool and so on. The tools that drive the app
+in-process with AppTest (tools/rerun_budget.py, tools/room_sim.py) call the
+same loaders to reach the objects the app is using. Settings are read on
+import, so a tool sets its environment first.
+"""
+import streamlit as st
+
+import settings
+from assets import AssetCache
+from engine import GameEngine
+from events import EventLog
+from game_data import office_tiers, questions_db
+from leaderboard import Leaderboard
+from metrics import AppMetrics, serve as serve_metrics
+from question_bank import CompiledBank, QuestionBank
+from rooms import RoomStore
+from search import SearchIndex
+from sessions import SessionPool
+from storage import SQLiteStore, WriteBehindStore
+
+
+@st.cache_resource
+def load_question_bank():
+    # A compiled bank (tools/import_questions.py) is paged in on demand
+    if settings.BANK_PATH:
+        return CompiledBank(settings.BANK_PATH)
+    return QuestionBank(questions_db)
+
+
+@st.cache_resource
+def load_metrics():
+    if not settings.METRICS:
+        return None
+    registry = AppMetrics()
+    if settings.METRICS_PORT:
+        serve_metrics(registry, settings.METRICS_PORT, settings.METRICS_HOST)
+    return registry
+
+
+@st.cache_resource
+def load_engine():
+    return GameEngine(load_question_bank(), metrics=load_metrics())
+
+
+@st.cache_resource
+def load_player_store():
+    # One writer thread per process; sessions only enqueue snapshots
+    return WriteBehindStore(SQLiteStore(settings.DB_PATH), flush_interval=settings.DB_FLUSH_INTERVAL)
+
+
+@st.cache_resource
+def load_session_pool():
+    # Live players for every session; idle ones are offloaded to the player database
+    return SessionPool(load_engine(), settings.DB_PATH, idle_seconds=settings.SESSION_IDLE_SECONDS,
+                       max_bytes=settings.SESSION_MEMORY_BYTES, sweep_interval=settings.SESSION_SWEEP_INTERVAL,
+                       metrics=load_metrics())
+
+
+@st.cache_resource
+def load_asset_cache():
+    cache = AssetCache(settings.ASSET_DIR, width=settings.ASSET_WIDTH,
+                       max_bytes=settings.ASSET_MEMORY_BYTES, offline=settings.OFFLINE)
+    # Resolve every tier image once, off the script thread
+    cache.warm_in_background((name, data['img']) for name, data in office_tiers.items())
+    return cache
+
+
+@st.cache_resource(show_spinner="Indexing the question bank (first search only)...")
+def load_search_index(fingerprint):
+    # Keyed on the bank's content, so a changed bank gets a fresh index. Not
+    # built at startup: it reads every question (paging in all of a compiled
+    # bank), so it waits for the first search (render_study)
+    return SearchIndex(load_question_bank())
+
+
+@st.cache_resource
+def load_leaderboard():
+    # Shared by every session; updates are locked, reads use a versioned snapshot
+    return Leaderboard(settings.LEADERBOARD_PATH or None, snapshot_size=settings.LEADERBOARD_SIZE)
+
+
+@st.cache_resource
+def load_event_log():
+    # Answer history; a background thread appends it to Parquet in batches
+    return EventLog(settings.EVENTS_DIR or None, batch_size=settings.EVENTS_BATCH,
+                    flush_interval=settings.EVENTS_FLUSH_INTERVAL, max_players=settings.EVENTS_MAX_PLAYERS)
+
+
+@st.cache_resource
+def load_room_store():
+    # Live rooms; each has its own lock, clients poll a versioned snapshot
+    return RoomStore(load_engine(), rounds=settings.ROOM_ROUNDS, round_seconds=settings.ROOM_ROUND_SECONDS,
+                     reveal_seconds=settings.ROOM_REVEAL_SECONDS, max_players=settings.ROOM_MAX_PLAYERS)
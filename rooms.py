@@ -0,0 +1,286 @@
+"""Live head-to-head rooms: everyone in a room races on the same questions.
+
+A ``RoomStore`` is process-wide (see ``load_room_store`` in
+resources.py). The store's own lock only guards creating, finding and
+dropping rooms. Everything else takes one room's lock, so rooms never
+contend with each other. Readers poll ``Room.snapshot()``, an immutable view
+rebuilt at most once per version, so thirty clients polling an unchanged
+room cost thirty attribute reads and no locks.
+
+A match is a fixed number of rounds. A round deals one question to every
+member at the same moment and closes when everyone has answered or its time
+is up. The results then show for a few seconds, which doubles as the
+countdown to the next round. Time only moves the room on when someone looks
+at it (``Room.advance``), so idle rooms cost nothing and there is no timer
+thread. Answers are scored by ``GameEngine.check_answer``, so a room pays
+exactly what the Trading Floor pays.
+"""
+import random
+import string
+import threading
+import time
+from typing import NamedTuple
+
+# lobby -> open -> reveal -> open -> ... -> final -> (rematch) open
+PHASES = ("lobby", "open", "reveal", "final")
+
+
+class Standing(NamedTuple):
+    player_id: str
+    name: str
+    points: int
+    correct: int
+    seconds: float  # Total answer time of correct answers, the tiebreak
+
+
+class RoundResult(NamedTuple):
+    player_id: str
+    name: str
+    option: str
+    correct: bool
+    seconds: float
+
+
+class RoomSnapshot(NamedTuple):
+    version: int
+    code: str
+    host: str             # player_id of whoever opened the room
+    phase: str
+    round: int            # 1-based; 0 in the lobby
+    rounds: int
+    qid: int              # Question of the current (or just closed) round, -1 in the lobby
+    opens_at: float       # time.time() the round's question appeared
+    next_at: float        # When the phase changes on its own; 0 if it waits for the host
+    members: int
+    answered: int         # Members who answered this round
+    standings: tuple      # Standing, best first
+    results: tuple        # RoundResult of this round, in answer order
+
+
+class _Member:
+    __slots__ = ("name", "points", "correct", "seconds", "answer")
+
+    def __init__(self, name):
+        self.name = name
+        self.points = 0
+        self.correct = 0
+        self.seconds = 0.0
+        self.answer = None  # RoundResult this round, or None
+
+
+class Room:
+    """One room's state, guarded by its own lock.
+
+    Mutators bump ``version``; ``snapshot()`` rebuilds the shared view only
+    when the version has moved since the last reader.
+    """
+
+    def __init__(self, code, host, store):
+        self.code = code
+        self.host = host
+        self.store = store
+        self.lock = threading.Lock()
+        self.members = {}        # player_id -> _Member, in join order
+        self.phase = "lobby"
+        self.round = 0
+        self.qid = -1
+        self.opens_at = 0.0
+        self.next_at = 0.0
+        self.answers = []        # RoundResult in answer order
+        self.version = 0
+        self.touched = time.time()
+        self._asked = set()      # qids already dealt this match
+        self._snapshot = None
+
+    # --- Reading ---
+    def snapshot(self):
+        snap = self._snapshot
+        if snap is not None and snap.version == self.version:
+            return snap
+        with self.lock:
+            if self._snapshot is None or self._snapshot.version != self.version:
+                self._snapshot = self._build()
+            return self._snapshot
+
+    def _build(self):
+        standings = sorted(
+            (Standing(pid, m.name, m.points, m.correct, m.seconds) for pid, m in self.members.items()),
+            key=lambda s: (-s.points, s.seconds, s.name))
+        return RoomSnapshot(self.version, self.code, self.host, self.phase, self.round, self.store.rounds,
+                            self.qid, self.opens_at, self.next_at, len(self.members), len(self.answers),
+                            tuple(standings), tuple(self.answers))
+
+    # --- Moving on with time ---
+    def advance(self, now=None):
+        # Lock-free unless a deadline has passed
+        now = time.time() if now is None else now
+        if not self.next_at or now < self.next_at:
+            return
+        with self.lock:
+            self._advance(now)
+
+    def _advance(self, now):
+        while self.next_at and now >= self.next_at:
+            if self.phase == "open":
+                self._close(self.next_at)
+            elif self.phase == "reveal":
+                if self.round >= self.store.rounds:
+                    self.phase = "final"
+                    self.next_at = 0.0
+                    self.version += 1
+                else:
+                    self._open(self.next_at)
+
+    def _open(self, at):
+        store = self.store
+        bank = store.engine.bank
+        qid = bank.random_id(store.category, store.rng)
+        # Avoid repeats within a match while the bank allows it
+        for _ in range(8):
+            if qid not in self._asked:
+                break
+            qid = bank.random_id(store.category, store.rng)
+        self._asked.add(qid)
+        self.phase = "open"
+        self.round += 1
+        self.qid = qid
+        self.opens_at = at
+        self.next_at = at + store.round_seconds
+        self.answers = []
+        for member in self.members.values():
+            member.answer = None
+        self.version += 1
+
+    def _close(self, at):
+        self.phase = "reveal"
+        self.next_at = at + self.store.reveal_seconds
+        self.version += 1
+
+    # --- Actions (all under the room's lock) ---
+    def join(self, player_id, name=None):
+        name = name or player_id[:6]
+        with self.lock:
+            member = self.members.get(player_id)
+            if member is None:
+                if len(self.members) >= self.store.max_players:
+                    return False
+                self.members[player_id] = _Member(name)
+            else:
+                member.name = name
+            self.touched = time.time()
+            self.version += 1
+            return True
+
+    def leave(self, player_id):
+        with self.lock:
+            if self.members.pop(player_id, None) is None:
+                return len(self.members)
+            if self.host == player_id and self.members:
+                self.host = next(iter(self.members))  # Longest-standing member takes over
+            if self.phase == "open" and len(self.answers) >= len(self.members):
+                self._close(time.time())
+            self.touched = time.time()
+            self.version += 1
+            return len(self.members)
+
+    def start(self, player_id, now=None):
+        # Host only, from the lobby or after a match (rematch)
+        now = time.time() if now is None else now
+        with self.lock:
+            if player_id != self.host or self.phase not in ("lobby", "final"):
+                return False
+            for member in self.members.values():
+                member.points = member.correct = 0
+                member.seconds = 0.0
+            self.round = 0
+            self._asked.clear()
+            self._open(now + self.store.countdown_seconds)
+            self.phase = "reveal"  # Counting down to round 1
+            self.round = 0
+            self.qid = -1
+            self.next_at = self.opens_at
+            self.touched = now
+            return True
+
+    def answer(self, player_id, player, option, now=None):
+        """Scores one member's answer to the open round through the engine.
+
+        Returns the RoundResult, or None if it does not count (not a member,
+        round not open, already answered). The engine call runs under the
+        room's lock: it only touches this player's state and takes
+        microseconds.
+        """
+        now = time.time() if now is None else now
+        engine = self.store.engine
+        with self.lock:
+            self._advance(now)
+            member = self.members.get(player_id)
+            if member is None or self.phase != "open" or member.answer is not None:
+                return None
+            seconds = max(now - self.opens_at, 0.0)
+            balance = player.balance
+            engine.deal(player, self.qid, asked_at=self.opens_at)
+            engine.check_answer(player, option)
+            correct = option == engine.bank[self.qid].answer
+            result = member.answer = RoundResult(player_id, member.name, option, correct, seconds)
+            self.answers.append(result)
+            if correct:
+                member.points += max(player.balance - balance, 0)  # The engine's payout rules
+                member.correct += 1
+                member.seconds += seconds
+            if len(self.answers) >= len(self.members):
+                self._close(now)  # Everyone is in: no need to wait out the clock
+            self.touched = now
+            self.version += 1
+            return result
+
+
+class RoomStore:
+    """Every room in the process, by code."""
+
+    CODE_CHARS = "".join(c for c in string.ascii_uppercase if c not in "IO")  # Easy to read aloud
+
+    def __init__(self, engine, rounds=10, round_seconds=20.0, reveal_seconds=6.0, countdown_seconds=3.0,
+                 max_players=50, idle_seconds=1800.0, category="All", rng=None):
+        self.engine = engine
+        self.rounds = rounds
+        self.round_seconds = round_seconds
+        self.reveal_seconds = reveal_seconds
+        self.countdown_seconds = countdown_seconds
+        self.max_players = max_players
+        self.idle_seconds = idle_seconds
+        self.category = category
+        self.rng = rng or random.Random()
+        self._lock = threading.Lock()
+        self._rooms = {}
+
+    def __len__(self):
+        return len(self._rooms)
+
+    def get(self, code):
+        # Dict reads are atomic; no store lock on the polling path
+        return self._rooms.get((code or "").strip().upper())
+
+    def create(self, host, name=None):
+        with self._lock:
+            self._drop_idle()
+            while True:
+                code = "".join(self.rng.choice(self.CODE_CHARS) for _ in range(4))
+                if code not in self._rooms:
+                    break
+            room = self._rooms[code] = Room(code, host, self)
+        room.join(host, name)
+        return room
+
+    def leave(self, code, player_id):
+        room = self.get(code)
+        if room is not None and room.leave(player_id) == 0:
+            with self._lock:
+                if not room.members:
+                    self._rooms.pop(room.code, None)
+
+    def _drop_idle(self):
+        # Rooms everyone walked away from without leaving; checked on create
+        cutoff = time.time() - self.idle_seconds
+        for code in [code for code, room in self._rooms.items() if room.touched < cutoff]:
+            del self._rooms[code]
@@ -0,0 +1,175 @@
+"""Weakness-weighted question sampling.
+
+Each session owns one ``AdaptiveSampler``. It is built once from the shared
+QuestionBank and then updated incrementally from answer results, so a draw
+or an update costs O(log n) no matter how large the bank gets.
+"""
+import random
+from array import array
+
+
+class FenwickTree:
+    """Binary indexed tree over non-negative float weights.
+
+    Supports point reads and updates and weighted draws (prefix-sum search)
+    in O(log n). Only the tree is stored; a weight is read back from it.
+    """
+
+    __slots__ = ("_tree", "_size", "_top")
+
+    def __init__(self, weights):
+        n = len(weights)
+        tree = array("d", [0.0]) * (n + 1)
+        for i, w in enumerate(weights, 1):
+            tree[i] += w
+            parent = i + (i & -i)
+            if parent <= n:
+                tree[parent] += tree[i]
+        self._tree = tree
+        self._size = n
+        self._top = 1 << (n.bit_length() - 1) if n else 0
+
+    def __len__(self):
+        return self._size
+
+    def copy(self):
+        clone = FenwickTree.__new__(FenwickTree)
+        clone._tree = self._tree[:]
+        clone._size = self._size
+        clone._top = self._top
+        return clone
+
+    def get(self, i):
+        # prefix(i + 1) - prefix(i), walking only the nodes the two share
+        tree = self._tree
+        i += 1
+        value = tree[i]
+        stop = i - (i & -i)
+        i -= 1
+        while i > stop:
+            value -= tree[i]
+            i -= i & -i
+        return value
+
+    def set(self, i, weight):
+        delta = weight - self.get(i)
+        if not delta:
+            return
+        i += 1
+        tree = self._tree
+        while i <= self._size:
+            tree[i] += delta
+            i += i & -i
+
+    def total(self):
+        tree = self._tree
+        total = 0.0
+        i = self._size
+        while i > 0:
+            total += tree[i]
+            i -= i & -i
+        return total
+
+    def find(self, x):
+        # Smallest index whose prefix sum exceeds x
+        tree = self._tree
+        pos = 0
+        step = self._top
+        while step:
+            nxt = pos + step
+            if nxt <= self._size and tree[nxt] <= x:
+                pos = nxt
+                x -= tree[nxt]
+            step >>= 1
+        # Float drift can push x past the last bucket
+        return min(pos, self._size - 1)
+
+    def sample(self, rng=random):
+        return self.find(rng.random() * self.total())
+
+
+class SamplerLayout:
+    """Static qid -> (category, slot) index, shared by every player's sampler.
+
+    Also holds the trees of a player with no history, which new samplers
+    copy instead of rebuilding.
+    """
+
+    def __init__(self, bank):
+        self.categories = bank.categories
+        self.cat_pos = {cat: i for i, cat in enumerate(self.categories)}
+        self.ids = [bank.ids(cat) for cat in self.categories]
+
+        n = len(bank)
+        self.cat_of = array("H", [0]) * n
+        self.slot = array("I", [0]) * n
+        for c, ids in enumerate(self.ids):
+            for slot, qid in enumerate(ids):
+                self.cat_of[qid] = c
+                self.slot[qid] = slot
+
+        # With no history every question is equally likely
+        self.fresh_trees = [FenwickTree([1.0] * len(ids)) for ids in self.ids]
+        self.fresh_cat_tree = FenwickTree([float(len(ids)) for ids in self.ids])
+
+
+class AdaptiveSampler:
+    """Draws questions weighted by the player's recent error rate.
+
+    Two levels: a tree over categories (weighted by the category's recent
+    error rate) and one tree per category over its questions (weighted by
+    each question's recent error rate). Error rates are exponential moving
+    averages, so old mistakes fade as the player recovers. A question's
+    error rate is recovered from its weight, so the trees are the only
+    per-question state a player carries.
+    """
+
+    __slots__ = ("question_boost", "category_boost", "question_alpha", "category_alpha",
+                 "layout", "categories", "_c_err", "_trees", "_cat_tree")
+
+    def __init__(self, bank, layout=None, question_boost=3.0, category_boost=3.0,
+                 question_alpha=0.5, category_alpha=0.2):
+        self.question_boost = question_boost
+        self.category_boost = category_boost
+        self.question_alpha = question_alpha
+        self.category_alpha = category_alpha
+
+        self.layout = layout = layout or SamplerLayout(bank)
+        self.categories = layout.categories
+        self._c_err = array("d", [0.0]) * len(self.categories)
+        self._trees = [tree.copy() for tree in layout.fresh_trees]
+        self._cat_tree = layout.fresh_cat_tree.copy()
+
+    def __getstate__(self):
+        # For GameEngine.pack: the layout is shared and is put back by unpack
+        return {name: getattr(self, name) for name in self.__slots__ if name not in ("layout", "categories")}
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+
+    def record(self, qid, correct):
+        miss = 0.0 if correct else 1.0
+        layout = self.layout
+        c = layout.cat_of[qid]
+        slot = layout.slot[qid]
+
+        tree = self._trees[c]
+        err = (tree.get(slot) - 1.0) / self.question_boost
+        err += self.question_alpha * (miss - err)
+        tree.set(slot, 1.0 + self.question_boost * err)
+
+        c_err = self._c_err[c]
+        c_err += self.category_alpha * (miss - c_err)
+        self._c_err[c] = c_err
+        self._cat_tree.set(c, tree.total() * (1.0 + self.category_boost * c_err))
+
+    def draw(self, category="All", rng=random):
+        # Returns a question ID, or None for an unknown category
+        if category == "All":
+            c = self._cat_tree.sample(rng)
+        else:
+            c = self.layout.cat_pos.get(category)
+            if c is None:
+                return None
+        return self.layout.ids[c][self._trees[c].sample(rng)]
@@ -0,0 +1,170 @@
+"""Spaced-repetition question scheduling (Leitner boxes).
+
+A ``LeitnerScheduler`` is the per-player alternative to the weakness
+sampler: every question a player has seen sits in a box, a right answer
+moves it up a box (longer interval), a wrong one sends it back to the
+first. Intervals are counted in questions served, not wall time, so a
+missed question comes back a few deals later within the same sitting.
+
+State is two parallel arrays indexed by question ID plus one heap per
+category holding only the questions the player has already seen, so a
+draw is O(log n) and a fresh player costs a few bytes per question.
+"""
+import heapq
+import random
+from array import array
+
+from sampler import SamplerLayout
+
+# Deals until a question in box i is due again
+INTERVALS = (4, 10, 25, 60, 150, 400)
+
+_QID_BITS = 32  # Heap entries are due << 32 | qid: one int, no tuples
+
+
+class LeitnerScheduler:
+    """Due-queue per category with lazy deletion.
+
+    Rescheduling pushes a new heap entry and leaves the old one behind; an
+    entry is stale when its due tick no longer matches ``_due[qid]`` and is
+    dropped when it reaches the top. Heaps are compacted once stale entries
+    outnumber live ones, so they stay O(seen questions).
+    """
+
+    __slots__ = ("intervals", "layout", "_box", "_due", "_heaps", "_live", "_start", "_introduced", "_last",
+                 "tick")
+
+    def __init__(self, bank, layout=None, intervals=INTERVALS, rng=random):
+        self.intervals = intervals
+        self.layout = layout = layout or SamplerLayout(bank)
+        n = len(layout.cat_of)
+        self._box = array("B", [0]) * n
+        self._due = array("I", [0]) * n  # 0 = never scheduled
+        self._heaps = [[] for _ in layout.ids]
+        self._live = array("I", [0]) * len(layout.ids)
+        # New questions are introduced in bank order from a random starting
+        # point per category, so players don't all start on the same item
+        self._start = array("I", [rng.randrange(len(ids)) if ids else 0 for ids in layout.ids])
+        self._introduced = array("I", [0]) * len(layout.ids)
+        self._last = -1  # Question served by the previous draw, never served twice in a row
+        self.tick = 0
+
+    def __getstate__(self):
+        # For GameEngine.pack: the layout is shared and is put back by unpack
+        return {name: getattr(self, name) for name in self.__slots__ if name != "layout"}
+
+    def __setstate__(self, state):
+        self._last = -1  # Absent from players packed before it existed
+        for name, value in state.items():
+            setattr(self, name, value)
+
+    def box(self, qid):
+        return self._box[qid]
+
+    def _top(self, c):
+        # Earliest live entry of category c as (due, qid), or None
+        heap = self._heaps[c]
+        due = self._due
+        while heap:
+            key = heap[0]
+            qid = key & ((1 << _QID_BITS) - 1)
+            if due[qid] == key >> _QID_BITS:
+                return key >> _QID_BITS, qid
+            heapq.heappop(heap)
+        return None
+
+    def _next(self, c, skip):
+        # Earliest live entry of category c other than question ``skip``, or None
+        top = self._top(c)
+        if top is None or top[1] != skip:
+            return top
+        # An old entry can carry the same due tick as the current one, so set
+        # aside every entry of ``skip`` at the top, not just the first
+        heap = self._heaps[c]
+        aside = []
+        while top is not None and top[1] == skip:
+            aside.append(heapq.heappop(heap))
+            top = self._top(c)
+        for key in aside:
+            heapq.heappush(heap, key)
+        return top
+
+    def _schedule(self, qid, due):
+        c = self.layout.cat_of[qid]
+        if not self._due[qid]:
+            self._live[c] += 1
+        self._due[qid] = due
+        heap = self._heaps[c]
+        heapq.heappush(heap, (due << _QID_BITS) | qid)
+        if len(heap) > 2 * self._live[c] + 16:
+            self._compact(c)
+
+    def _compact(self, c):
+        due = self._due
+        heap = [(due[qid] << _QID_BITS) | qid for qid in self.layout.ids[c] if due[qid]]
+        heapq.heapify(heap)
+        self._heaps[c] = heap
+
+    def _new(self, c):
+        # Next never-seen question of category c, or None once all are introduced
+        ids = self.layout.ids[c]
+        k = self._introduced[c]
+        if k >= len(ids):
+            return None
+        self._introduced[c] = k + 1
+        return ids[(self._start[c] + k) % len(ids)]
+
+    def _draw_from(self, c):
+        # Due reviews first, then new material, then the earliest review. The
+        # question just served is skipped: a miss is due again in a few deals
+        # and would otherwise be the earliest review straight away.
+        top = self._next(c, self._last)
+        if top is not None and top[0] <= self.tick:
+            return top[1]
+        qid = self._new(c)
+        if qid is not None:
+            return qid
+        if top is None:
+            top = self._top(c)  # The last question is all this category has
+        return None if top is None else top[1]
+
+    def _draw_any(self, rng):
+        # Across categories (a handful, not the bank): the most overdue
+        # review, else new material from a random unfinished category
+        earliest = None
+        for c in range(len(self._heaps)):
+            top = self._next(c, self._last)
+            if top is not None and (earliest is None or top < earliest):
+                earliest = top
+        if earliest is not None and earliest[0] <= self.tick:
+            return earliest[1]
+        fresh = [c for c, ids in enumerate(self.layout.ids) if self._introduced[c] < len(ids)]
+        if fresh:
+            return self._new(rng.choice(fresh))
+        if earliest is None and self._last >= 0:
+            return self._last  # The only question seen so far
+        return None if earliest is None else earliest[1]
+
+    def draw(self, category="All", rng=random):
+        # Returns a question ID, or None for an unknown category (which does
+        # not count as a deal, so the caller's fallback draw ticks only once)
+        if category == "All":
+            c = None
+        else:
+            c = self.layout.cat_pos.get(category)
+            if c is None:
+                return None
+        self.tick += 1
+        qid = self._draw_any(rng) if c is None else self._draw_from(c)
+        if qid is not None:
+            self._last = qid
+        return qid
+
+    def record(self, qid, correct):
+        box = min(self._box[qid] + 1, len(self.intervals) - 1) if correct else 0
+        self._box[qid] = box
+        self._schedule(qid, self.tick + self.intervals[box])
+
+    def defer(self, qid):
+        # A skipped question comes back like a missed one, box unchanged
+        self._schedule(qid, self.tick + self.intervals[0])
@@ -0,0 +1,147 @@
+"""Keyword search over the question bank for the Study tab.
+
+``SearchIndex`` is an inverted index built once per bank, on the first
+search (see ``load_search_index`` in resources.py, keyed on the bank
+fingerprint).
+BM25 weights are computed at build time and stored per posting, so a query
+only adds precomputed impacts: a few vectorized NumPy operations per query
+term, however large the bank.
+"""
+import bisect
+import re
+import unicodedata
+
+import numpy as np
+
+TOKEN = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    "a an and are as at be but by can for from has have in into is it its of on or that the their "
+    "this to was what when which who will with".split()
+)
+# A question's words count double; options and rationale once
+FIELD_WEIGHTS = (("question", 2), ("options", 1), ("rationale", 1))
+MAX_EXPANSIONS = 16  # Terms a trailing prefix may expand to
+
+
+def normalize(text):
+    # Case- and accent-insensitive: "Café" and "cafe" index the same
+    text = unicodedata.normalize("NFKD", text)
+    return text.encode("ascii", "ignore").decode().lower()
+
+
+def stem(token):
+    # Plural folding only; enough for "tariffs" to find "tariff"
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def tokenize(text):
+    return [stem(t) for t in TOKEN.findall(normalize(text)) if t not in STOPWORDS]
+
+
+class SearchIndex:
+    """BM25 inverted index in compressed-sparse-row form.
+
+    Postings for term t are ``docs[offsets[t]:offsets[t + 1]]`` with their
+    BM25 impacts alongside; the sorted vocabulary supports prefix matching
+    for the last, possibly half-typed, query word.
+    """
+
+    def __init__(self, bank, k1=1.2, b=0.75):
+        self.size = len(bank)
+        self.categories = bank.categories
+        cat_pos = {cat: i for i, cat in enumerate(bank.categories)}
+
+        vocab = {}
+        post_term, post_doc, post_tf = [], [], []
+        doc_len = np.zeros(self.size, dtype=np.float32)
+        doc_cat = np.zeros(self.size, dtype=np.int16)
+        for qid in range(self.size):
+            q = bank[qid]
+            doc_cat[qid] = cat_pos[q.category]
+            counts = {}
+            for field, weight in FIELD_WEIGHTS:
+                value = getattr(q, field)
+                text = " ".join(value) if isinstance(value, tuple) else value
+                for token in tokenize(text):
+                    counts[token] = counts.get(token, 0) + weight
+            doc_len[qid] = sum(counts.values())
+            for token, tf in counts.items():
+                post_term.append(vocab.setdefault(token, len(vocab)))
+                post_doc.append(qid)
+                post_tf.append(tf)
+
+        terms = np.array(post_term, dtype=np.int32)
+        order = np.argsort(terms, kind="stable")  # Keeps docs ascending within a term
+        docs = np.array(post_doc, dtype=np.int32)[order]
+        tf = np.array(post_tf, dtype=np.float32)[order]
+        df = np.bincount(terms, minlength=len(vocab))
+        offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+        np.cumsum(df, out=offsets[1:])
+
+        # Okapi BM25 with the non-negative idf
+        idf = np.log(1.0 + (self.size - df + 0.5) / (df + 0.5)).astype(np.float32)
+        avg_len = float(doc_len.mean()) if self.size else 1.0
+        norm = k1 * (1.0 - b + b * doc_len[docs] / avg_len)
+        self._impacts = (np.repeat(idf, df) * tf * (k1 + 1.0) / (tf + norm)).astype(np.float32)
+        self._docs = docs
+        self._offsets = offsets
+        self._doc_cat = doc_cat
+        self._vocab = vocab
+        self._sorted_terms = sorted(vocab)
+
+    def __len__(self):
+        return len(self._vocab)
+
+    def _postings(self, term_id):
+        start, end = self._offsets[term_id], self._offsets[term_id + 1]
+        return self._docs[start:end], self._impacts[start:end]
+
+    def _expand(self, prefix):
+        i = bisect.bisect_left(self._sorted_terms, prefix)
+        out = []
+        while i < len(self._sorted_terms) and len(out) < MAX_EXPANSIONS:
+            term = self._sorted_terms[i]
+            if not term.startswith(prefix):
+                break
+            out.append(self._vocab[term])
+            i += 1
+        return out
+
+    def search(self, query, category="All", limit=20):
+        """Returns (number of matches, [(qid, score), ...] best first)."""
+        tokens = tokenize(query)
+        if not tokens or not self.size:
+            return 0, []
+        scores = np.zeros(self.size, dtype=np.float32)
+        # Every word but the last must match a whole term; the last may
+        # still be being typed, so it also matches as a prefix (best
+        # completion per document, not the sum)
+        *whole, last = tokens
+        for token in whole:
+            term_id = self._vocab.get(token)
+            if term_id is not None:
+                docs, impacts = self._postings(term_id)
+                scores[docs] += impacts
+        partial = query[-1:].isalnum()
+        term_ids = self._expand(last) if partial else [self._vocab[last]] if last in self._vocab else []
+        if len(term_ids) == 1:
+            docs, impacts = self._postings(term_ids[0])
+            scores[docs] += impacts
+        elif term_ids:
+            best = np.zeros(self.size, dtype=np.float32)
+            for term_id in term_ids:
+                docs, impacts = self._postings(term_id)
+                best[docs] = np.maximum(best[docs], impacts)
+            scores += best
+
+        if category != "All":
+            c = self.categories.index(category) if category in self.categories else -1
+            scores[self._doc_cat != c] = 0.0
+        hits = np.flatnonzero(scores)
+        total = len(hits)
+        if total > limit:
+            hits = hits[np.argpartition(-scores[hits], limit - 1)[:limit]]
+        ranked = sorted(hits.tolist(), key=lambda qid: (-scores[qid], qid))
+        return total, [(qid, float(scores[qid])) for qid in ranked]
@@ -0,0 +1,209 @@
+"""Process-wide home of every live player, under an idle timeout and a memory budget.
+
+Streamlit keeps a session's state for as long as its tab stays open, however
+long it sits idle, so the app keeps only the player ID in session state and
+looks the ``PlayerState`` up in a ``SessionPool`` on every use. A sweeper
+thread offloads players that have been idle too long, or the least recently
+used ones while live players are over the budget, to a SQLite table as
+``GameEngine.pack`` bytes. The next lookup loads them back exactly as they
+were, in-flight question included, unless the bank has changed since (the
+row is then dropped and the player restored from the player store).
+"""
+import atexit
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from metrics import deep_sizeof
+from question_bank import Question
+from storage import SQLiteConnections
+
+
+def player_sizeof(engine, player):
+    # Deep size of one player; the bank, the engine and the sampler layout
+    # are shared by every player, so they are not charged to it
+    return deep_sizeof(player, (engine.bank, engine, player.sampler.layout), Question)
+
+
+class SQLiteOffload:
+    """Packed players in a table of their own, one row per offloaded player.
+
+    Rows are taken (read and deleted) on load, so the table only holds
+    players that are not live anywhere and can never shadow a newer state.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS offloaded_players (
+            player_id     TEXT PRIMARY KEY,
+            state         BLOB NOT NULL,
+            offloaded_at  REAL NOT NULL
+        ) WITHOUT ROWID
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._db = SQLiteConnections(path)
+        with self._db.get() as conn:
+            conn.execute(self.SCHEMA)
+
+    def put_many(self, items):
+        # items: iterable of (player_id, packed bytes)
+        now = time.time()
+        conn = self._db.get()
+        with conn:
+            conn.executemany("INSERT OR REPLACE INTO offloaded_players (player_id, state, offloaded_at) "
+                             "VALUES (?, ?, ?)", [(pid, data, now) for pid, data in items])
+
+    def take(self, player_id):
+        conn = self._db.get()
+        with conn:
+            row = conn.execute("DELETE FROM offloaded_players WHERE player_id = ? RETURNING state",
+                               (player_id,)).fetchone()
+        return None if row is None else row[0]
+
+    def delete_many(self, player_ids):
+        conn = self._db.get()
+        with conn:
+            conn.executemany("DELETE FROM offloaded_players WHERE player_id = ?", [(pid,) for pid in player_ids])
+
+    def __len__(self):
+        return self._db.get().execute("SELECT COUNT(*) FROM offloaded_players").fetchone()[0]
+
+
+class SessionPool:
+    """Live players by ID, least recently used first.
+
+    A sweep offloads every player idle for ``idle_seconds`` or more, then,
+    while the live players' total size is over ``max_bytes``, the least
+    recently used ones idle for at least ``grace`` seconds (so a session in
+    the middle of a run is never taken). Sizes are measured with
+    player_sizeof, only for players used since the last sweep.
+    """
+
+    def __init__(self, engine, path, idle_seconds=900.0, max_bytes=256 * 1024 * 1024, grace=30.0,
+                 sweep_interval=30.0, metrics=None):
+        self.engine = engine
+        self.idle_seconds = idle_seconds
+        self.max_bytes = max_bytes
+        self.grace = grace
+        self.sweep_interval = sweep_interval
+        self.metrics = metrics
+        self._offload = SQLiteOffload(path)
+        self._lock = threading.Lock()
+        self._live = OrderedDict()  # player_id -> [player, last used (monotonic), bytes or None]
+        self._leaving = {}          # player_id -> player being written out
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="session-pool-sweeper", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def __len__(self):
+        return len(self._live)
+
+    def get(self, player_id, create=None):
+        """The live player; loads an offloaded one, else calls create(player_id).
+
+        Without ``create`` an unknown player raises KeyError.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._live.get(player_id)
+            if entry is None:
+                player = self._leaving.pop(player_id, None)  # Caught on its way out
+                if player is not None:
+                    entry = self._live[player_id] = [player, now, None]
+            if entry is not None:
+                self._live.move_to_end(player_id)
+                entry[1] = now
+                entry[2] = None  # May have changed; measured again next sweep
+                return entry[0]
+
+        data = self._offload.take(player_id)
+        # A row packed against another bank (DECA_BANK_PATH changed across a
+        # restart) is dropped; create() restores the player-store snapshot
+        player = None if data is None else self.engine.unpack(data)
+        if player is not None:
+            if self.metrics is not None:
+                self.metrics.session_loads.inc()
+        elif create is not None:
+            player = create(player_id)
+        else:
+            raise KeyError(player_id)
+        with self._lock:
+            # Another session of the same player may have got here first
+            entry = self._live.setdefault(player_id, [player, now, None])
+            self._live.move_to_end(player_id)
+            return entry[0]
+
+    def sweep(self, now=None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            unsized = [(player_id, entry[0]) for player_id, entry in self._live.items() if entry[2] is None]
+        # Measured outside the lock
+        sizes = {player_id: player_sizeof(self.engine, player) for player_id, player in unsized}
+
+        leaving = []
+        with self._lock:
+            for player_id, size in sizes.items():
+                entry = self._live.get(player_id)
+                if entry is not None:
+                    entry[2] = size
+            total = sum(entry[2] or 0 for entry in self._live.values())
+            for player_id, (player, used, size) in self._live.items():
+                idle = now - used
+                if idle >= self.idle_seconds:
+                    reason = "idle"
+                elif total > self.max_bytes and idle >= self.grace:
+                    reason = "budget"
+                else:
+                    break  # Everyone after this was used more recently
+                leaving.append((player_id, player, reason))
+                total -= size or 0
+            for player_id, player, _ in leaving:
+                del self._live[player_id]
+                self._leaving[player_id] = player
+        self._write_out(leaving)
+        return len(leaving)
+
+    def _write_out(self, leaving):
+        if not leaving:
+            return
+        try:
+            self._offload.put_many((player_id, self.engine.pack(player)) for player_id, player, _ in leaving)
+        except sqlite3.Error:
+            # Keep them live and try again next sweep
+            with self._lock:
+                for player_id, player, _ in leaving:
+                    if self._leaving.pop(player_id, None) is player:
+                        self._live[player_id] = [player, time.monotonic(), None]
+            return
+        came_back = []
+        with self._lock:
+            for player_id, player, _ in leaving:
+                if self._leaving.get(player_id) is player:
+                    del self._leaving[player_id]
+                else:
+                    came_back.append(player_id)
+        if came_back:
+            # Used again while being written: the live copy is the newest
+            self._offload.delete_many(came_back)
+        if self.metrics is not None:
+            for _, _, reason in leaving:
+                self.metrics.session_offloads.inc(reason)
+
+    def _run(self):
+        while not self._stop.wait(self.sweep_interval):
+            self.sweep()
+
+    def close(self):
+        # Offloads everyone, so a restart picks players up where they left off
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        self._thread.join(timeout=5)
+        with self._lock:
+            leaving = [(player_id, entry[0], "shutdown") for player_id, entry in self._live.items()]
+            self._live.clear()
+            self._leaving.update((player_id, player) for player_id, player, _ in leaving)
+        self._write_out(leaving)
@@ -0,0 +1,84 @@
+"""Per-deployment tuning knobs.
+
+Read from environment variables so a classroom install can change them
+without editing code (on Streamlit Community Cloud, top-level secrets are
+exported as environment variables too).
+"""
+import os
+
+
+def _env(name, default, cast=str, allow_empty=False):
+    # Unset or empty means the default, unless an explicit empty value means something
+    value = os.environ.get(name)
+    if value is None or (value == "" and not allow_empty):
+        return default
+    return cast(value)
+
+
+def _flag(value):
+    return value.lower() in ("1", "true", "yes")
+
+
+def _profile(value):
+    # "sections" = section timers only; any true flag adds a cProfile per run
+    if value.lower() == "sections":
+        return "sections"
+    return "stacks" if _flag(value) else None
+
+
+# --- Risk of Ruin ---
+WINDOW_SIZE = _env("DECA_WINDOW_SIZE", 20, int)                   # Answers in the rolling window
+DEMOTION_THRESHOLD = _env("DECA_DEMOTION_THRESHOLD", 0.70, float)  # Full window below this -> demotion
+WARNING_THRESHOLD = _env("DECA_WARNING_THRESHOLD", 0.75, float)    # Sidebar "risk of ruin" warning
+
+# --- Question Bank ---
+BANK_PATH = _env("DECA_BANK_PATH", "")                             # Compiled bank file; empty = built-in questions
+
+# --- Practice Exam ---
+EXAM_SIZE = _env("DECA_EXAM_SIZE", 100, int)                       # Questions, split evenly across sectors
+EXAM_MINUTES = _env("DECA_EXAM_MINUTES", 90, int)
+EXAM_TICK = _env("DECA_EXAM_TICK", 15, int)                        # Seconds between countdown refreshes
+
+# --- Live Rooms ---
+ROOM_ROUNDS = _env("DECA_ROOM_ROUNDS", 10, int)                    # Questions per match
+ROOM_ROUND_SECONDS = _env("DECA_ROOM_ROUND_SECONDS", 20, float)    # Time to answer; closes early once all are in
+ROOM_REVEAL_SECONDS = _env("DECA_ROOM_REVEAL_SECONDS", 6, float)   # Results shown before the next question
+ROOM_POLL_SECONDS = _env("DECA_ROOM_POLL_SECONDS", 1.0, float)     # How often a client checks its room
+ROOM_MAX_PLAYERS = _env("DECA_ROOM_MAX_PLAYERS", 50, int)
+
+# --- Player Persistence ---
+DB_PATH = _env("DECA_DB_PATH", "deca_players.db")                  # SQLite file (WAL mode)
+DB_FLUSH_INTERVAL = _env("DECA_DB_FLUSH_INTERVAL", 0.5, float)     # Seconds between write-behind batches
+
+# --- Answer History ---
+# Parquet chunks per player; set it empty (DECA_EVENTS_DIR=) to keep answers in memory only
+EVENTS_DIR = _env("DECA_EVENTS_DIR", os.path.join(".cache", "events"), allow_empty=True)
+EVENTS_BATCH = _env("DECA_EVENTS_BATCH", 512, int)                 # Events per chunk file
+EVENTS_FLUSH_INTERVAL = _env("DECA_EVENTS_FLUSH_INTERVAL", 5.0, float)
+EVENTS_MAX_PLAYERS = _env("DECA_EVENTS_MAX_PLAYERS", 2000, int)    # Players whose Analytics counters stay in memory
+
+# --- Live Sessions ---
+SESSION_IDLE_SECONDS = _env("DECA_SESSION_IDLE_SECONDS", 900, float)        # Offload players idle this long
+SESSION_MEMORY_BYTES = _env("DECA_SESSION_MEMORY_BYTES", 256 * 1024 * 1024, int)  # Budget for live players
+SESSION_SWEEP_INTERVAL = _env("DECA_SESSION_SWEEP_INTERVAL", 30, float)
+
+# --- Office Images ---
+ASSET_DIR = _env("DECA_ASSET_DIR", os.path.join(".cache", "assets"))  # On-disk thumbnail cache
+ASSET_WIDTH = _env("DECA_ASSET_WIDTH", 400, int)                       # Thumbnail width in pixels
+ASSET_MEMORY_BYTES = _env("DECA_ASSET_MEMORY_BYTES", 8 * 1024 * 1024, int)
+OFFLINE = _env("DECA_OFFLINE", False, _flag)                        # Never fetch remote images
+
+# --- Leaderboard ---
+LEADERBOARD_PATH = _env("DECA_LEADERBOARD_PATH", "")                # JSON file; empty keeps it in memory only
+LEADERBOARD_SIZE = _env("DECA_LEADERBOARD_SIZE", 10, int)          # Entries shown in the sidebar
+
+# --- Runtime Metrics ---
+METRICS = _env("DECA_METRICS", True, _flag)                        # Collect counters and histograms
+METRICS_PORT = _env("DECA_METRICS_PORT", 0, int)                   # Serve /metrics over HTTP; 0 = off
+METRICS_HOST = _env("DECA_METRICS_HOST", "127.0.0.1")
+METRICS_STATE_EVERY = _env("DECA_METRICS_STATE_EVERY", 50, int)    # Measure session state every N runs
+
+# --- Profiling (also per session with ?profile, or ?profile=sections for the timers only) ---
+PROFILE = _env("DECA_PROFILE", None, _profile)                     # "1" = timers + cProfile, "sections" = timers only
+PROFILE_DIR = _env("DECA_PROFILE_DIR", os.path.join(".cache", "profiles"))  # Collapsed stacks, one file per run
+PROFILE_RUNS = _env("DECA_PROFILE_RUNS", 50, int)                  # Runs summarized (and stack files kept) per session
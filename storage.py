@@ -0,0 +1,214 @@
+"""Durable player-state storage.
+
+``PlayerStore`` is the pluggable interface; ``SQLiteStore`` is the default
+backend. The app talks to a ``WriteBehindStore`` wrapped around the backend:
+saves only enqueue a snapshot, and a background thread commits queued
+snapshots in batches so the script thread never waits on disk.
+"""
+import atexit
+import json
+import sqlite3
+import threading
+import time
+
+
+class SQLiteConnections:
+    """One connection per thread to a SQLite database in WAL mode.
+
+    sqlite3 connections must not be shared across threads, so each thread
+    that asks gets its own, opened on first use. Shared by every table in
+    the player database (``SQLiteStore`` and sessions.SQLiteOffload).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+    def get(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            # WAL + NORMAL only fsyncs at checkpoints; a crash can lose the
+            # last batch but never corrupts the database
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def close(self):
+        # Closes the calling thread's connection, if it has one
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class PlayerStore:
+    """Interface for player-state backends.
+
+    A snapshot is a plain dict of JSON-friendly values (see
+    ``GameEngine.snapshot``).
+    """
+
+    def load(self, player_id):
+        raise NotImplementedError
+
+    def save_many(self, items):
+        # items: iterable of (player_id, snapshot)
+        raise NotImplementedError
+
+    def save(self, player_id, snapshot):
+        self.save_many([(player_id, snapshot)])
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class SQLiteStore(PlayerStore):
+    """One row per player in a local SQLite database in WAL mode.
+
+    Loading a player is a single primary-key lookup. Each thread gets its own
+    connection (``SQLiteConnections``).
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS players (
+            player_id         TEXT PRIMARY KEY,
+            balance           INTEGER NOT NULL,
+            lifetime_earnings INTEGER NOT NULL,
+            office_level      TEXT NOT NULL,
+            staff             TEXT NOT NULL,
+            performance       TEXT NOT NULL,
+            updated_at        REAL NOT NULL
+        ) WITHOUT ROWID
+    """
+
+    UPSERT = """
+        INSERT INTO players (player_id, balance, lifetime_earnings, office_level,
+                             staff, performance, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(player_id) DO UPDATE SET
+            balance = excluded.balance,
+            lifetime_earnings = excluded.lifetime_earnings,
+            office_level = excluded.office_level,
+            staff = excluded.staff,
+            performance = excluded.performance,
+            updated_at = excluded.updated_at
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._db = SQLiteConnections(path)
+        with self._db.get() as conn:
+            conn.execute(self.SCHEMA)
+
+    def load(self, player_id):
+        row = self._db.get().execute(
+            "SELECT balance, lifetime_earnings, office_level, staff, performance "
+            "FROM players WHERE player_id = ?",
+            (player_id,),
+        ).fetchone()
+        if row is None:
+            return None
+        balance, lifetime_earnings, office_level, staff, performance = row
+        return {
+            "balance": balance,
+            "lifetime_earnings": lifetime_earnings,
+            "office_level": office_level,
+            "staff": json.loads(staff),
+            "performance": json.loads(performance),
+        }
+
+    def save_many(self, items):
+        now = time.time()
+        rows = [
+            (
+                player_id,
+                snap["balance"],
+                snap["lifetime_earnings"],
+                snap["office_level"],
+                json.dumps(snap["staff"]),
+                json.dumps(snap["performance"], separators=(",", ":")),
+                now,
+            )
+            for player_id, snap in items
+        ]
+        if not rows:
+            return
+        conn = self._db.get()
+        with conn:  # One transaction per batch
+            conn.executemany(self.UPSERT, rows)
+
+    def close(self):
+        self._db.close()
+
+
+class WriteBehindStore(PlayerStore):
+    """Queues saves in memory and commits them in batches from a daemon thread.
+
+    Repeated saves for the same player before a flush collapse into one row
+    write. Loads check the queue first, so a player always reads their own
+    latest write.
+    """
+
+    def __init__(self, backend, flush_interval=0.5, max_batch=500):
+        self.backend = backend
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self._pending = {}
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="player-store-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def load(self, player_id):
+        with self._cond:
+            snap = self._pending.get(player_id)
+        if snap is not None:
+            return snap
+        return self.backend.load(player_id)
+
+    def save_many(self, items):
+        with self._cond:
+            for player_id, snap in items:
+                self._pending[player_id] = snap
+            if len(self._pending) >= self.max_batch:
+                self._cond.notify()
+
+    def flush(self):
+        # Synchronous; for shutdown and tools, never called from a rerun
+        with self._cond:
+            batch, self._pending = self._pending, {}
+        self.backend.save_many(batch.items())
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._pending and not self._closed:
+                    self._cond.wait(self.flush_interval)
+                if self._closed:
+                    return
+                batch, self._pending = self._pending, {}
+            if batch:
+                try:
+                    self.backend.save_many(batch.items())
+                except sqlite3.Error:
+                    # Put the batch back (newer saves win) and retry next tick
+                    with self._cond:
+                        batch.update(self._pending)
+                        self._pending = batch
+            time.sleep(self.flush_interval)
+
+    def close(self):
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify()
+        self._thread.join(timeout=5)
+        self.flush()
+        self.backend.close()
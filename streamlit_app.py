@@ -1,8 +1,37 @@
 import streamlit as st
-import random
+import functools
+import html
+import os
+import re
 import time
+from collections import deque
+import uuid
 import pandas as pd
 
+from game_data import office_tiers, talent_roster
+from question_bank import Question
+from metrics import deep_sizeof
+from sessions import player_sizeof
+from engine import MODES
+from exam import Exam
+from resources import (load_asset_cache, load_engine, load_event_log, load_leaderboard, load_metrics,
+                       load_player_store, load_question_bank, load_room_store, load_search_index,
+                       load_session_pool)
+import profiling
+import settings
+
+run_started = time.perf_counter()
+
+# Opt-in profiling (profiling.py): DECA_PROFILE for every session, ?profile
+# (or ?profile=sections, timers only) for one
+if "profile" in st.query_params:
+    # A bare ?profile means stacks; otherwise the value reads like DECA_PROFILE (?profile=0 is off)
+    profile_mode = settings._profile(st.query_params["profile"]) if st.query_params["profile"] else "stacks"
+else:
+    profile_mode = settings.PROFILE
+if profile_mode:
+    profiling.start("app", stacks=profile_mode == "stacks")
+
 # ==========================================
 # 1. APP CONFIGURATION & STYLING
 # ==========================================
@@ -92,301 +121,417 @@ st.markdown("""
     }
 </style>
 """, unsafe_allow_html=True)
+profiling.lap("styling")
 
 # ==========================================
-# 2. THE DATA (50 Real Questions from your PDFs)
+# 2. THE DATA (built once per process, shared by all sessions)
 # ==========================================
-questions_db = [
-    # --- FINANCIAL ANALYSIS (FI, FM) ---
-    {"category": "Financial Analysis", "question": "Which of the following is the accounting equation?", "options": ["Assets = Liabilities - Owner's Equity", "Liabilities = Owner's Equity + Assets", "Assets = Liabilities + Owner's Equity", "Owner's Equity = Assets X Liabilities"], "answer": "Assets = Liabilities + Owner's Equity", "rationale": "The accounting equation states that a business's assets are equal to its liabilities plus owner's equity. This is the foundation of the balance sheet."},
-    {"category": "Financial Analysis", "question": "What is the primary purpose of a balance sheet?", "options": ["To show profit over time", "To show cash flow", "To capture financial condition at a specific moment", "To show shareholder equity changes"], "answer": "To capture financial condition at a specific moment", "rationale": "A balance sheet gives a summary of a company's financial health (Assets, Liabilities, Equity) at a specific point in time."},
-    {"category": "Financial Analysis", "question": "Marginal analysis determines whether a business activity will result in:", "options": ["Marginal revenue >= Marginal cost", "Net revenue < Marginal revenue", "Marginal cost > Marginal revenue", "Sunk cost recovery"], "answer": "Marginal revenue >= Marginal cost", "rationale": "Marginal analysis compares the additional benefits of an activity to the additional costs. You proceed if benefits >= costs."},
-    {"category": "Financial Analysis", "question": "A variance analysis helps a business:", "options": ["Compare with competitors", "Make choices between alternatives", "Maintain budgetary control", "Predict trends"], "answer": "Maintain budgetary control", "rationale": "Variance analysis compares actual results to the budget to identify why differences (variances) occurred."},
-    {"category": "Financial Analysis", "question": "Which cost classification helps determine how well a manager performed?", "options": ["By function", "By controllability", "By behavior", "By relevance"], "answer": "By controllability", "rationale": "Controllability classifies costs based on whether a specific manager has the power to influence them."},
-    {"category": "Financial Analysis", "question": "If a company pays more in dividends than it earns in net income, retained earnings will:", "options": ["Increase", "Stay the same", "Be zero", "Decrease"], "answer": "Decrease", "rationale": "Retained earnings = Beginning Earnings + Net Income - Dividends. If Dividends > Net Income, the total decreases."},
-    {"category": "Financial Analysis", "question": "Cost allocation is the process of:", "options": ["Determining market price", "Assigning costs to cost objects", "Calculating taxes", "Forecasting sales"], "answer": "Assigning costs to cost objects", "rationale": "Cost allocation divides indirect costs (like rent or utilities) among different departments or products."},
-    {"category": "Financial Analysis", "question": "Which represents a 'Sunk Cost'?", "options": ["Training for an employee who quit", "Raw materials", "Electric bill", "Future rent"], "answer": "Training for an employee who quit", "rationale": "Sunk costs have already been incurred and cannot be recovered. They should not influence future decisions."},
-    {"category": "Financial Analysis", "question": "To calculate the future value of money, you need:", "options": ["Present value & discount rate", "Past value & principal", "Income & interest", "Past value & present value"], "answer": "Present value & discount rate", "rationale": "FV = PV * (1 + r)^n. You need the starting amount (Present Value) and the interest rate."},
-    {"category": "Financial Analysis", "question": "Dividends paid to stockholders are reported on the statement of equity as:", "options": ["Additions to net income", "Subtractions from net income", "Operating expenses", "Assets"], "answer": "Subtractions from net income", "rationale": "Dividends are distributions of profit, so they reduce the Retained Earnings of the company."},
-
-    # --- LAW, ETHICS & RISK (BL, RM) ---
-    {"category": "Law & Ethics", "question": "A legally binding contract requires:", "options": ["Written signature", "Agreement by one party", "Exchange of value (consideration)", "Notarization"], "answer": "Exchange of value (consideration)", "rationale": "For a contract to be binding, something of value must be exchanged between parties."},
-    {"category": "Law & Ethics", "question": "Insider trading involves:", "options": ["Buying stock in your own company", "Selling stock before a merger becomes public", "Discussing stock prices", "Analyzing public data"], "answer": "Selling stock before a merger becomes public", "rationale": "Trading based on material, non-public information is illegal insider trading."},
-    {"category": "Law & Ethics", "question": "A Ponzi scheme relies on:", "options": ["Product sales", "Funds from new investors", "Government bonds", "Stock dividends"], "answer": "Funds from new investors", "rationale": "Ponzi schemes use money from new investors to pay fake 'returns' to earlier investors."},
-    {"category": "Law & Ethics", "question": "Which of the following is a tax-deductible expense for a business?", "options": ["Personal vacation", "Computers for the office", "Traffic tickets", "Political contributions"], "answer": "Computers for the office", "rationale": "Necessary business equipment is tax-deductible. Personal expenses and fines are not."},
-    {"category": "Law & Ethics", "question": "What is 'fiduciary responsibility'?", "options": ["Acting in the client's best interest", "Generating highest commissions", "Following manager orders", "Maximizing short-term profit"], "answer": "Acting in the client's best interest", "rationale": "A fiduciary is legally obligated to prioritize the client's financial well-being over their own."},
-    {"category": "Law & Ethics", "question": "Compliance technology helps organizations primarily by:", "options": ["Improving customer service", "Reducing costs and errors", "Avoiding all regulations", "Hiring more staff"], "answer": "Reducing costs and errors", "rationale": "Automated compliance reduces the manual labor and human error associated with regulatory reporting."},
-    {"category": "Law & Ethics", "question": "To manage risk, a company might form a 'captive insurance company' when:", "options": ["Commercial insurance won't cover their specific risks", "They want to avoid taxes", "They are too small for insurance", "They have no risks"], "answer": "Commercial insurance won't cover their specific risks", "rationale": "Captive insurance is a subsidiary formed to insure the parent company's specific risks."},
-    {"category": "Law & Ethics", "question": "Enterprise Risk Management (ERM) involves:", "options": ["Ignoring small risks", "Identifying risks across the whole organization", "Focusing only on financial risk", "Buying insurance only"], "answer": "Identifying risks across the whole organization", "rationale": "ERM is a holistic approach to managing all types of risk (strategic, operational, financial, hazard) together."},
-    {"category": "Law & Ethics", "question": "If an employee discovers a safety violation, they should:", "options": ["Ignore it", "Report it to protect employees/customers", "Fix it secretly", "Quit"], "answer": "Report it to protect employees/customers", "rationale": "Reporting noncompliance prevents accidents and protects the well-being of stakeholders."},
-    {"category": "Law & Ethics", "question": "The Sarbanes-Oxley Act relates to:", "options": ["Environmental protection", "Financial record transparency", "Workplace safety", "Import tariffs"], "answer": "Financial record transparency", "rationale": "Sarbanes-Oxley (SOX) regulates financial reporting and auditing to prevent corporate fraud."},
-
-    # --- ECONOMICS (EC) ---
-    {"category": "Economics", "question": "Which economic indicator is considered 'leading' (predicts future movement)?", "options": ["Unemployment rate", "Stock market returns", "GDP", "Inflation"], "answer": "Stock market returns", "rationale": "The stock market often moves before the general economy, making it a leading indicator."},
-    {"category": "Economics", "question": "During a recession (contraction), what usually decreases?", "options": ["Unemployment", "Interest rates", "Consumer spending", "Government debt"], "answer": "Consumer spending", "rationale": "In a recession, confidence drops and people spend less money."},
-    {"category": "Economics", "question": "If the US Dollar weakens against the Euro, US exports to Europe become:", "options": ["More expensive", "Cheaper", "Unchanged", "Illegal"], "answer": "Cheaper", "rationale": "A weak domestic currency makes exports cheaper for foreign buyers to purchase."},
-    {"category": "Economics", "question": "The law of diminishing returns states that adding more workers will eventually:", "options": ["Increase output indefinitely", "Decrease output per worker", "Eliminate costs", "Improve quality"], "answer": "Decrease output per worker", "rationale": "Adding variable resources (labor) to fixed resources (machinery) eventually yields lower marginal output."},
-    {"category": "Economics", "question": "Inflation is the steady increase in:", "options": ["Stock prices", "Prices of goods and services", "Unemployment", "Savings rates"], "answer": "Prices of goods and services", "rationale": "Inflation measures the rising cost of a basket of consumer goods over time."},
-    {"category": "Economics", "question": "What type of market structure involves trading unlisted stock via a dealer network?", "options": ["Auction market", "Over-the-counter (OTC)", "Futures market", "Bond market"], "answer": "Over-the-counter (OTC)", "rationale": "OTC markets handle securities not listed on major exchanges like the NYSE."},
-    {"category": "Economics", "question": "Which type of unemployment is caused by a general economic downturn?", "options": ["Frictional", "Structural", "Cyclical", "Seasonal"], "answer": "Cyclical", "rationale": "Cyclical unemployment rises and falls with the business cycle (recessions/expansions)."},
-    {"category": "Economics", "question": "Gross Domestic Product (GDP) measures:", "options": ["Total tax revenue", "Total value of goods/services produced", "Stock market growth", "Consumer debt"], "answer": "Total value of goods/services produced", "rationale": "GDP is the standard measure of a country's total economic output."},
-    {"category": "Economics", "question": "When supply exceeds demand, prices tend to:", "options": ["Increase", "Decrease", "Stay the same", "Fluctuate wildly"], "answer": "Decrease", "rationale": "Surplus supply puts downward pressure on prices to clear the market."},
-    {"category": "Economics", "question": "A tax on imported goods is called a:", "options": ["Quota", "Subsidy", "Tariff", "Embargo"], "answer": "Tariff", "rationale": "Tariffs are taxes levied on imports to protect domestic industries or raise revenue."},
-
-    # --- SYSTEMS & DATA (NF, OP, SM) ---
-    {"category": "Systems & Data", "question": "Data cleansing is used to:", "options": ["Encrypt data", "Remove errors and duplicates", "Speed up internet", "Monitor employees"], "answer": "Remove errors and duplicates", "rationale": "Data cleansing ensures databases are accurate, consistent, and useful for analysis."},
-    {"category": "Systems & Data", "question": "What allows businesses to share information between different computer systems?", "options": ["Electronic Data Interchange (EDI)", "Word Processing", "Spreadsheets", "Flash drives"], "answer": "Electronic Data Interchange (EDI)", "rationale": "EDI is the standard format for exchanging business data between different companies' systems."},
-    {"category": "Systems & Data", "question": "Predictive analytics uses data to:", "options": ["Summarize the past", "Forecast future events", "Clean databases", "Audit taxes"], "answer": "Forecast future events", "rationale": "Predictive analytics uses historical data to model probable future outcomes."},
-    {"category": "Systems & Data", "question": "A central data repository ensures:", "options": ["Slower access", "Inconsistent data", "Up-to-date, consistent data", "Data isolation"], "answer": "Up-to-date, consistent data", "rationale": "Central repositories provide a 'single source of truth' for the entire organization."},
-    {"category": "Systems & Data", "question": "Tokenization protects online transactions by:", "options": ["Lowering prices", "Substituting data with a random symbol", "Increasing speed", "Removing taxes"], "answer": "Substituting data with a random symbol", "rationale": "Tokenization replaces sensitive data (like card numbers) with a useless 'token' to prevent theft."},
-    {"category": "Systems & Data", "question": "What is the first step in project planning?", "options": ["Identify stakeholders", "Determine budget", "Schedule tasks", "Evaluate results"], "answer": "Identify stakeholders", "rationale": "You must know who is involved and what they need before defining scope or budget."},
-    {"category": "Systems & Data", "question": "Lean operations focus on:", "options": ["Increasing waste", "Eliminating waste", "Increasing inventory", "Reducing quality"], "answer": "Eliminating waste", "rationale": "Lean methodology aims to maximize value by removing all non-value-added activities (waste)."},
-    {"category": "Systems & Data", "question": "The 'Critical Path' in project management represents:", "options": ["The shortest time to complete", "The longest path of planned activities", "The most expensive tasks", "The easiest tasks"], "answer": "The longest path of planned activities", "rationale": "The critical path determines the earliest possible end date; if a critical task slips, the project slips."},
-    {"category": "Systems & Data", "question": "Encryption protects data by:", "options": ["Deleting it", "Transforming it into secret code", "Backing it up", "Organizing it"], "answer": "Transforming it into secret code", "rationale": "Encryption makes data unreadable to unauthorized users without a decryption key."},
-    {"category": "Systems & Data", "question": "A 'dashboard' in finance is used to:", "options": ["Drive cars", "Visualize key performance indicators (KPIs)", "Write code", "File taxes"], "answer": "Visualize key performance indicators (KPIs)", "rationale": "Dashboards provide at-a-glance views of critical data metrics."},
-
-    # --- SOFT SKILLS (CO, CR, EI, HR, PD) ---
-    {"category": "Soft Skills", "question": "Initiative is defined as:", "options": ["Waiting for instructions", "Acting without being told", "Doing the bare minimum", "Asking for help constantly"], "answer": "Acting without being told", "rationale": "Initiative involves recognizing what needs to be done and doing it proactively."},
-    {"category": "Soft Skills", "question": "Active listening involves:", "options": ["Interrupting to ask questions", "Thinking about your reply", "Verbal acknowledgment and eye contact", "Multitasking"], "answer": "Verbal acknowledgment and eye contact", "rationale": "Active listening requires full attention and providing feedback (nodding, 'I see') to the speaker."},
-    {"category": "Soft Skills", "question": "To build trust with a client, a finance professional should:", "options": ["Hide risks", "Be transparent and honest", "Use complex jargon", "Guarantee returns"], "answer": "Be transparent and honest", "rationale": "Transparency builds long-term trust. Hiding risks or guaranteeing returns is unethical."},
-    {"category": "Soft Skills", "question": "When negotiating, 'Batna' stands for:", "options": ["Best Alternative to a Negotiated Agreement", "Better Ask The New Associate", "Business Assets To Net Assets", "Buy All The New Assets"], "answer": "Best Alternative to a Negotiated Agreement", "rationale": "BATNA is your backup plan if negotiations fail; knowing it gives you leverage."},
-    {"category": "Soft Skills", "question": "A 'Whistleblower' policy encourages employees to:", "options": ["Spy on coworkers", "Report unethical behavior without fear", "Gossip", "Leak secrets to competitors"], "answer": "Report unethical behavior without fear", "rationale": "Whistleblower protections ensure employees can report illegal acts without retaliation."},
-    {"category": "Soft Skills", "question": "Emotional Intelligence (EQ) includes:", "options": ["IQ score", "Self-awareness and empathy", "Math skills", "Memorization"], "answer": "Self-awareness and empathy", "rationale": "EQ is the ability to understand and manage your own emotions and those of others."},
-    {"category": "Soft Skills", "question": "In a job interview, 'Tell me about yourself' is a test of:", "options": ["Your life story", "Communication skills and professional summary", "Honesty", "Your hobbies"], "answer": "Communication skills and professional summary", "rationale": "Interviewers want a concise summary of your professional background and relevance to the role."},
-    {"category": "Soft Skills", "question": "Consensus building means:", "options": ["Voting", "Majority rule", "Reaching substantial agreement", "The leader decides"], "answer": "Reaching substantial agreement", "rationale": "Consensus means the group generally agrees and can support the decision, even if not everyone loves it."},
-    {"category": "Soft Skills", "question": "Which communication channel is best for sensitive bad news?", "options": ["Email", "Text message", "Face-to-face", "Memo"], "answer": "Face-to-face", "rationale": "Sensitive news requires reading non-verbal cues and showing empathy, best done in person."},
-    {"category": "Soft Skills", "question": "Networking is primarily about:", "options": ["Asking for jobs", "Building mutually beneficial relationships", "Collecting business cards", "Selling products"], "answer": "Building mutually beneficial relationships", "rationale": "Effective networking is about exchange and relationship building, not just taking."},
-]
+# The loaders live in resources.py, so tools driving the app in-process reach the same objects
+bank = load_question_bank()
+metrics = load_metrics()
+engine = load_engine()
+player_store = load_player_store()
+players = load_session_pool()
+asset_cache = load_asset_cache()
+leaderboard = load_leaderboard()
+event_log = load_event_log()
+rooms = load_room_store()
+profiling.lap("data")
+
+# Read-only metrics page: ?metrics (Prometheus text) or ?metrics=json
+if "metrics" in st.query_params:
+    if metrics is None:
+        st.info("Metrics are disabled (DECA_METRICS=0).")
+    elif st.query_params["metrics"] == "json":
+        st.json(metrics.to_dict())
+    else:
+        st.code(metrics.render_prometheus(), language="text")
+    profiling.finish()
+    st.stop()
 
 # ==========================================
 # 3. GAME LOGIC & STATE MANAGEMENT
 # ==========================================
 
 # --- A. Initialize Variables ---
-if 'balance' not in st.session_state:
-    st.session_state.balance = 0            # Liquid Cash (Spendable)
-if 'lifetime_earnings' not in st.session_state:
-    st.session_state.lifetime_earnings = 0  # Career Score (For Title)
-if 'office_level' not in st.session_state:
-    st.session_state.office_level = "The Basement"
-if 'staff' not in st.session_state:
-    st.session_state.staff = []             # List of hired help
-if 'performance_history' not in st.session_state:
-    st.session_state.performance_history = [] # Rolling window of last 20 answers (True/False)
-if 'current_question' not in st.session_state:
-    st.session_state.current_question = None
-if 'last_result' not in st.session_state:
-    st.session_state.last_result = None     # "Correct", "Incorrect", "Demoted"
-if 'eliminated_options' not in st.session_state:
-    st.session_state.eliminated_options = []
-
-# --- B. Career Logic (The Ladder) ---
-def get_title(earnings):
-    if earnings < 50000: return "Unpaid Intern"
-    elif earnings < 150000: return "Junior Analyst"
-    elif earnings < 500000: return "Associate"
-    elif earnings < 2000000: return "Vice President"
-    elif earnings < 10000000: return "Managing Director"
-    else: return "Master of the Universe"
-
-# --- C. Asset Data ---
-office_tiers = {
-    "The Basement": {"cost": 0, "img": "https://images.unsplash.com/photo-1504384308090-c54be3855833?w=400"},
-    "The Bullpen": {"cost": 50000, "img": "https://images.unsplash.com/photo-1497215728101-856f4ea42174?w=400"},
-    "Associate Office": {"cost": 200000, "img": "https://images.unsplash.com/photo-1662973599908-724d27ae3443?w=400"},
-    "VP Suite": {"cost": 1000000, "img": "https://images.unsplash.com/photo-1600607686527-6fb886090705?w=400"},
-    "The Penthouse": {"cost": 10000000, "img": "https://images.unsplash.com/photo-1512918760383-5658fc14bc63?w=400"}
-}
-
-talent_roster = {
-    "Junior Analyst": {"cost": 20000, "desc": "Unlocks 'Research Note' (Hints)", "icon": "💡"},
-    "The Quant": {"cost": 75000, "desc": "Unlocks 'Algorithm' (Eliminate 2 wrong)", "icon": "📉"},
-    "Risk Manager": {"cost": 150000, "desc": "Unlocks 'Hedge' (Skip question)", "icon": "🛡️"}
-}
-
-# --- D. Core Functions ---
-
-def new_question(category="All"):
-    st.session_state.last_result = None
-    st.session_state.eliminated_options = []
-    
-    if category == "All":
-        # Weighting: prioritize areas where user is weak could be V2.
-        st.session_state.current_question = random.choice(questions_db)
+if 'runs' not in st.session_state:
+    st.session_state.runs = {}              # Per scope ("app" or a fragment key): [runs, seconds]
+
+def record_run(scope, seconds):
+    # tools/rerun_budget.py reads these to check what each interaction reruns
+    stats = st.session_state.runs.setdefault(scope, [0, 0.0])
+    stats[0] += 1
+    stats[1] += seconds
+    if metrics is not None:
+        metrics.run_seconds.observe(seconds, scope)
+        if (stats[0] - 1) % settings.METRICS_STATE_EVERY == 0:
+            record_state_size()
+
+def record_state_size():
+    # Sampled: a deep walk costs far more than a counter. The bank and the
+    # engine are shared, so they are not counted; the player lives in the
+    # session pool, not in session state, and is added on top.
+    size = deep_sizeof(st.session_state.to_dict(), [bank, engine], Question)
+    metrics.session_state_bytes.observe(size + player_sizeof(engine, current_player()))
+
+def rerun(scope="app"):
+    # st.rerun, counted
+    if metrics is not None:
+        metrics.reruns.inc("app" if scope == "app" else "fragment")
+    st.rerun(scope)
+
+def panel(key, run_every=None):
+    # A fragment that records its own runs and execution time
+    def decorate(render):
+        @functools.wraps(render)
+        def timed():
+            start = time.perf_counter()
+            # Inside a full run it is a section of that run; rerun on its own, a run of its own
+            alone = profile_mode and profiling.current() is None
+            if alone:
+                profiling.start(key, stacks=profile_mode == "stacks")
+            try:
+                with profiling.section(key):
+                    render()
+            finally:
+                record_run(key, time.perf_counter() - start)
+                if alone:
+                    record_profile(profiling.finish())
+        return st.fragment(timed, key=key, run_every=run_every)
+    return decorate
+
+def record_profile(run):
+    # Keeps the last PROFILE_RUNS runs for the profile panel, and only their
+    # stacks on disk: a polling panel profiles a run every second
+    st.session_state.profile_runs.append((run.scope, run.seconds, dict(run.sections)))
+    st.session_state.profile_count += 1
+    path = os.path.join(st.session_state.profile_dir,
+                        f"{st.session_state.profile_count:05d}-{run.scope}.collapsed")
+    if run.write_collapsed(path):
+        files = st.session_state.profile_files
+        files.append(path)
+        while len(files) > settings.PROFILE_RUNS:
+            try:
+                os.remove(files.popleft())
+            except OSError:
+                pass
+
+# --- B. The Player (Returning Players are restored from the store) ---
+def restore_player(player_id):
+    saved = player_store.load(player_id)
+    return engine.new_player() if saved is None else engine.restore(saved)
+
+def current_player():
+    # Looked up on every use and never kept across runs: an idle session's
+    # player may be offloaded by the pool in the meantime
+    return players.get(st.session_state.player_id, restore_player)
+
+def save_player():
+    # Write-behind: enqueues only, the store's thread does the disk I/O
+    player_store.save(st.session_state.player_id, engine.snapshot(current_player()))
+
+def rank_player():
+    player = current_player()
+    leaderboard.update(st.session_state.player_id, player.lifetime_earnings,
+                       player.performance.overall.accuracy)
+
+if 'player_id' not in st.session_state:
+    # The ID lives in the URL so a refresh (or a bookmark) finds the same player
+    player_id = st.query_params.get("player")
+    if not player_id:
+        player_id = uuid.uuid4().hex
+        st.query_params["player"] = player_id
+    st.session_state.player_id = player_id
+    rank_player()
+    # The pooled player outlives the tab: a refresh must show the mode it is in
+    st.session_state.mode = current_player().mode
+if 'notice' not in st.session_state:
+    st.session_state.notice = None          # (slot, kind, text) flash message from a callback
+if 'exam' not in st.session_state:
+    st.session_state.exam = None            # Practice Exam in progress or just graded
+    st.session_state.exam_result = None     # Exam.grade() output once submitted
+if 'room' not in st.session_state:
+    st.session_state.room = None            # Code of the live room this session is in
+    st.session_state.room_name = f"Trader {st.session_state.player_id[:6]}"
+    st.session_state.room_seen = None       # (code, version) room_view was built for
+    st.session_state.room_view = None       # render_room's text for that version
+if profile_mode and 'profile_runs' not in st.session_state:
+    st.session_state.profile_runs = deque(maxlen=settings.PROFILE_RUNS)  # (scope, seconds, sections)
+    st.session_state.profile_count = 0
+    st.session_state.profile_files = deque()  # Collapsed stacks on disk, oldest first
+    st.session_state.profile_dir = os.path.join(settings.PROFILE_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-"
+                                                f"{st.session_state.player_id[:8]}")
+
+# --- C. Callbacks ---
+# The rules live in engine.py; these only translate clicks into engine calls.
+# Every button mutates state in an on_click callback. Streamlit runs the
+# callback before the script, so each interaction costs exactly one run
+# (no sleeping on the server thread). Each callback names the fragments
+# (section 4/5) whose content it changed with rerun([...keys]), and only
+# those rerun. Callbacks draw nothing themselves; they leave a notice or
+# flag for the fragment to render. Stale clicks (e.g. a double-clicked
+# answer) are ignored by the engine's state machine.
+def on_next_deal():
+    category = st.session_state.category
+    q = engine.new_question(current_player(), category)
+    if q is None:
+        return
+    if category != "All" and q.category != category:
+        st.session_state.notice = ("trading_floor", "error", "No data for this sector. Sourcing globally.")
+    rerun(["trading_floor"])
+
+def on_mode():
+    engine.set_mode(current_player(), st.session_state.mode)
+    rerun(["trading_floor"])
+
+def on_answer(option):
+    player = current_player()
+    q, lifelines, asked_at = engine.question(player), player.lifelines, player.asked_at
+    result = engine.check_answer(player, option)
+    if result is None:
+        return
+    save_player()
+    rank_player()
+    event_log.append(st.session_state.player_id, q.id, q.category, option == q.answer, lifelines,
+                     None if asked_at is None else time.time() - asked_at)
+    if result == "Demoted":
+        rerun()  # Office and staff were seized: every panel changes
+    # Analytics is not rerun here: it catches up when its tab is opened (on_tab)
+    rerun(["trading_floor", "sidebar_metrics"])
+
+def on_quant():
+    if engine.use_quant(current_player()):
+        rerun(["trading_floor"])
+
+def on_buy_office(name):
+    shortfall = engine.buy_office(current_player(), name)
+    if shortfall == 0:
+        save_player()
+        st.session_state.notice = (f"btn_{name}", "success", f"Move-in complete! Welcome to {name}.")
+        rerun(["real_estate", "sidebar_metrics"])
     else:
-        filtered = [q for q in questions_db if q['category'] == category]
-        if filtered:
-            st.session_state.current_question = random.choice(filtered)
-        else:
-            st.error("No data for this sector. Sourcing globally.")
-            st.session_state.current_question = random.choice(questions_db)
-
-def check_answer(user_ans):
-    correct_ans = st.session_state.current_question['answer']
-    
-    if user_ans == correct_ans:
-        # Success Logic
-        payout = 10000
-        st.session_state.balance += payout
-        st.session_state.lifetime_earnings += payout
-        st.session_state.last_result = "Correct"
-        st.session_state.performance_history.append(True)
+        st.session_state.notice = (f"btn_{name}", "error", f"Insufficient Capital. Need ${shortfall:,.0f} more.")
+        rerun(["real_estate"])
+
+def on_hire(role):
+    if engine.hire(current_player(), role) == 0:
+        save_player()
+        st.session_state.notice = (f"hire_{role}", "balloons", None)
+        # New hires unlock lifelines on the Trading Floor
+        rerun(["headhunter", "sidebar_metrics", "trading_floor"])
     else:
-        # Failure Logic
-        st.session_state.last_result = "Incorrect"
-        st.session_state.performance_history.append(False)
-    
-    # Feature 6: Risk of Ruin Protocol
-    check_risk_of_ruin()
-
-def check_risk_of_ruin():
-    # Only check if we have enough history
-    history = st.session_state.performance_history
-    if len(history) > 20:
-        # Keep window at 20
-        st.session_state.performance_history = history[-20:]
-        history = st.session_state.performance_history
-        
-    if len(history) == 20:
-        accuracy = sum(history) / len(history)
-        if accuracy < 0.70: # Survival Threshold
-            execute_demotion()
-
-def execute_demotion():
-    # Feature 6 Implementation
-    st.session_state.last_result = "Demoted"
-    
-    # 1. Title Strip (Slash lifetime earnings effectively demoting title)
-    # We set them back to the start of the previous tier
-    current_earnings = st.session_state.lifetime_earnings
-    if current_earnings > 2000000: st.session_state.lifetime_earnings = 500000
-    elif current_earnings > 500000: st.session_state.lifetime_earnings = 150000
-    elif current_earnings > 150000: st.session_state.lifetime_earnings = 50000
-    else: st.session_state.lifetime_earnings = 0
-    
-    # 2. Asset Seizure (Office Foreclosure)
-    st.session_state.office_level = "The Basement"
-    
-    # 3. Staff Layoffs (Optional, but ruthless)
-    st.session_state.staff = []
-    
-    # 4. Reset Performance History (Give them a clean slate to rebuild)
-    st.session_state.performance_history = []
-
-def use_quant():
-    q = st.session_state.current_question
-    # Find wrong options
-    wrong_options = [opt for opt in q['options'] if opt != q['answer']]
-    # Pick 2 to kill
-    if len(wrong_options) >= 2:
-        to_eliminate = random.sample(wrong_options, 2)
-        st.session_state.eliminated_options = to_eliminate
+        st.session_state.notice = (f"hire_{role}", "error", "Insufficient Funds")
+        rerun(["headhunter"])
+
+def on_start_exam():
+    # Answers of a previous exam must not pre-fill the new sheet
+    for key in [k for k in st.session_state if str(k).startswith("exam_q")]:
+        del st.session_state[key]
+    st.session_state.exam = Exam(bank, settings.EXAM_SIZE, settings.EXAM_MINUTES)
+    st.session_state.exam_result = None
+    rerun()  # The countdown's refresh interval is set on a full run
+
+def on_submit_exam():
+    # The whole sheet arrives in this one run and is graded in one pass
+    exam = st.session_state.exam
+    exam.submit([st.session_state.get(f"exam_q{i}") for i in range(len(exam))])
+    st.session_state.exam_result = exam.grade()
+    rerun()
+
+def on_close_exam():
+    st.session_state.exam = None
+    st.session_state.exam_result = None
+    rerun(["exam"])
+
+def on_create_room():
+    room = rooms.create(st.session_state.player_id, st.session_state.room_name.strip() or None)
+    st.session_state.room = room.code
+    rerun()  # The room's polling interval is set on a full run
+
+def on_join_room():
+    code = st.session_state.room_code.strip().upper()
+    room = rooms.get(code)
+    if room is None:
+        st.session_state.notice = ("room", "error", f"No room {code or '(blank)'} is open.")
+        rerun(["room"])
+    if not room.join(st.session_state.player_id, st.session_state.room_name.strip() or None):
+        st.session_state.notice = ("room", "error", f"Room {code} is full.")
+        rerun(["room"])
+    st.session_state.room = room.code
+    rerun()
+
+def on_leave_room():
+    rooms.leave(st.session_state.room, st.session_state.player_id)
+    st.session_state.room = None
+    rerun()
+
+def on_start_match():
+    room = rooms.get(st.session_state.room)
+    if room is not None and room.start(st.session_state.player_id):
+        rerun(["room"])
+
+def on_room_answer(option):
+    # Scored by the engine inside the room, so it pays what the Trading Floor pays
+    room = rooms.get(st.session_state.room)
+    if room is None:
+        return
+    player = current_player()
+    result = room.answer(st.session_state.player_id, player, option)
+    if result is None:
+        return  # Round already closed, or a double click
+    save_player()
+    rank_player()
+    q = engine.question(player)
+    event_log.append(st.session_state.player_id, q.id, q.category, result.correct, 0, result.seconds)
+    if player.phase == "demoted":
+        rerun()
+    # The room's question replaced the Trading Floor's
+    rerun(["room", "trading_floor", "sidebar_metrics"])
+
+profiling.lap("state")
+
+def show_notice(slot):
+    # Flash messages render once, next to the button that produced them
+    notice = st.session_state.notice
+    if notice is not None and notice[0] == slot:
+        st.session_state.notice = None
+        if notice[1] == "balloons":
+            st.balloons()
+        else:
+            getattr(st, notice[1])(notice[2])
 
 # ==========================================
 # 4. SIDEBAR (THE DASHBOARD)
 # ==========================================
-with st.sidebar:
-    st.markdown("## 🏛️ DECA CAPITAL")
-    
+# Each panel below is a fragment, so an interaction reruns only the
+# fragments it touches (see the st.rerun(...) scopes in the callbacks) and
+# never the CSS injection or the other tabs.
+@panel("sidebar_metrics")
+def render_sidebar_metrics():
+    player = current_player()
+
     # 1. Career Status
-    current_title = get_title(st.session_state.lifetime_earnings)
+    current_title = engine.get_title(player.lifetime_earnings)
     st.markdown(f"**ROLE:**")
     st.markdown(f'<div class="job-title">{current_title}</div>', unsafe_allow_html=True)
     
     # 2. Financials
     st.markdown("**LIQUIDITY (Spendable):**")
-    st.markdown(f'<div class="big-money">${st.session_state.balance:,.0f}</div>', unsafe_allow_html=True)
+    st.markdown(f'<div class="big-money">${player.balance:,.0f}</div>', unsafe_allow_html=True)
     
-    st.caption(f"Lifetime Volume: ${st.session_state.lifetime_earnings:,.0f}")
+    st.caption(f"Lifetime Volume: ${player.lifetime_earnings:,.0f}")
     
     st.markdown("---")
     
     # 3. Assets
-    st.markdown(f"**HQ:** {st.session_state.office_level}")
+    st.markdown(f"**HQ:** {player.office_level}")
     
     # 4. Performance (The Risk Monitor)
-    history = st.session_state.performance_history
-    if len(history) > 0:
-        acc = sum(history) / len(history)
-        st.write(f"**Rolling Accuracy (Last 20):** {acc*100:.0f}%")
+    performance = player.performance
+    window = performance.overall
+    if len(window) > 0:
+        acc = window.accuracy
+        st.write(f"**Rolling Accuracy (Last {window.capacity}):** {acc*100:.0f}%")
         st.progress(acc)
-        if acc < 0.75 and len(history) > 10:
+        if acc < settings.WARNING_THRESHOLD and len(window) > window.capacity // 2:
             st.markdown('<p class="danger-zone">⚠️ RISK OF RUIN IMMINENT</p>', unsafe_allow_html=True)
+
+        # 5. Sector Breakdown (per-category rolling windows)
+        for sector in bank.categories:
+            sector_window = performance.by_category.get(sector)
+            if sector_window:
+                st.caption(f"{sector}: {sector_window.accuracy*100:.0f}% ({len(sector_window)})")
     else:
         st.write("Performance: No data yet")
 
+    # 6. Leaderboard (top K across all sessions, never sorted here)
+    st.markdown("---")
+    st.markdown("**🏆 LEAGUE TABLE**")
+    _, top = leaderboard.snapshot()
+    me = st.session_state.player_id
+    for rank, entry in enumerate(top, 1):
+        name = "You" if entry.player_id == me else f"Trader {entry.name}"
+        st.caption(f"{rank}. {name} — ${entry.earnings:,.0f} · {entry.accuracy*100:.0f}%")
+
+with st.sidebar:
+    st.markdown("## 🏛️ DECA CAPITAL")
+    render_sidebar_metrics()
+
 # ==========================================
 # 5. MAIN INTERFACE
 # ==========================================
 
-# Tabs for navigation
-tab1, tab2, tab3 = st.tabs(["⚡ TRADING FLOOR (Quiz)", "🏢 REAL ESTATE", "🤝 HEADHUNTER"])
-
 # --- TAB 1: THE TRADING FLOOR ---
-with tab1:
-    col1, col2 = st.columns([3, 1])
+MODE_LABELS = {"adaptive": "Adaptive (weak spots)", "spaced": "Spaced Repetition"}
+
+@panel("trading_floor")
+def render_trading_floor():
+    player = current_player()
+
+    col1, col2, col3 = st.columns([2, 1, 1])
     with col1:
         st.subheader("Market Operations")
     with col2:
         # Category Selector
-        category = st.selectbox("Market Sector", ["All", "Financial Analysis", "Law & Ethics", "Economics", "Systems & Data", "Soft Skills"])
+        st.selectbox("Market Sector", ("All",) + bank.categories, key="category")
+    with col3:
+        st.selectbox("Study Mode", MODES, format_func=MODE_LABELS.get, key="mode", on_change=on_mode)
+    show_notice("trading_floor")
 
     # If no question is active, show Start Button
-    if st.session_state.current_question is None:
+    if player.phase == "idle":
         st.info("Market is open. Initiate trading sequence.")
-        if st.button("INITIATE DEAL FLOW"):
-            new_question(category)
-            st.rerun()
+        st.button("INITIATE DEAL FLOW", on_click=on_next_deal)
 
     # Active Question Display
     else:
-        q = st.session_state.current_question
+        q = engine.question(player)
         
         # Display Question Area
-        st.markdown(f"**SECTOR: {q['category'].upper()}**")
-        st.markdown(f"### {q['question']}")
+        st.markdown(f"**SECTOR: {q.category.upper()}**")
+        if player.mode == "spaced":
+            scheduler = player.scheduler
+            st.caption(f"Review box {scheduler.box(q.id) + 1} of {len(scheduler.intervals)}")
+        st.markdown(f"### {q.question}")
         
         st.markdown("---")
 
         # LIFELINES (Talent Acquisition) - Only show if hired and not yet answered
-        if st.session_state.last_result is None:
+        if player.phase == "question":
             ll_col1, ll_col2, ll_col3 = st.columns(3)
             
             # 1. Junior Analyst (Hint)
             with ll_col1:
-                if "Junior Analyst" in st.session_state.staff:
+                if engine.has_staff(player, "Junior Analyst"):
                     if st.button("💡 Analyst Note"):
-                        st.info(f"**INTERNAL MEMO:** {q['rationale']}")
+                        engine.use_hint(player)
+                        st.info(f"**INTERNAL MEMO:** {q.rationale}")
                 else:
                     st.caption("🔒 Hire Analyst to unlock Hints")
 
             # 2. The Quant (50/50)
             with ll_col2:
-                if "The Quant" in st.session_state.staff:
-                    if st.button("📉 Quant Algo"):
-                        use_quant()
-                        st.rerun()
+                if engine.has_staff(player, "The Quant"):
+                    st.button("📉 Quant Algo", on_click=on_quant)
                 else:
                     st.caption("🔒 Hire Quant to unlock 50/50")
 
             # 3. Risk Manager (Skip)
             with ll_col3:
-                if "Risk Manager" in st.session_state.staff:
-                    if st.button("🛡️ Hedge Position"):
-                        new_question(category)
-                        st.rerun()
+                if engine.has_staff(player, "Risk Manager"):
+                    st.button("🛡️ Hedge Position", on_click=on_next_deal)
                 else:
                     st.caption("🔒 Hire Risk Manager to Skip")
 
         # Answer Options Display
-        options = q['options']
+        options = q.options
         col_a, col_b = st.columns(2)
         
         for i, option in enumerate(options):
             # Check if option was eliminated by Quant
-            is_disabled = option in st.session_state.eliminated_options
+            is_disabled = bool(player.eliminated >> i & 1)
             # Check if question is already answered (disable all)
-            is_answered = st.session_state.last_result is not None
+            is_answered = player.phase != "question"
             
             label = option
             if is_disabled:
@@ -396,40 +541,35 @@ with tab1:
             target_col = col_a if i % 2 == 0 else col_b
             
             with target_col:
-                if st.button(label, key=option, disabled=is_disabled or is_answered):
-                    check_answer(option)
-                    st.rerun()
+                st.button(label, key=option, disabled=is_disabled or is_answered,
+                          on_click=on_answer, args=(option,))
 
         # RESULT NOTIFICATIONS
-        if st.session_state.last_result == "Correct":
+        if player.phase == "answered" and player.last_result == "Correct":
             st.markdown(f"""
             <div class="success-msg">
                 <h3>✅ DEAL CLOSED. WIRE RECEIVED.</h3>
-                <p><strong>+$10,000</strong> has been deposited to your account.</p>
-                <p><em>Market Insight: {q['rationale']}</em></p>
+                <p><strong>+${engine.payout:,.0f}</strong> has been deposited to your account.</p>
+                <p><em>Market Insight: {q.rationale}</em></p>
             </div>
             """, unsafe_allow_html=True)
-            if st.button("SOURCE NEXT DEAL ->", type="primary"):
-                new_question(category)
-                st.rerun()
+            st.button("SOURCE NEXT DEAL ->", type="primary", on_click=on_next_deal)
 
-        elif st.session_state.last_result == "Incorrect":
+        elif player.phase == "answered":
             st.markdown(f"""
             <div class="error-msg">
                 <h3>❌ DEAL FAILED. LOSS INCURRED.</h3>
-                <p>The winning move was: <strong>{q['answer']}</strong></p>
-                <p><em>Market Insight: {q['rationale']}</em></p>
+                <p>The winning move was: <strong>{q.answer}</strong></p>
+                <p><em>Market Insight: {q.rationale}</em></p>
             </div>
             """, unsafe_allow_html=True)
-            if st.button("RE-EVALUATE MARKET (Next) ->"):
-                new_question(category)
-                st.rerun()
+            st.button("RE-EVALUATE MARKET (Next) ->", on_click=on_next_deal)
 
-        elif st.session_state.last_result == "Demoted":
-            st.markdown("""
+        elif player.phase == "demoted":
+            st.markdown(f"""
             <div class="demotion-msg">
                 <h1>📉 MARGIN CALL: ASSETS SEIZED</h1>
-                <p>Your performance dropped below the survival threshold (70%).</p>
+                <p>Your performance dropped below the survival threshold ({settings.DEMOTION_THRESHOLD:.0%}).</p>
                 <p><strong>CONSEQUENCES:</strong></p>
                 <ul>
                     <li>Job Title Stripped</li>
@@ -439,13 +579,13 @@ with tab1:
                 <p>You must rebuild from the bottom.</p>
             </div>
             """, unsafe_allow_html=True)
-            if st.button("BEGIN RECOVERY ->", type="primary"):
-                st.session_state.last_result = None
-                new_question(category)
-                st.rerun()
+            st.button("BEGIN RECOVERY ->", type="primary", on_click=on_next_deal)
 
 # --- TAB 2: VISUAL EMPIRE ---
-with tab2:
+@panel("real_estate")
+def render_real_estate():
+    player = current_player()
+
     st.header("Real Estate Portfolio")
     st.write("Upgrade your environment to reflect your status.")
     
@@ -455,22 +595,16 @@ with tab2:
     # Helper to display card
     def show_office_card(col, name, cost, img_url):
         with col:
-            st.image(img_url, use_column_width=True)
+            with profiling.section("office images"):
+                st.image(asset_cache.thumbnail(name, img_url), width="stretch")
             st.subheader(name)
             st.write(f"**Price:** ${cost:,.0f}")
             
-            if st.session_state.office_level == name:
+            if player.office_level == name:
                 st.button("✅ CURRENT HQ", key=f"btn_{name}", disabled=True)
             else:
-                if st.button(f"Acquire {name}", key=f"btn_{name}"):
-                    if st.session_state.balance >= cost:
-                        st.session_state.balance -= cost
-                        st.session_state.office_level = name
-                        st.success(f"Move-in complete! Welcome to {name}.")
-                        time.sleep(1)
-                        st.rerun()
-                    else:
-                        st.error(f"Insufficient Capital. Need ${cost - st.session_state.balance:,.0f} more.")
+                st.button(f"Acquire {name}", key=f"btn_{name}", on_click=on_buy_office, args=(name,))
+            show_notice(f"btn_{name}")
             st.divider()
 
     # Render Items
@@ -480,7 +614,10 @@ with tab2:
         show_office_card(target_col, name, data['cost'], data['img'])
 
 # --- TAB 3: HEADHUNTER ---
-with tab3:
+@panel("headhunter")
+def render_headhunter():
+    player = current_player()
+
     st.header("Talent Acquisition")
     st.write("Leverage human capital to mitigate risk and improve accuracy.")
     
@@ -498,15 +635,318 @@ with tab3:
                 
             with col_action:
                 st.write("") # Spacer
-                if role in st.session_state.staff:
+                if engine.has_staff(player, role):
                     st.button("ON PAYROLL", key=f"hire_{role}", disabled=True)
                 else:
-                    if st.button(f"HIRE", key=f"hire_{role}"):
-                        if st.session_state.balance >= info['cost']:
-                            st.session_state.balance -= info['cost']
-                            st.session_state.staff.append(role)
-                            st.balloons()
-                            st.rerun()
-                        else:
-                            st.error("Insufficient Funds")
+                    st.button(f"HIRE", key=f"hire_{role}", on_click=on_hire, args=(role,))
+                show_notice(f"hire_{role}")
             st.divider()
+
+# --- TAB 4: STUDY ---
+@panel("study")
+def render_study():
+    st.header("Research Desk")
+    st.write("Search every question, option and rationale by keyword.")
+
+    col_query, col_sector = st.columns([3, 1])
+    with col_query:
+        query = st.text_input("Keywords", key="study_query", placeholder="e.g. fiduciary, tariff, balance sheet")
+    with col_sector:
+        sector = st.selectbox("Sector", ("All",) + bank.categories, key="study_sector")
+
+    if not query.strip():
+        st.caption(f"{len(bank):,} questions indexed.")
+        return
+
+    search_index = load_search_index(bank.fingerprint)
+    start = time.perf_counter()
+    total, hits = search_index.search(query, sector, limit=20)
+    st.caption(f"{total:,} matches in {(time.perf_counter() - start) * 1000:.2f} ms"
+               + (", showing the top 20" if total > 20 else ""))
+    for qid, _ in hits:
+        q = bank[qid]
+        with st.expander(f"{q.category.upper()}: {q.question}"):
+            for option in q.options:
+                st.markdown(f"- **{option}** ✅" if option == q.answer else f"- {option}")
+            st.info(f"**Market Insight:** {q.rationale}")
+
+# --- TAB 5: PRACTICE EXAM ---
+exam_running = st.session_state.exam is not None and st.session_state.exam.submitted is None
+
+@panel("exam_timer", run_every=settings.EXAM_TICK if exam_running else None)
+def render_exam_timer():
+    exam = st.session_state.exam
+    if exam is None or exam.submitted is not None:
+        return
+    left = exam.remaining
+    if left:
+        st.metric("Time Remaining", f"{int(left // 60)}:{int(left % 60):02d}")
+    else:
+        st.error("⏰ TIME IS UP. Submit your exam now.")
+
+@panel("exam")
+def render_exam():
+    exam = st.session_state.exam
+
+    st.header("Practice Exam")
+    if exam is None:
+        st.write(f"{settings.EXAM_SIZE} questions drawn evenly from every sector, {settings.EXAM_MINUTES} minutes. "
+                 "Exam answers never touch your balance.")
+        st.button("START EXAM", type="primary", on_click=on_start_exam)
+        return
+
+    if exam.submitted is None:
+        if len(exam) < settings.EXAM_SIZE:
+            st.caption(f"The bank only has {len(exam)} questions, so this exam is shorter.")
+        with st.form("exam_form"):
+            for i in range(len(exam)):
+                q = bank[int(exam.qids[i])]
+                options = exam.options(bank, i)
+                st.radio(f"**{i + 1}.** {q.question}", range(len(options)), index=None,
+                         format_func=options.__getitem__, key=f"exam_q{i}")
+            st.form_submit_button("SUBMIT EXAM", type="primary", on_click=on_submit_exam)
+        return
+
+    summary, by_sector, missed = st.session_state.exam_result
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Score", f"{summary['score']:.0%}")
+    col2.metric("Correct", f"{summary['correct']} / {summary['questions']}")
+    col3.metric("Time Used", f"{int(summary['seconds'] // 60)} min")
+    if summary["overtime"]:
+        st.warning("Submitted after the time limit.")
+    st.dataframe(by_sector.style.format({"score": "{:.0%}"}))
+
+    if len(missed):
+        st.subheader(f"Review ({len(missed)} missed)")
+    for row in missed.itertuples():
+        q = bank[int(row.qid)]
+        options = exam.options(bank, row.position)
+        picked = exam.answers[row.position]
+        with st.expander(f"{row.position + 1}. {q.question}"):
+            st.write(f"Your answer: {options[picked] if picked >= 0 else '(blank)'}")
+            st.write(f"**Correct:** {q.answer}")
+            st.info(f"**Market Insight:** {q.rationale}")
+
+    col_new, col_close = st.columns(2)
+    with col_new:
+        st.button("NEW EXAM", type="primary", on_click=on_start_exam)
+    with col_close:
+        st.button("CLOSE", on_click=on_close_exam)
+
+# --- TAB 6: ANALYTICS ---
+TREND_PERIODS = {"Hour": "h", "Day": "D", "Week": "W"}
+# A plain Vega-Lite spec: st.line_chart builds an Altair chart on every run, which costs far more than the data
+TREND_CHART = {
+    "mark": {"type": "line", "point": True},
+    "encoding": {
+        "x": {"field": "time", "type": "temporal", "title": None},
+        "y": {"field": "accuracy", "type": "quantitative", "axis": {"format": "%"}, "scale": {"domain": [0, 1]}},
+        "color": {"field": "category", "type": "nominal", "title": "Sector"},
+    },
+}
+
+@panel("analytics")
+def render_analytics():
+    st.header("Performance Analytics")
+    # Pre-aggregated (hour, sector) counters: one row per active hour, never a scan of every answer
+    cells = event_log.aggregates(st.session_state.player_id)
+    if cells.empty:
+        st.info("No answers logged yet. Every trade you close or lose is recorded here.")
+        return
+
+    totals = cells[["answers", "correct", "latency_sum", "timed", "assisted"]].sum()
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Answers Logged", f"{int(totals['answers']):,}")
+    col2.metric("Career Accuracy", f"{totals['correct'] / totals['answers']:.0%}")
+    col3.metric("Avg. Decision Time", f"{totals['latency_sum'] / totals['timed']:.1f}s" if totals["timed"] else "-")
+    col4.metric("Lifeline Assisted", f"{totals['assisted'] / totals['answers']:.0%}")
+
+    period = st.selectbox("Trend Resolution", list(TREND_PERIODS), index=1, key="analytics_period")
+    trend = cells.groupby([pd.Grouper(key="time", freq=TREND_PERIODS[period]), "category"])[["answers", "correct"]].sum()
+    trend = trend[trend["answers"] > 0]
+    st.vega_lite_chart((trend["correct"] / trend["answers"]).rename("accuracy").reset_index(), TREND_CHART,
+                       width="stretch")
+
+    sectors = cells.groupby("category")[["answers", "correct", "latency_sum", "timed", "assisted"]].sum()
+    st.dataframe(pd.DataFrame({
+        "answers": sectors["answers"].astype(int),
+        "accuracy": sectors["correct"] / sectors["answers"],
+        "avg seconds": sectors["latency_sum"] / sectors["timed"],
+        "assisted": sectors["assisted"] / sectors["answers"],
+    }).rename_axis("sector"), column_config={
+        "accuracy": st.column_config.NumberColumn(format="percent"),
+        "avg seconds": st.column_config.NumberColumn(format="%.1f"),
+        "assisted": st.column_config.NumberColumn(format="percent"),
+    })
+
+# --- TAB 7: LIVE ROOMS ---
+MARKDOWN_CHARS = re.compile(r"([\\`*_{}\[\]()#+\-.!|~:$])")
+
+def plain(text):
+    # Player-typed text as literal characters in st.markdown: no HTML, and no
+    # Markdown either (an image link would make every viewer fetch its URL)
+    return html.escape(MARKDOWN_CHARS.sub(r"\\\1", text))
+
+@st.cache_resource(max_entries=256, show_spinner=False)
+def room_standings(code, version, _snap):
+    # Built once per room version and shared by every member's session
+    return tuple((s.player_id, f"{rank}. ", plain(s.name), f" — ${s.points:,.0f} · {s.correct} correct")
+                 for rank, s in enumerate(_snap.standings, 1))
+
+def room_view(snap):
+    """This session's text for one room version: (above, below, options, locked).
+
+    Everything here only changes with the version, so render_room builds it
+    once per version and reuses it for the polls in between.
+    """
+    me = st.session_state.player_id
+    above = [f"## Live Trading Pit\n### Room {snap.code}\n"
+             f":gray[{snap.members} trader{'s' * (snap.members != 1)} · share the code to invite classmates]"]
+    below, options, locked = [], (), False
+    if snap.phase in ("lobby", "final"):
+        if snap.phase == "final":
+            above.append("#### 🏁 Final Standings")
+        if snap.host != me:
+            above.append(":gray[Waiting for the host to start the match.]")
+    elif snap.round:
+        q = bank[snap.qid]
+        mine = next((r for r in snap.results if r.player_id == me), None)
+        above.append(f"**ROUND {snap.round}/{snap.rounds} · SECTOR: {q.category.upper()}**\n### {q.question}")
+        if snap.phase == "open":
+            options, locked = q.options, mine is not None
+            if locked:
+                below.append(f":gray[Locked in after {mine.seconds:.1f}s · {snap.answered}/{snap.members} in]")
+        else:
+            if mine is None:
+                verdict = f'<div class="error-msg">⏱ Time ran out. The winning move was: <strong>{q.answer}</strong></div>'
+            elif mine.correct:
+                verdict = f'<div class="success-msg">✅ Correct in {mine.seconds:.1f}s</div>'
+            else:
+                verdict = f'<div class="error-msg">❌ The winning move was: <strong>{q.answer}</strong></div>'
+            below.append(verdict)
+            fastest = next((r for r in snap.results if r.correct), None)
+            if fastest is not None:
+                # The name stays outside :gray[...], where a "]" would end the directive
+                below.append(f":gray[⚡ Fastest:] {plain(fastest.name)} :gray[in {fastest.seconds:.1f}s]")
+    below.append("\n".join(f"{rank}**{name} (you)**{tail}" if player_id == me else f"{rank}{name}{tail}"
+                           for player_id, rank, name, tail in room_standings(snap.code, snap.version, snap)))
+    return "\n\n".join(above), "\n\n".join(below), options, locked
+
+def room_clock(snap):
+    # The only text that moves between versions
+    left = max(snap.next_at - time.time(), 0.0)
+    if snap.phase == "open":
+        return f"⏱ {left:.0f}s left"
+    if snap.phase == "reveal" and snap.round == 0:
+        return f"⏱ Round 1 of {snap.rounds} starts in {left:.0f}s"
+    if snap.phase == "reveal":
+        return f"⏱ {'Final standings' if snap.round >= snap.rounds else 'Next question'} in {left:.0f}s"
+    return None
+
+# Polls only while in a room. Every poll reads the room's shared snapshot
+# without a lock; it is rebuilt once per change, not once per client. A
+# fragment rerun has to redraw all of its elements, so the panel keeps them
+# few: the text is built once per version seen (room_seen) and polls that
+# find the same version only work out the countdown.
+@panel("room", run_every=settings.ROOM_POLL_SECONDS if st.session_state.room is not None else None)
+def render_room():
+    room = rooms.get(st.session_state.room)
+    if room is None or st.session_state.player_id not in room.members:
+        st.header("Live Trading Pit")
+        st.write("Race classmates on the same questions at the same moment. Correct answers pay what the "
+                 "Trading Floor pays; ties go to the faster trader.")
+        if st.session_state.room is not None:
+            st.warning("Your room has closed.")
+            st.session_state.room = None
+        st.text_input("Display Name", key="room_name", max_chars=24)
+        col_open, col_code, col_join = st.columns([2, 1, 1])
+        with col_open:
+            st.button("OPEN A ROOM", type="primary", on_click=on_create_room)
+        with col_code:
+            st.text_input("Room Code", key="room_code", max_chars=4, label_visibility="collapsed",
+                          placeholder="CODE")
+        with col_join:
+            st.button("JOIN", on_click=on_join_room)
+        show_notice("room")
+        return
+
+    room.advance()
+    snap = room.snapshot()
+    if st.session_state.room_seen != (snap.code, snap.version):
+        st.session_state.room_seen = (snap.code, snap.version)
+        st.session_state.room_view = room_view(snap)
+    above, below, options, locked = st.session_state.room_view
+
+    st.markdown(above)
+    clock = room_clock(snap)
+    if clock is not None:
+        st.markdown(f"**{clock}**")
+    if options:
+        col_a, col_b = st.columns(2)
+        for i, option in enumerate(options):
+            with col_a if i % 2 == 0 else col_b:
+                st.button(option, key=f"room_opt{i}", disabled=locked, on_click=on_room_answer, args=(option,))
+    elif snap.phase in ("lobby", "final") and snap.host == st.session_state.player_id:
+        st.button("START MATCH" if snap.phase == "lobby" else "REMATCH", type="primary", on_click=on_start_match)
+    st.markdown(below, unsafe_allow_html=True)
+    st.button("LEAVE", on_click=on_leave_room)
+
+# Tabs for navigation, with the panels each one shows
+TABS = {
+    "⚡ TRADING FLOOR (Quiz)": ["trading_floor"],
+    "🏢 REAL ESTATE": ["real_estate"],
+    "🤝 HEADHUNTER": ["headhunter"],
+    "📚 STUDY": ["study"],
+    "📝 PRACTICE EXAM": ["exam_timer", "exam"],
+    "📈 ANALYTICS": ["analytics"],
+    "🏟️ LIVE ROOMS": ["room"],
+}
+
+def on_tab():
+    # Opening a tab reruns only its panels, so panels that clicks elsewhere
+    # leave alone (Analytics after an answer) are current when shown
+    rerun(TABS[st.session_state.tab])
+
+tab1, tab2, tab3, tab4, tab5, tab6, tab7 = st.tabs(list(TABS), key="tab", on_change=on_tab)
+with tab1:
+    render_trading_floor()
+with tab2:
+    render_real_estate()
+with tab3:
+    render_headhunter()
+with tab4:
+    render_study()
+with tab5:
+    render_exam_timer()
+    render_exam()
+with tab6:
+    render_analytics()
+with tab7:
+    render_room()
+
+# --- PROFILE (opt-in) ---
+@st.fragment
+def render_profile():
+    # Not a panel: drawn after the run's profile has stopped, so it never measures itself
+    runs = st.session_state.profile_runs
+    with st.expander(f"⏱️ PROFILE · slowest sections over the last {len(runs)} runs", expanded=True):
+        run_seconds = sum(seconds for _, seconds, _ in runs) or 1.0
+        st.dataframe(pd.DataFrame([
+            {"section": name, "runs": n, "total ms": total * 1000, "mean ms": mean * 1000, "max ms": peak * 1000,
+             "share": total / run_seconds}
+            for name, n, total, mean, peak in profiling.slowest_sections(runs)
+        ]), column_config={
+            "total ms": st.column_config.NumberColumn(format="%.1f"),
+            "mean ms": st.column_config.NumberColumn(format="%.2f"),
+            "max ms": st.column_config.NumberColumn(format="%.2f"),
+            "share": st.column_config.NumberColumn(format="percent"),
+        }, hide_index=True)
+        if profile_mode == "stacks":
+            st.caption(f"Collapsed stacks of the last {settings.PROFILE_RUNS} runs (flamegraph.pl, speedscope): "
+                       f"{st.session_state.profile_dir}")
+        st.button("REFRESH", key="profile_refresh")
+
+record_run("app", time.perf_counter() - run_started)
+if profile_mode:
+    record_profile(profiling.finish())
+    render_profile()
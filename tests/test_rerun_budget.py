@@ -0,0 +1,17 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_every_interaction_stays_within_its_rerun_scope(tmp_path):
+    # Its own process: settings are read on import and the app's resources
+    # are cached per process, so the temp paths must be set before either
+    env = dict(os.environ, DECA_DB_PATH=str(tmp_path / "players.db"), DECA_EVENTS_DIR=str(tmp_path / "events"),
+               DECA_ASSET_DIR=str(tmp_path / "assets"), DECA_OFFLINE="1")
+    code = "import sys; from tools.rerun_budget import main; sys.exit(main())"
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True,
+                            timeout=600)
+    assert result.returncode == 0, result.stdout[-4000:] + result.stderr[-4000:]
+    assert (tmp_path / "players.db").exists()
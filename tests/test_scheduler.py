@@ -0,0 +1,35 @@
+import random
+
+from game_data import questions_db
+from question_bank import QuestionBank
+from scheduler import LeitnerScheduler
+
+
+def play(scheduler, bank, category, draws, accuracy, rng):
+    served = []
+    for _ in range(draws):
+        qid = scheduler.draw(category, rng)
+        served.append(qid)
+        scheduler.record(qid, rng.random() < accuracy)
+        assert bank[qid].category == category or category == "All"
+    return served
+
+
+def test_no_back_to_back_repeat_after_a_miss():
+    bank = QuestionBank(questions_db)
+    rng = random.Random(7)
+    for category in ("All",) + bank.categories:
+        # Long enough to introduce every question, then live on reviews alone
+        scheduler = LeitnerScheduler(bank, rng=rng)
+        served = play(scheduler, bank, category, 20 * len(bank.ids(category)), 0.5, rng)
+        repeats = [(i, a) for i, (a, b) in enumerate(zip(served, served[1:])) if a == b]
+        assert not repeats, f"{category}: served twice in a row at draw {repeats[0][0]}"
+
+
+def test_unknown_category_does_not_tick():
+    bank = QuestionBank(questions_db)
+    scheduler = LeitnerScheduler(bank, rng=random.Random(1))
+    assert scheduler.draw("No Such Sector") is None
+    assert scheduler.tick == 0
+    scheduler.draw("All")
+    assert scheduler.tick == 1
@@ -0,0 +1,63 @@
+import random
+
+from engine import GameEngine
+from game_data import questions_db
+from question_bank import QuestionBank
+from sessions import SessionPool
+
+
+def big_bank(copies=40):
+    # The built-in questions repeated, so IDs run far past the built-in bank's
+    return QuestionBank([dict(rec, question=f"{rec['question']} ({i})")
+                         for i in range(copies) for rec in questions_db])
+
+
+def spaced_player(engine):
+    player = engine.new_player()
+    engine.set_mode(player, "spaced")
+    rng = random.Random(1)
+    for _ in range(200):
+        q = engine.new_question(player)
+        engine.check_answer(player, q.answer if rng.random() < 0.7 else q.options[0])
+    engine.new_question(player)
+    player.balance = 12_345
+    return player
+
+
+def test_offloaded_player_from_another_bank_is_restored_instead(tmp_path):
+    path = str(tmp_path / "players.db")
+    old = GameEngine(big_bank(), rng=random.Random(1))
+    pool = SessionPool(old, path, sweep_interval=3600)
+    pool.get("p1", lambda _: spaced_player(old))
+    pool.close()  # Offloads p1, packed against the big bank
+
+    new = GameEngine(QuestionBank(questions_db), rng=random.Random(1))
+    assert new.unpack(old.pack(spaced_player(old))) is None
+    restored = []
+    pool = SessionPool(new, path, sweep_interval=3600)
+    try:
+        player = pool.get("p1", lambda pid: restored.append(pid) or new.new_player())
+        assert restored == ["p1"]
+        assert player.balance == 0
+        new.set_mode(player, "spaced")
+        q = new.new_question(player)
+        new.check_answer(player, q.answer)
+        assert new.question(player) is q
+    finally:
+        pool.close()
+
+
+def test_offloaded_player_round_trips_on_the_same_bank(tmp_path):
+    engine = GameEngine(QuestionBank(questions_db), rng=random.Random(1))
+    pool = SessionPool(engine, str(tmp_path / "players.db"), sweep_interval=3600)
+    pool.get("p1", lambda _: spaced_player(engine))
+    pool.close()
+
+    pool = SessionPool(engine, str(tmp_path / "players.db"), sweep_interval=3600)
+    try:
+        player = pool.get("p1")
+        assert player.balance == 12_345
+        assert player.mode == "spaced"
+        assert engine.question(player) is not None
+    finally:
+        pool.close()
@@ -0,0 +1,151 @@
+"""Throughput and memory benchmarks for the headless GameEngine.
+
+Plays millions of simulated answers across a pool of players and reports
+operations per second for each hot path plus memory per player. Use
+--bank-size to see how the numbers move as the question bank grows.
+
+Run from the repo root:
+
+    python -m tools.bench_engine
+    python -m tools.bench_engine --answers 5000000 --players 5000 --bank-size 20000
+    python -m tools.bench_engine --mode spaced --bank-size 20000
+    python -m tools.bench_engine --bank deca_bank.db   # a compiled bank (tools/import_questions.py)
+"""
+import argparse
+import json
+import random
+import sys
+import time
+import tracemalloc
+
+from engine import MODES, GameEngine
+from game_data import office_tiers, questions_db, talent_roster
+from question_bank import CompiledBank, QuestionBank
+
+
+def synthetic_records(size):
+    # The real bank, repeated with unique question text until it has `size` items
+    records = []
+    for i in range(size):
+        rec = dict(questions_db[i % len(questions_db)])
+        rec["question"] = f"{rec['question']} [{i}]"
+        records.append(rec)
+    return records
+
+
+def pick(q, rng, accuracy):
+    if rng.random() < accuracy:
+        return q.answer
+    return q.options[0] if q.options[0] != q.answer else q.options[1]
+
+
+def bench(name, n, fn):
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    return {"name": name, "ops": n, "seconds": elapsed, "ops_per_sec": n / elapsed}
+
+
+def run(args):
+    if args.bank:
+        bank = CompiledBank(args.bank)
+    else:
+        bank = QuestionBank(questions_db if args.bank_size is None else synthetic_records(args.bank_size))
+    rng = random.Random(args.seed)
+    engine = GameEngine(bank, rng=random.Random(args.seed))
+
+    # Memory per player, including its sampler and performance windows
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    players = [engine.new_player() for _ in range(args.players)]
+    for player in players:
+        engine.set_mode(player, args.mode)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    fresh_bytes = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+
+    results = []
+
+    def answers():
+        n_players = len(players)
+        for i in range(args.answers):
+            player = players[i % n_players]
+            q = engine.new_question(player)
+            engine.check_answer(player, pick(q, rng, args.accuracy))
+
+    results.append(bench("new_question + check_answer", args.answers, answers))
+
+    n_small = max(args.answers // 10, 1)
+    earnings = [rng.randrange(0, 20_000_000) for _ in range(1024)]
+
+    def titles():
+        for i in range(n_small):
+            engine.get_title(earnings[i & 1023])
+
+    results.append(bench("get_title", n_small, titles))
+
+    offices = list(office_tiers)
+    roles = list(talent_roster)
+
+    def shop():
+        for i in range(n_small):
+            player = players[i % len(players)]
+            if i & 1:
+                engine.buy_office(player, offices[i % len(offices)])
+            else:
+                engine.hire(player, roles[i % len(roles)])
+
+    results.append(bench("buy_office / hire", n_small, shop))
+
+    def lifelines():
+        for i in range(n_small):
+            player = players[i % len(players)]
+            if player.phase != "question":
+                engine.new_question(player)
+            engine.use_quant(player)
+
+    results.append(bench("use_quant", n_small, lifelines))
+
+    def snapshots():
+        for i in range(n_small):
+            engine.snapshot(players[i % len(players)])
+
+    results.append(bench("snapshot", n_small, snapshots))
+
+    return {
+        "bank_size": len(bank),
+        "players": args.players,
+        "accuracy": args.accuracy,
+        "mode": args.mode,
+        "bytes_per_player": fresh_bytes / args.players,
+        "results": results,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--answers", type=int, default=2_000_000)
+    parser.add_argument("--players", type=int, default=1000)
+    parser.add_argument("--accuracy", type=float, default=0.8)
+    parser.add_argument("--mode", choices=MODES, default="adaptive", help="how new_question picks")
+    parser.add_argument("--bank-size", type=int, default=None, help="synthesize a bank of this size")
+    parser.add_argument("--bank", help="benchmark a compiled bank file instead")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args(argv)
+
+    report = run(args)
+    print(f"bank: {report['bank_size']} questions, {report['players']} players, "
+          f"accuracy {report['accuracy']:.0%}, {report['mode']} mode")
+    print(f"memory per fresh player: {report['bytes_per_player'] / 1024:.1f} KiB")
+    for r in report["results"]:
+        print(f"{r['name']:<30} {r['ops_per_sec']:>12,.0f} ops/s  ({r['ops']:,} ops in {r['seconds']:.2f}s)")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
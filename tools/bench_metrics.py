@@ -0,0 +1,134 @@
+"""Cost of collecting runtime metrics.
+
+Times the metric calls one rerun makes (run-time observations, the st.rerun
+counter, engine counters), the sampled session-state measurement amortized
+over DECA_METRICS_STATE_EVERY runs, and engine throughput with and without
+metrics attached. Rendering the exposition formats is timed too, though it
+is paid per scrape, not per rerun.
+
+Run from the repo root:
+
+    python -m tools.bench_metrics
+    python -m tools.bench_metrics --iterations 500000
+"""
+import argparse
+import random
+import sys
+import time
+
+import settings
+from engine import GameEngine
+from game_data import questions_db
+from metrics import AppMetrics, deep_sizeof
+from question_bank import Question, QuestionBank
+from sessions import player_sizeof
+
+FULL_RUN = ("sidebar_metrics", "trading_floor", "real_estate", "headhunter", "app")
+ANSWER_CLICK = ("trading_floor", "sidebar_metrics")
+
+
+def per_op(n, fn):
+    start = time.perf_counter()
+    fn(n)
+    return (time.perf_counter() - start) / n
+
+
+def session_state():
+    # Roughly what st.session_state holds after a few minutes of play (the
+    # player itself lives in the session pool and is measured separately)
+    return {
+        "runs": {scope: [40, 0.25] for scope in FULL_RUN},
+        "player_id": "0" * 32,
+        "notice": None,
+        "category": "All",
+        "mode": "adaptive",
+        "exam": None,
+        "exam_result": None,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=200_000)
+    parser.add_argument("--answers", type=int, default=200_000, help="engine answers per throughput run")
+    args = parser.parse_args(argv)
+    n = args.iterations
+
+    metrics = AppMetrics()
+    bank = QuestionBank(questions_db)
+    engine = GameEngine(bank, rng=random.Random(1), metrics=metrics)
+
+    def observe(k):
+        for _ in range(k):
+            metrics.run_seconds.observe(0.004, "trading_floor")
+
+    def count(k):
+        for _ in range(k):
+            metrics.reruns.inc("fragment")
+
+    def answer_click(k):
+        # What an answer click records: two fragment runs, one rerun, one answer
+        for _ in range(k):
+            metrics.reruns.inc("fragment")
+            metrics.answers.inc("Correct")
+            for scope in ANSWER_CLICK:
+                metrics.run_seconds.observe(0.004, scope)
+
+    def full_run(k):
+        for _ in range(k):
+            for scope in FULL_RUN:
+                metrics.run_seconds.observe(0.02, scope)
+
+    state = session_state()
+    shared = [bank, engine]
+    player = engine.new_player()
+    rng = random.Random(3)
+    for _ in range(200):
+        q = engine.new_question(player)
+        engine.check_answer(player, q.answer if rng.random() < 0.8 else q.options[0])
+
+    def measure():
+        # What record_state_size observes
+        return deep_sizeof(state, shared, Question) + player_sizeof(engine, player)
+
+    def state_size(k):
+        for _ in range(k):
+            metrics.session_state_bytes.observe(measure())
+
+    print(f"{'histogram observe':<34} {per_op(n, observe) * 1e6:8.3f} us")
+    print(f"{'counter inc':<34} {per_op(n, count) * 1e6:8.3f} us")
+    click = per_op(n, answer_click)
+    print(f"{'answer click (fragment reruns)':<34} {click * 1e6:8.3f} us")
+    full = per_op(n, full_run)
+    print(f"{'full app run (5 scopes)':<34} {full * 1e6:8.3f} us")
+    sample = per_op(max(n // 100, 1), state_size)
+    every = settings.METRICS_STATE_EVERY
+    print(f"{'session state size (one sample)':<34} {sample * 1e6:8.3f} us  "
+          f"({measure():,} bytes)")
+    print(f"{f'  amortized over {every} runs':<34} {sample / every * 1e6:8.3f} us")
+    print(f"{'=> per rerun, worst case':<34} {(max(click, full) + sample / every) * 1e6:8.3f} us")
+
+    def render(k):
+        for _ in range(k):
+            metrics.render_prometheus()
+
+    print(f"{'render Prometheus text (scrape)':<34} {per_op(max(n // 1000, 1), render) * 1e6:8.1f} us")
+
+    def throughput(with_metrics):
+        eng = GameEngine(bank, rng=random.Random(1), metrics=AppMetrics() if with_metrics else None)
+        player = eng.new_player()
+        rng = random.Random(2)
+        start = time.perf_counter()
+        for _ in range(args.answers):
+            q = eng.new_question(player)
+            eng.check_answer(player, q.answer if rng.random() < 0.8 else q.options[0])
+        return args.answers / (time.perf_counter() - start)
+
+    plain, counted = throughput(False), throughput(True)
+    print(f"\nengine answers/s without metrics {plain:,.0f}, with {counted:,.0f} "
+          f"({(counted - plain) / plain:+.1%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
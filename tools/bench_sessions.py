@@ -0,0 +1,164 @@
+"""Memory per session, live and offloaded, at classroom-server scale.
+
+Plays N sessions (10,000 by default) through the engine the way the load
+test's "steady" profile does (answers, a hire, an office, a Quant lifeline on
+a question left open) and measures with tracemalloc:
+
+* live: bytes per player held in memory, what every open tab costs until
+  its player is offloaded;
+* offloaded: bytes per player still in memory after the session pool has
+  offloaded them all as idle, and the size of their packed rows on disk.
+
+Also times, untraced, one offload (pack), one load back (unpack) and the
+sweep's size measurement per player.
+
+Run from the repo root:
+
+    python -m tools.bench_sessions
+    python -m tools.bench_sessions --sessions 2000 --bank deca_bank.db
+    python -m tools.bench_sessions --out before.json
+    python -m tools.bench_sessions --out after.json --compare before.json
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from engine import GameEngine
+from game_data import office_tiers, questions_db
+from question_bank import CompiledBank, QuestionBank
+from sessions import SessionPool
+from tools.load_test import git_commit
+
+
+def play(engine, rng, answers):
+    player = engine.new_player()
+    player.balance = 1_000_000  # Enough for the shop, as the load test's bankroll
+    for i in range(answers):
+        q = engine.new_question(player)
+        engine.check_answer(player, q.answer if rng.random() < 0.85 else next(o for o in q.options if o != q.answer))
+        if i == answers // 2:
+            engine.hire(player, "The Quant")
+            engine.buy_office(player, list(office_tiers)[1])
+    engine.new_question(player)
+    engine.use_quant(player)
+    return player
+
+
+def traced():
+    gc.collect()
+    return tracemalloc.get_traced_memory()[0]
+
+
+def run(args):
+    bank = CompiledBank(args.bank) if args.bank else QuestionBank(questions_db)
+    engine = GameEngine(bank, rng=random.Random(args.seed))
+    rng = random.Random(args.seed)
+    n = args.sessions
+    scratch = tempfile.mkdtemp(prefix="deca-sessions-")
+
+    # --- Timings, untraced: pack, unpack and the pool's sizing pass ---
+    sample = [play(engine, rng, args.answers) for _ in range(min(n, 1000))]
+    start = time.perf_counter()
+    packed = [engine.pack(player) for player in sample]
+    pack_us = (time.perf_counter() - start) / len(sample) * 1e6
+    start = time.perf_counter()
+    for data in packed:
+        engine.unpack(data)
+    unpack_us = (time.perf_counter() - start) / len(sample) * 1e6
+    pool = SessionPool(engine, os.path.join(scratch, "timing.db"), sweep_interval=3600.0)
+    for i, player in enumerate(sample):
+        pool.get(str(i), lambda _, player=player: player)
+    start = time.perf_counter()
+    pool.sweep()  # Nobody is idle yet: this only measures everyone
+    sizing_us = (time.perf_counter() - start) / len(sample) * 1e6
+    pool.close()
+    del sample, packed, pool
+
+    # --- Memory: every player live, then all offloaded ---
+    tracemalloc.start()
+    base = traced()
+    players = [play(engine, rng, args.answers) for _ in range(n)]
+    live = (traced() - base) / n
+
+    path = os.path.join(scratch, "players.db")
+    pool = SessionPool(engine, path, idle_seconds=0.0, sweep_interval=3600.0)
+    for i, player in enumerate(players):
+        pool.get(f"{i:032x}", lambda _, player=player: player)
+    del players
+    offloaded = pool.sweep()
+    resident = (traced() - base) / n
+    tracemalloc.stop()
+    with sqlite3.connect(path) as conn:
+        disk = conn.execute("SELECT COALESCE(SUM(LENGTH(state)), 0) FROM offloaded_players").fetchone()[0]
+    pool.close()
+
+    return {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": vars(args),
+        "bank_questions": len(bank),
+        "sessions": n,
+        "live_bytes_per_session": live,
+        "offloaded": offloaded,
+        "resident_bytes_per_offloaded_session": resident,
+        "disk_bytes_per_offloaded_session": disk / n,
+        "pack_us": pack_us,
+        "unpack_us": unpack_us,
+        "sizing_us": sizing_us,
+    }
+
+
+def show(report, baseline=None):
+    def delta(key):
+        old = (baseline or {}).get(key)
+        new = report.get(key)
+        if not old or new is None:
+            return ""
+        return f"  ({(new - old) / old:+.0%} vs {baseline.get('commit') or 'baseline'})"
+
+    print(f"{report['sessions']:,} sessions on a {report['bank_questions']:,}-question bank "
+          f"(commit {report['commit'] or '?'})")
+    print(f"live:        {report['live_bytes_per_session']:>10,.0f} B/session (tracemalloc)"
+          f"{delta('live_bytes_per_session')}")
+    print(f"offloaded:   {report['resident_bytes_per_offloaded_session']:>10,.0f} B/session left in memory"
+          f"{delta('resident_bytes_per_offloaded_session')}")
+    print(f"             {report['disk_bytes_per_offloaded_session']:>10,.0f} B/session on disk"
+          f"{delta('disk_bytes_per_offloaded_session')}")
+    print(f"per player: pack {report['pack_us']:.1f} us, unpack {report['unpack_us']:.1f} us, "
+          f"sized by a sweep {report['sizing_us']:.1f} us")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=10_000)
+    parser.add_argument("--answers", type=int, default=30, help="questions answered per session")
+    parser.add_argument("--bank", help="compiled bank file (default: the built-in questions)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", default=None, help="results JSON (default .cache/bench_sessions/<commit>.json)")
+    parser.add_argument("--compare", help="previous results JSON to diff against")
+    args = parser.parse_args(argv)
+
+    report = run(args)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    show(report, baseline)
+
+    out = args.out or os.path.join(".cache", "bench_sessions", f"{report['commit'] or 'results'}.json")
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nresults written to {out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
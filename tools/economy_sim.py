@@ -0,0 +1,241 @@
+"""Vectorized Monte Carlo simulator for economy and demotion tuning.
+
+Plays whole populations of players at once with NumPy: every array holds
+one entry per simulated player, and each step of the loop is one answer for
+all of them. The rules come from the same tables the app uses (game_data's
+payout, title ladder, demotion floors, office tiers and talent roster, and
+the settings window/threshold), so tuning those tables here tunes the game.
+
+For each combination of the parameter grid and each accuracy profile it
+reports:
+  - demotion probability within the horizon, and demotions per 1000 answers
+  - answers needed to first reach each title (median, and share that got there)
+  - answers until each office tier / hire is first affordable, saving everything
+
+Run from the repo root:
+
+    python -m tools.economy_sim
+    python -m tools.economy_sim --accuracy 0.65,0.75,0.85 --payout 5000,10000,20000 \\
+        --threshold 0.6,0.7 --window 10,20,30 --players 20000 --answers 2000
+    python -m tools.economy_sim --validate   # cross-check against GameEngine
+"""
+import argparse
+import itertools
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+import game_data
+import settings
+
+
+def parse_list(cast):
+    return lambda text: [cast(v) for v in text.split(",") if v]
+
+
+def shop_items():
+    # Every purchasable upgrade, cheapest first (the free starting office is skipped)
+    items = [(f"office: {name}", data["cost"]) for name, data in game_data.office_tiers.items() if data["cost"] > 0]
+    items += [(f"hire: {role}", data["cost"]) for role, data in game_data.talent_roster.items()]
+    return sorted(items, key=lambda item: item[1])
+
+
+def demotion_reset(lifetime):
+    # game_data.demotion_floors, vectorized: first matching floor wins, else 0
+    conditions = [lifetime > above for above, _ in game_data.demotion_floors]
+    choices = [reset_to for _, reset_to in game_data.demotion_floors]
+    return np.select(conditions, choices, default=0).astype(lifetime.dtype)
+
+
+def simulate(accuracy, payout, threshold, window, answers, rng, concentration=None):
+    """Play len(accuracy) players for `answers` steps with one shared rule set.
+
+    `accuracy` is each player's probability of answering correctly. Returns
+    per-player arrays: first step each title was reached (-1 if never), first
+    step each shop item was affordable (-1 if never) and demotion counts.
+    """
+    n = len(accuracy)
+    if concentration:
+        # Spread players around their profile's mean accuracy
+        a = accuracy * concentration
+        accuracy = rng.beta(a, concentration - a)
+    accuracy = accuracy.astype(np.float32)
+
+    title_floors = np.array([floor for floor, _ in game_data.title_ladder], dtype=np.int64)
+    item_costs = np.array([cost for _, cost in shop_items()], dtype=np.int64)
+    # The engine demotes when correct / window < threshold; counting the
+    # qualifying counts up front avoids float surprises like 20 * 0.7 > 14
+    demotion_count = sum(c / window < threshold for c in range(window + 1))
+
+    balance = np.zeros(n, dtype=np.int64)
+    lifetime = np.zeros(n, dtype=np.int64)
+    ring = np.zeros((window, n), dtype=np.bool_)  # One contiguous row per window slot
+    correct_in_window = np.zeros(n, dtype=np.int32)
+    filled = np.zeros(n, dtype=np.int32)
+    demotions = np.zeros(n, dtype=np.int32)
+
+    title_step = np.full((n, len(title_floors)), -1, dtype=np.int32)
+    title_step[:, 0] = 0  # Everyone starts with the first title
+    next_title = np.ones(n, dtype=np.int64)
+    item_step = np.full((n, len(item_costs)), -1, dtype=np.int32)
+    next_item = np.zeros(n, dtype=np.int64)
+
+    chunk = 256
+    for start in range(0, answers, chunk):
+        draws = rng.random((min(chunk, answers - start), n), dtype=np.float32)
+        for offset, u in enumerate(draws):
+            step = start + offset + 1
+            correct = u < accuracy
+
+            earned = correct * payout
+            balance += earned
+            lifetime += earned
+
+            # Rolling window: the slot being overwritten is the oldest answer
+            pos = (step - 1) % window
+            correct_in_window += correct
+            correct_in_window -= ring[pos]
+            ring[pos] = correct
+            np.minimum(filled + 1, window, out=filled)
+
+            # Risk of Ruin
+            demoted = (filled == window) & (correct_in_window < demotion_count)
+            if demoted.any():
+                idx = np.flatnonzero(demoted)
+                lifetime[idx] = demotion_reset(lifetime[idx])
+                ring[:, idx] = False
+                correct_in_window[idx] = 0
+                filled[idx] = 0
+                demotions[idx] += 1
+
+            # Titles and affordability are "first time reached"; one step can
+            # cross at most one threshold per player unless payouts are huge
+            while True:
+                can = next_title < len(title_floors)
+                hit = can & (lifetime >= title_floors[np.minimum(next_title, len(title_floors) - 1)])
+                if not hit.any():
+                    break
+                idx = np.flatnonzero(hit)
+                title_step[idx, next_title[idx]] = step
+                next_title[idx] += 1
+            while True:
+                can = next_item < len(item_costs)
+                hit = can & (balance >= item_costs[np.minimum(next_item, len(item_costs) - 1)])
+                if not hit.any():
+                    break
+                idx = np.flatnonzero(hit)
+                item_step[idx, next_item[idx]] = step
+                next_item[idx] += 1
+
+    return {"title_step": title_step, "item_step": item_step, "demotions": demotions}
+
+
+def summarize(result, answers):
+    title_names = [title for _, title in game_data.title_ladder]
+    item_names = [name for name, _ in shop_items()]
+    demotions = result["demotions"]
+    row = {
+        "demotion_prob": float((demotions > 0).mean()),
+        "demotions_per_1k": float(demotions.mean() * 1000 / answers),
+    }
+    for label, steps, names in (("title", result["title_step"], title_names),
+                                ("afford", result["item_step"], item_names)):
+        reached = steps >= 0
+        for k, name in enumerate(names):
+            got = steps[reached[:, k], k]
+            row[f"{label}: {name}"] = float(np.median(got)) if len(got) else np.nan
+            row[f"{label}: {name} (share)"] = float(reached[:, k].mean())
+    return row
+
+
+def sweep(args):
+    rng = np.random.default_rng(args.seed)
+    records = []
+    for window, payout, threshold in itertools.product(args.window, args.payout, args.threshold):
+        # All profiles for one rule set are played as a single batch
+        accuracy = np.repeat(np.array(args.accuracy, dtype=np.float64), args.players)
+        result = simulate(accuracy, payout, threshold, window, args.answers, rng, args.concentration)
+        for i, profile in enumerate(args.accuracy):
+            part = slice(i * args.players, (i + 1) * args.players)
+            sliced = {key: value[part] for key, value in result.items()}
+            records.append({"window": window, "payout": payout, "threshold": threshold,
+                            "accuracy": profile, **summarize(sliced, args.answers)})
+    return pd.DataFrame.from_records(records)
+
+
+def validate(args):
+    # Same rules played one player at a time through the real engine
+    from engine import GameEngine
+    from question_bank import QuestionBank
+
+    import random
+
+    bank = QuestionBank(game_data.questions_db)
+    rows = []
+    for profile in args.accuracy:
+        rng = random.Random(args.seed)
+        engine = GameEngine(bank, payout=args.payout[0], window_size=args.window[0],
+                            demotion_threshold=args.threshold[0], rng=random.Random(args.seed))
+        demoted = 0
+        for _ in range(args.validate_players):
+            player = engine.new_player()
+            ever = False
+            for _ in range(args.answers):
+                q = engine.new_question(player)
+                pick = q.answer if rng.random() < profile else next(o for o in q.options if o != q.answer)
+                ever |= engine.check_answer(player, pick) == "Demoted"
+            demoted += ever
+        sim = simulate(np.full(args.validate_players * 20, profile), args.payout[0], args.threshold[0],
+                       args.window[0], args.answers, np.random.default_rng(args.seed))
+        rows.append({"accuracy": profile,
+                     "engine_demotion_prob": demoted / args.validate_players,
+                     "sim_demotion_prob": float((sim["demotions"] > 0).mean())})
+    return pd.DataFrame.from_records(rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--accuracy", type=parse_list(float), default=[0.6, 0.7, 0.8, 0.9],
+                        help="comma-separated accuracy profiles")
+    parser.add_argument("--payout", type=parse_list(int), default=[game_data.answer_payout])
+    parser.add_argument("--threshold", type=parse_list(float), default=[settings.DEMOTION_THRESHOLD])
+    parser.add_argument("--window", type=parse_list(int), default=[settings.WINDOW_SIZE])
+    parser.add_argument("--players", type=int, default=20000, help="players per profile and rule set")
+    parser.add_argument("--answers", type=int, default=2000, help="answers per player")
+    parser.add_argument("--concentration", type=float, default=None,
+                        help="spread players around each profile with Beta(mean, concentration)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--csv", help="also write the results table to this file")
+    parser.add_argument("--validate", action="store_true", help="cross-check demotion odds against GameEngine")
+    parser.add_argument("--validate-players", type=int, default=300)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    if args.validate:
+        table = validate(args)
+        print(table.to_string(index=False))
+        return 0
+
+    table = sweep(args)
+    elapsed = time.perf_counter() - start
+    games = len(table) * args.players
+    print(f"{games:,} games x {args.answers:,} answers in {elapsed:.1f}s")
+
+    pd.set_option("display.width", 200)
+    keys = ["window", "payout", "threshold", "accuracy"]
+    print(table[keys + ["demotion_prob", "demotions_per_1k"]].to_string(index=False))
+    for prefix in ("title: ", "afford: "):
+        cols = [c for c in table.columns if c.startswith(prefix) and not c.endswith("(share)")]
+        view = table[keys + cols].rename(columns=lambda c: c[len(prefix):] if c.startswith(prefix) else c)
+        print(f"\nMedian answers until first {prefix.strip(': ')} (NaN = nobody within the horizon):")
+        print(view.to_string(index=False))
+
+    if args.csv:
+        table.to_csv(args.csv, index=False)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,255 @@
+"""Import CSV/JSONL question banks into a compiled bank file.
+
+Streams every input record by record (memory stays flat however large the
+files are), validates each one, drops duplicates by content hash and
+compiles the survivors into a read-only SQLite file that
+``question_bank.CompiledBank`` pages in on demand. Point the app at it with
+DECA_BANK_PATH.
+
+A record must have a known category (game_data.categories plus any
+--allow-category), a question, at least two distinct options, an answer
+that is one of the options and a rationale. JSONL records use the same
+keys as game_data.questions_db. CSV files need category, question, answer
+and rationale columns, plus either an ``options`` column separated by "|"
+or one column per option (option_a, option_b, ...).
+
+Run from the repo root:
+
+    python -m tools.import_questions bank.csv extra.jsonl --out deca_bank.db
+    python -m tools.import_questions --builtin --out deca_bank.db   # the 50 built-in questions
+    python -m tools.import_questions big.csv --out bank.db --allow-category "Hospitality" --strict
+"""
+import argparse
+import csv
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import time
+
+import game_data
+from question_bank import OPTION_SEP
+
+SCHEMA_VERSION = "1"
+BATCH = 5000
+
+
+def read_jsonl(path):
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                yield line_no, json.loads(line)
+            except ValueError as exc:
+                yield line_no, exc
+
+
+def read_csv(path):
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        reader = csv.DictReader(f)
+        fields = [name.strip().lower() for name in reader.fieldnames or ()]
+        option_cols = [name for name in reader.fieldnames or ()
+                       if name.strip().lower().startswith("option") and name.strip().lower() != "options"]
+        for row in reader:
+            rec = {name.strip().lower(): value for name, value in row.items() if name is not None}
+            if "options" in fields and rec.get("options"):
+                rec["options"] = rec["options"].split("|")
+            else:
+                rec["options"] = [row[name] for name in option_cols if row.get(name)]
+            yield reader.line_num, rec
+
+
+def read_builtin():
+    for i, rec in enumerate(game_data.questions_db, 1):
+        yield i, rec
+
+
+def clean(value):
+    # Collapses whitespace, which includes the OPTION_SEP control character
+    return " ".join(str(value).split()) if value is not None else ""
+
+
+def validate(rec, known):
+    """Returns (category, question, options, answer_index, rationale) or an error string."""
+    if isinstance(rec, Exception):
+        return f"unreadable record ({rec})"
+    if not isinstance(rec, dict):
+        return "record is not an object"
+    category = clean(rec.get("category"))
+    question = clean(rec.get("question"))
+    answer = clean(rec.get("answer"))
+    rationale = clean(rec.get("rationale"))
+    options = rec.get("options")
+    if not category:
+        return "missing category"
+    if category not in known:
+        return f"unknown category {category!r}"
+    if not question:
+        return "missing question"
+    if not isinstance(options, (list, tuple)):
+        return "options must be a list"
+    options = [clean(opt) for opt in options]
+    options = [opt for opt in options if opt]
+    if len(options) < 2:
+        return "fewer than two options"
+    if len(set(options)) != len(options):
+        return "duplicate options"
+    if answer not in options:
+        return f"answer {answer!r} is not one of the options"
+    if not rationale:
+        return "missing rationale"
+    return category, question, tuple(options), options.index(answer), rationale
+
+
+def content_hash(category, question, options, answer):
+    # Same question with reordered options or different casing is a duplicate
+    parts = [category.casefold(), question.casefold(), answer.casefold()]
+    parts += sorted(opt.casefold() for opt in options)
+    return hashlib.sha1("\x1f".join(parts).encode()).digest()
+
+
+def compile_bank(sources, out, known, strict=False, max_errors=20):
+    tmp = f"{out}.tmp"
+    if os.path.exists(tmp):
+        os.remove(tmp)
+    conn = sqlite3.connect(tmp)
+    conn.execute("PRAGMA journal_mode=OFF")
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.execute("""
+        CREATE TABLE staging (
+            seq       INTEGER PRIMARY KEY,
+            hash      BLOB NOT NULL UNIQUE,
+            category  TEXT NOT NULL,
+            question  TEXT NOT NULL,
+            options   TEXT NOT NULL,
+            answer    INTEGER NOT NULL,
+            rationale TEXT NOT NULL
+        )
+    """)
+    stats = {"read": 0, "imported": 0, "duplicates": 0, "rejected": 0}
+    errors = []
+    seen_categories = []
+
+    def flush(batch):
+        before = conn.total_changes
+        conn.executemany("INSERT OR IGNORE INTO staging (hash, category, question, options, answer, rationale) "
+                         "VALUES (?, ?, ?, ?, ?, ?)", batch)
+        added = conn.total_changes - before
+        stats["imported"] += added
+        stats["duplicates"] += len(batch) - added
+        batch.clear()
+
+    # --- 1. Stream, validate, dedupe ---
+    batch = []
+    for name, records in sources:
+        for line_no, rec in records:
+            stats["read"] += 1
+            result = validate(rec, known)
+            if isinstance(result, str):
+                stats["rejected"] += 1
+                if len(errors) < max_errors:
+                    errors.append(f"{name}:{line_no}: {result}")
+                continue
+            category, question, options, answer, rationale = result
+            if category not in seen_categories:
+                seen_categories.append(category)
+            batch.append((content_hash(category, question, options, options[answer]), category, question,
+                          OPTION_SEP.join(options), answer, rationale))
+            if len(batch) >= BATCH:
+                flush(batch)
+    flush(batch)
+    conn.commit()
+
+    if (strict and stats["rejected"]) or not stats["imported"]:
+        conn.close()
+        os.remove(tmp)
+        return stats, errors, None
+
+    # --- 2. Compile: contiguous IDs per category, display order first ---
+    order = [c for c in known if c in seen_categories]
+    conn.executescript("""
+        CREATE TABLE categories (
+            id       INTEGER PRIMARY KEY,
+            name     TEXT NOT NULL UNIQUE,
+            first_id INTEGER NOT NULL,
+            count    INTEGER NOT NULL
+        );
+        CREATE TABLE questions (
+            id          INTEGER PRIMARY KEY,
+            category_id INTEGER NOT NULL,
+            question    TEXT NOT NULL,
+            options     TEXT NOT NULL,
+            answer      INTEGER NOT NULL,
+            rationale   TEXT NOT NULL,
+            hash        BLOB NOT NULL
+        );
+        CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+    """)
+    conn.executemany("INSERT INTO categories (id, name, first_id, count) VALUES (?, ?, 0, 0)",
+                     list(enumerate(order)))
+    conn.execute("""
+        INSERT INTO questions (id, category_id, question, options, answer, rationale, hash)
+        SELECT ROW_NUMBER() OVER (ORDER BY c.id, s.seq) - 1, c.id, s.question, s.options,
+               s.answer, s.rationale, s.hash
+        FROM staging s JOIN categories c ON c.name = s.category
+    """)
+    conn.execute("""
+        UPDATE categories SET
+            first_id = (SELECT MIN(id) FROM questions WHERE category_id = categories.id),
+            count = (SELECT COUNT(*) FROM questions WHERE category_id = categories.id)
+    """)
+    conn.execute("DROP TABLE staging")
+
+    # The fingerprint identifies the content, so caches keyed on it survive
+    # a rebuild of the same sources
+    digest = hashlib.sha1()
+    for (h,) in conn.execute("SELECT hash FROM questions ORDER BY id"):
+        digest.update(h)
+    meta = {"schema": SCHEMA_VERSION, "count": str(stats["imported"]), "fingerprint": digest.hexdigest(),
+            "sources": json.dumps([name for name, _ in sources]), "built_at": time.strftime("%Y-%m-%dT%H:%M:%S")}
+    conn.executemany("INSERT INTO meta (key, value) VALUES (?, ?)", meta.items())
+    conn.commit()
+    conn.execute("VACUUM")
+    conn.close()
+    os.replace(tmp, out)
+    return stats, errors, meta
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("inputs", nargs="*", help=".csv or .jsonl files")
+    parser.add_argument("--out", required=True, help="compiled bank to write")
+    parser.add_argument("--builtin", action="store_true", help="include the built-in game_data questions")
+    parser.add_argument("--allow-category", action="append", default=[], help="accept an extra category")
+    parser.add_argument("--strict", action="store_true", help="write nothing if any record is rejected")
+    args = parser.parse_args(argv)
+
+    sources = [("builtin", read_builtin())] if args.builtin else []
+    for path in args.inputs:
+        reader = read_csv if path.lower().endswith(".csv") else read_jsonl
+        sources.append((path, reader(path)))
+    if not sources:
+        parser.error("nothing to import: give input files or --builtin")
+
+    known = tuple(game_data.categories) + tuple(c for c in args.allow_category if c not in game_data.categories)
+    start = time.perf_counter()
+    stats, errors, meta = compile_bank(sources, args.out, known, strict=args.strict)
+    elapsed = time.perf_counter() - start
+
+    print(f"read {stats['read']:,} records in {elapsed:.1f}s: {stats['imported']:,} imported, "
+          f"{stats['duplicates']:,} duplicates, {stats['rejected']:,} rejected")
+    for error in errors:
+        print(f"  {error}")
+    if stats["rejected"] > len(errors):
+        print(f"  ... and {stats['rejected'] - len(errors):,} more")
+    if meta is None:
+        print("nothing written")
+        return 1
+    print(f"wrote {args.out} ({os.path.getsize(args.out) / 1024:,.0f} KiB, fingerprint {meta['fingerprint'][:12]})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,453 @@
+"""Concurrent-session load test for streamlit_app.py.
+
+Starts the app with ``streamlit run`` (headless, on a free port) and drives
+N simulated sessions against it over Streamlit's own websocket protocol,
+several at a time, the way a classroom's browsers share one server: the
+cache_resource singletons (bank, engine, player pool, leaderboard) are
+shared, each session has its own session state, and script runs from
+different sessions execute at the same time on the server's threads.
+
+Every session starts a deal, answers questions at its profile's accuracy,
+uses lifelines, hires and buys offices (clicks it can't afford get the
+app's notice, as a student's would) and, for the "struggling" profile, runs
+into a demotion. A client reads the screen from the elements the server
+sends: buttons by label or key, and the question from its heading, looked
+up in the same question bank for the answer.
+
+Reports p50/p95/p99 latency per click, from sending the click to the end of
+the run it triggered (what a browser waits: queueing on the server, the run
+and the transfer), the app's own run times per scope from its metrics
+(``deca_run_seconds``), throughput, and the server's resident memory per
+idle session. Everything runs offline: the player database, answer log and
+image cache go to a temp directory and no images are fetched.
+
+Run from the repo root:
+
+    python -m tools.load_test
+    python -m tools.load_test --sessions 200 --concurrency 32 --answers 40
+    python -m tools.load_test --out before.json
+    python -m tools.load_test --out after.json --compare before.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+import numpy as np
+import websockets
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+from tools.rerun_budget import APP
+
+PROFILES = {"steady": 0.85, "struggling": 0.40}
+LIFELINES = ("📉 Quant Algo", "🛡️ Hedge Position")
+
+
+def answer_key():
+    # Question -> answer, from the bank the server loads (resources.load_question_bank)
+    from game_data import questions_db
+    from question_bank import CompiledBank, QuestionBank
+
+    path = os.environ.get("DECA_BANK_PATH")
+    bank = CompiledBank(path) if path else QuestionBank(questions_db)
+    return {q.question: q.answer for q in map(bank.__getitem__, bank.ids())}
+
+
+class Client:
+    """One browser tab: a websocket session and the elements it has on screen."""
+
+    def __init__(self, url, query_string, timeout):
+        self.url = url
+        self.query_string = query_string
+        self.timeout = timeout
+        self.ws = None
+        self.script_hash = ""
+        self.buttons = {}  # widget id -> (label, key, fragment id, disabled)
+        self.headings = {}  # fragment id -> "### " markdown; the question on the trading floor
+
+    async def connect(self):
+        self.ws = await websockets.connect(self.url, subprotocols=["streamlit"], max_size=None)
+
+    async def close(self):
+        await self.ws.close()
+
+    async def run(self, widget_id=None, fragment_id=""):
+        # A rerun, or a click when widget_id is set; returns seconds to the end of its run
+        msg = BackMsg()
+        msg.rerun_script.query_string = self.query_string
+        msg.rerun_script.page_script_hash = self.script_hash
+        msg.rerun_script.fragment_id = fragment_id
+        if widget_id is not None:
+            state = msg.rerun_script.widget_states.widgets.add()
+            state.id = widget_id
+            state.trigger_value = True
+        start = time.perf_counter()
+        await self.ws.send(msg.SerializeToString())
+        await asyncio.wait_for(self._receive(), self.timeout)
+        return time.perf_counter() - start
+
+    async def _receive(self):
+        buttons, headings, fragments = {}, {}, set()
+        while True:
+            msg = ForwardMsg()
+            msg.ParseFromString(await self.ws.recv())
+            kind = msg.WhichOneof("type")
+            if kind == "new_session":
+                self.script_hash = msg.new_session.main_script_hash
+                buttons, headings, fragments = {}, {}, set()  # Each run sends its elements again
+            elif kind == "delta" and msg.delta.WhichOneof("type") == "new_element":
+                fragment = msg.delta.fragment_id
+                fragments.add(fragment)
+                element = msg.delta.new_element
+                kind = element.WhichOneof("type")
+                if kind == "button":
+                    button = element.button
+                    key = button.id.split("-", 2)[2]  # "$$ID-<hash>-<key>", "None" without one
+                    buttons[button.id] = (button.label, key, fragment, button.disabled)
+                elif kind == "markdown" and element.markdown.body.startswith("### "):
+                    headings[fragment] = element.markdown.body[4:]
+                elif kind == "exception":
+                    raise RuntimeError(element.exception.message)
+            elif kind == "script_finished" and msg.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                # A callback's st.rerun stops the first run early; this is the click's run
+                break
+        if msg.script_finished == ForwardMsg.FINISHED_FRAGMENT_RUN_SUCCESSFULLY:
+            # Only the fragments that ran were sent
+            self.buttons = {i: b for i, b in self.buttons.items() if b[2] not in fragments}
+            self.headings = {f: h for f, h in self.headings.items() if f not in fragments}
+        else:
+            self.buttons, self.headings = {}, {}
+        self.buttons.update(buttons)
+        self.headings.update(headings)
+
+    def find(self, label=None, key=None):
+        # Enabled buttons matching label and key, as (widget id, button)
+        return [(i, b) for i, b in self.buttons.items()
+                if (label is None or b[0] == label) and (key is None or b[1] == key) and not b[3]]
+
+    def question(self):
+        return next(iter(self.headings.values()), None)
+
+
+class Session:
+    """One simulated student clicking through the app."""
+
+    def __init__(self, index, profile, args, answers):
+        self.index = index
+        self.profile = profile
+        self.accuracy = PROFILES[profile]
+        self.rng = random.Random(args.seed * 100_003 + index)
+        self.args = args
+        self.answers = answers
+        self.samples = []  # (action, wall_seconds)
+        self.client = Client(args.url, f"player=load-{args.seed}-{index}", args.timeout)
+
+    async def open(self):
+        await self.client.connect()
+        self.samples.append(("open", await self.client.run()))
+
+    async def click(self, action, label=None, key=None):
+        found = self.client.find(label, key)
+        if not found:
+            raise LookupError(f"session {self.index}, {action}: no button {label or key!r} on screen")
+        widget_id, button = found[0]
+        try:
+            seconds = await self.client.run(widget_id, button[2])
+        except RuntimeError as exc:
+            raise RuntimeError(f"session {self.index}, {action}: {exc}") from None
+        self.samples.append((action, seconds))
+
+    def phase(self):
+        find = self.client.find
+        if find("BEGIN RECOVERY ->"):
+            return "demoted"
+        if find("INITIATE DEAL FLOW"):
+            return "idle"
+        if find("SOURCE NEXT DEAL ->") or find("RE-EVALUATE MARKET (Next) ->"):
+            return "answered"
+        return "question"
+
+    async def answer(self):
+        answer = self.answers[self.client.question()]
+        # Option buttons are keyed by their text; ones the Quant eliminated are disabled
+        wrong = [b[1] for _, b in self.client.find() if b[0] == b[1] and b[1] != answer]
+        pick = answer if self.rng.random() < self.accuracy or not wrong else self.rng.choice(wrong)
+        await self.click("answer", key=pick)
+        if self.phase() == "demoted":
+            self.samples[-1] = ("answer (demoted)", self.samples[-1][1])
+
+    async def next_deal(self):
+        if self.phase() == "demoted":
+            await self.click("recover", label="BEGIN RECOVERY ->")
+        elif self.client.find("SOURCE NEXT DEAL ->"):
+            await self.click("next deal", label="SOURCE NEXT DEAL ->")
+        else:
+            await self.click("next deal", label="RE-EVALUATE MARKET (Next) ->")
+
+    async def shop(self):
+        hires = [b[1] for _, b in self.client.find("HIRE")]
+        if hires and self.rng.random() < 0.5:
+            await self.click("hire", key=hires[0])
+            return
+        offices = [b[1] for _, b in self.client.find() if b[0].startswith("Acquire ")]
+        await self.click("buy office", key=self.rng.choice(offices))
+
+    async def play(self):
+        await self.open()
+        await self.click("start deal", label="INITIATE DEAL FLOW")
+        for step in range(self.args.answers):
+            if self.rng.random() < self.args.lifeline_rate:
+                owned = [label for label in LIFELINES if self.client.find(label)]
+                if owned:
+                    label = self.rng.choice(owned)
+                    await self.click("quant lifeline" if label == LIFELINES[0] else "hedge lifeline", label=label)
+                    if self.phase() != "question" or label == LIFELINES[1]:
+                        continue
+            await self.answer()
+            if step % self.args.shop_every == self.args.shop_every - 1:
+                await self.shop()
+            await self.next_deal()
+            await asyncio.sleep(self.args.think_time * self.rng.random())
+
+
+def percentiles(values):
+    arr = np.asarray(values, dtype=np.float64) * 1000
+    if not len(arr):
+        return {}
+    p50, p95, p99 = np.percentile(arr, [50, 95, 99])
+    return {"count": int(len(arr)), "p50_ms": p50, "p95_ms": p95, "p99_ms": p99,
+            "mean_ms": float(arr.mean()), "max_ms": float(arr.max())}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port, metrics_port, timeout):
+    # The app with its metrics exporter on, so in-app run times can be scraped
+    env = dict(os.environ, DECA_METRICS="1", DECA_METRICS_PORT=str(metrics_port), DECA_METRICS_HOST="127.0.0.1")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", APP, "--server.headless", "true", "--server.address",
+         "127.0.0.1", "--server.port", str(port), "--browser.gatherUsageStats", "false"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"streamlit exited: {server.stderr.read().decode(errors='replace')[-2000:]}")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1):
+                return server
+        except OSError:
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError(f"streamlit did not come up on port {port} in {timeout:.0f}s")
+
+
+def resident_bytes(pid):
+    # Linux only; None elsewhere
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def app_runs(metrics_port):
+    # Per scope from the app's histogram: count, mean and the bucket bound holding p95
+    with urllib.request.urlopen(f"http://127.0.0.1:{metrics_port}/metrics.json", timeout=5) as response:
+        series = json.load(response)["deca_run_seconds"]["series"]
+    runs = {}
+    for entry in series:
+        count = entry["count"]
+        seen, p95 = 0, None
+        for bound, n in entry["buckets"].items():
+            seen += n
+            if seen >= 0.95 * count:
+                p95 = None if bound == "+Inf" else float(bound) * 1000
+                break
+        runs[entry["labels"]["scope"]] = {"count": count, "mean_ms": entry["sum"] / count * 1000, "p95_le_ms": p95}
+    return dict(sorted(runs.items()))
+
+
+async def measure_memory(args, pid, answers):
+    # After the load, sessions that stay connected past their first deal,
+    # opened one at a time: the server's growth is what each one holds
+    # (Streamlit's session and its state, the live player)
+    n = args.memory_sessions
+    before = resident_bytes(pid)
+    if before is None:
+        return None
+    sessions = []
+    for i in range(n):
+        session = Session(-2 - i, "steady", args, answers)
+        await session.open()
+        await session.click("start deal", label="INITIATE DEAL FLOW")
+        sessions.append(session)
+    after = resident_bytes(pid)
+    for session in sessions:
+        await session.client.close()
+    return {"sessions": n, "bytes_per_session": (after - before) / n}
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def drive(args, pid, answers):
+    profiles = ["struggling" if i % 4 == 3 else "steady" for i in range(args.sessions)]
+
+    # Warm-up: imports, cache_resource singletons and the thumbnail cache
+    warm = Session(-1, "steady", args, answers)
+    await warm.open()
+    await warm.client.close()
+
+    errors = []
+    samples = []
+    slots = asyncio.Semaphore(args.concurrency)
+
+    async def one(index, profile):
+        async with slots:
+            session = Session(index, profile, args, answers)
+            try:
+                await session.play()
+            except Exception as exc:  # Report and keep the other sessions going
+                errors.append(f"{type(exc).__name__}: {exc}")
+            if session.client.ws is not None:
+                await session.client.close()
+            samples.extend(session.samples)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(index, profile) for index, profile in enumerate(profiles)))
+    elapsed = time.perf_counter() - start
+    memory = await measure_memory(args, pid, answers) if args.memory_sessions else None
+    return samples, errors, elapsed, memory
+
+
+def run(args):
+    answers = answer_key()
+    port, metrics_port = free_port(), free_port()
+    args.url = f"ws://127.0.0.1:{port}/_stcore/stream"
+    server = start_server(port, metrics_port, args.timeout)
+    try:
+        samples, errors, elapsed, memory = asyncio.run(drive(args, server.pid, answers))
+        runs = app_runs(metrics_port)
+    finally:
+        server.terminate()
+        try:
+            server.wait(10)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+    by_action = {}
+    for action, seconds in samples:
+        by_action.setdefault(action, []).append(seconds)
+
+    return {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": vars(args),
+        "sessions": args.sessions,
+        "interactions": len(samples),
+        "errors": errors,
+        "elapsed_seconds": elapsed,
+        "throughput_per_sec": len(samples) / elapsed,
+        "latency": percentiles([s[1] for s in samples]),
+        "by_action": {action: percentiles(seconds) for action, seconds in sorted(by_action.items())},
+        "app_runs": runs,
+        "memory": memory,
+    }
+
+
+def show(report, baseline=None):
+    def delta(path):
+        if baseline is None:
+            return ""
+        old, new = baseline, report
+        for key in path:
+            old, new = (old or {}).get(key), (new or {}).get(key)
+        if not old or new is None:
+            return ""
+        return f"  ({(new - old) / old:+.0%} vs {baseline.get('commit') or 'baseline'})"
+
+    print(f"{report['sessions']} sessions, {report['interactions']:,} clicks in "
+          f"{report['elapsed_seconds']:.1f}s (concurrency {report['config']['concurrency']}, "
+          f"commit {report['commit'] or '?'})")
+    print(f"throughput: {report['throughput_per_sec']:,.1f} clicks/s{delta(['throughput_per_sec'])}")
+    stats = report["latency"]
+    print(f"click   p50 {stats['p50_ms']:8.2f} ms  p95 {stats['p95_ms']:8.2f} ms  "
+          f"p99 {stats['p99_ms']:8.2f} ms{delta(['latency', 'p95_ms'])}")
+    width = max(len(action) for action in report["by_action"])
+    print(f"\n{'action':<{width}}  {'n':>6}  {'p50':>9}  {'p95':>9}  {'p99':>9}")
+    for action, stats in report["by_action"].items():
+        print(f"{action:<{width}}  {stats['count']:>6}  {stats['p50_ms']:>7.2f}ms  {stats['p95_ms']:>7.2f}ms  "
+              f"{stats['p99_ms']:>7.2f}ms{delta(['by_action', action, 'p95_ms'])}")
+    if report["app_runs"]:
+        width = max(len(scope) for scope in report["app_runs"])
+        print(f"\nin-app run time (deca_run_seconds)\n{'scope':<{width}}  {'n':>6}  {'mean':>9}  {'p95 <=':>9}")
+        for scope, stats in report["app_runs"].items():
+            p95 = f"{stats['p95_le_ms']:>7.1f}ms" if stats["p95_le_ms"] is not None else f"{'-':>9}"
+            print(f"{scope:<{width}}  {stats['count']:>6}  {stats['mean_ms']:>7.2f}ms  {p95}"
+                  f"{delta(['app_runs', scope, 'mean_ms'])}")
+    if report["memory"]:
+        print(f"\nserver memory per idle session: {report['memory']['bytes_per_session'] / 1024:.1f} KiB"
+              f"{delta(['memory', 'bytes_per_session'])}")
+    if report["errors"]:
+        print(f"\n{len(report['errors'])} session(s) failed, first: {report['errors'][0]}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16, help="sessions clicking at the same time")
+    parser.add_argument("--answers", type=int, default=30, help="questions answered per session")
+    parser.add_argument("--shop-every", type=int, default=6, help="visit the shop every N answers")
+    parser.add_argument("--lifeline-rate", type=float, default=0.2)
+    parser.add_argument("--think-time", type=float, default=0.0, help="max random pause between clicks (s)")
+    parser.add_argument("--memory-sessions", type=int, default=20, help="sessions sampled for memory (0 = skip)")
+    parser.add_argument("--timeout", type=float, default=60.0, help="server start-up and per-click timeout (s)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", default=None, help="results JSON (default .cache/load_test/<commit>.json)")
+    parser.add_argument("--compare", help="previous results JSON to diff against")
+    args = parser.parse_args(argv)
+
+    # Offline and out of the working tree; the server inherits the environment
+    scratch = tempfile.mkdtemp(prefix="deca-load-")
+    os.environ.setdefault("DECA_DB_PATH", os.path.join(scratch, "players.db"))
+    os.environ.setdefault("DECA_ASSET_DIR", os.path.join(scratch, "assets"))
+    os.environ.setdefault("DECA_EVENTS_DIR", os.path.join(scratch, "events"))
+    os.environ["DECA_OFFLINE"] = "1"
+
+    report = run(args)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    show(report, baseline)
+
+    out = args.out or os.path.join(".cache", "load_test", f"{report['commit'] or 'results'}.json")
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nresults written to {out}")
+    return 1 if report["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,40 @@
+"""Populate the office-image cache ahead of time.
+
+Run on a connected machine, then ship the cache directory (DECA_ASSET_DIR,
+default .cache/assets) with an offline or air-gapped install:
+
+    python -m tools.prefetch_assets
+    python -m tools.prefetch_assets --dir /srv/deca/assets --width 600
+"""
+import argparse
+import os
+import sys
+
+import settings
+from assets import AssetCache
+from game_data import office_tiers
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dir", default=settings.ASSET_DIR, help="cache directory (default DECA_ASSET_DIR)")
+    parser.add_argument("--width", type=int, default=settings.ASSET_WIDTH, help="thumbnail width in pixels")
+    args = parser.parse_args(argv)
+
+    cache = AssetCache(args.dir, width=args.width)
+    # The files this run must produce, one per tier
+    expected = {name: cache.path(data["img"]) for name, data in office_tiers.items()}
+    before = {name for name, path in expected.items() if os.path.exists(path)}
+    cache.warm((name, data["img"]) for name, data in office_tiers.items())
+    cached = {name for name, path in expected.items() if os.path.exists(path)}
+    missing = sorted(set(expected) - cached)
+    print(f"{len(cached - before)} new, {len(cached)} of {len(expected)} cached in {args.dir}")
+    if missing:
+        print(f"WARNING: {len(missing)} image(s) could not be fetched; placeholders will be shown: "
+              f"{', '.join(missing)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,168 @@
+"""Check what every interaction reruns, and how long it takes.
+
+Drives streamlit_app.py headlessly with Streamlit's AppTest through each
+kind of click (deal, answer, lifelines, purchases, hires, demotion) and
+diffs the app's per-scope run counters and timers (``st.session_state.runs``)
+before and after. Exits non-zero if any interaction runs a scope more than
+once (e.g. a stray ``st.rerun()``) or reruns panels outside its expected
+fragments.
+
+The reported time is the script execution time measured inside the app
+(the full run, or the sum of the fragments that reran), not AppTest's own
+overhead.
+
+Run from the repo root:
+
+    python -m tools.rerun_budget
+"""
+import os
+import statistics
+import sys
+import tempfile
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "streamlit_app.py")
+
+QUIZ = {"trading_floor", "sidebar_metrics"}
+# Scopes each interaction may rerun; "app" means a full run is expected
+EXPECTED = {
+    "start deal": {"trading_floor"},
+    "answer (correct)": QUIZ,
+    "answer (wrong)": QUIZ,
+    "answer (demoted)": {"app"},
+    "next deal": {"trading_floor"},
+    "quant lifeline": {"trading_floor"},
+    "hedge lifeline": {"trading_floor"},
+    "recover": {"trading_floor"},
+    "buy office (insufficient)": {"real_estate"},
+    "buy office": {"real_estate", "sidebar_metrics"},
+    "hire": {"headhunter", "sidebar_metrics", "trading_floor"},
+}
+
+
+def player(at):
+    # Players live in the process-wide session pool, not in session state.
+    # Imported here: settings are read on import, after main() set them
+    from resources import load_session_pool
+    return load_session_pool().get(at.session_state.player_id)
+
+
+def question(at):
+    from resources import load_engine
+    return load_engine().question(player(at))
+
+
+def find_button(at, label=None, key=None):
+    for button in at.button:
+        if key is not None and button.key == key:
+            return button
+        if label is not None and button.label.startswith(label):
+            return button
+    raise LookupError(f"No button {label or key!r} on screen")
+
+
+def click(at, results, name, label=None, key=None):
+    try:
+        button = find_button(at, label, key)
+    except LookupError:
+        # After a fragment rerun AppTest only holds that fragment's elements;
+        # the browser still shows the rest, so refresh the tree (uncounted)
+        at.run()
+        button = find_button(at, label, key)
+    before = {scope: tuple(stats) for scope, stats in at.session_state.runs.items()}
+    button.click().run(timeout=30)
+    if at.exception:
+        raise RuntimeError(f"{name}: {at.exception[0].message}")
+    delta = {}
+    seconds = {}
+    for scope, (runs, total) in at.session_state.runs.items():
+        prev_runs, prev_total = before.get(scope, (0, 0.0))
+        if runs != prev_runs:
+            delta[scope] = runs - prev_runs
+            seconds[scope] = total - prev_total
+    # A full run already includes the fragments it rendered
+    elapsed = seconds["app"] if "app" in seconds else sum(seconds.values())
+    if name.startswith("answer") and player(at).phase == "demoted":
+        name = "answer (demoted)"
+    results.append((name, delta, elapsed))
+    return at
+
+
+def answer(at, results, correct):
+    q = question(at)
+    pick = q.answer if correct else next(opt for opt in q.options if opt != q.answer)
+    click(at, results, "answer (correct)" if correct else "answer (wrong)", key=pick)
+
+
+def check(name, delta):
+    problems = [f"{scope} ran {n}x" for scope, n in delta.items() if n > 1]
+    allowed = EXPECTED[name]
+    if "app" not in allowed:
+        extra = set(delta) - allowed
+        if extra:
+            problems.append("also reran " + ", ".join(sorted(extra)))
+    return problems
+
+
+def main():
+    from streamlit.testing.v1 import AppTest
+
+    results = []
+    at = AppTest.from_file(APP, default_timeout=30).run()
+
+    click(at, results, "start deal", label="INITIATE DEAL FLOW")
+    for _ in range(5):
+        answer(at, results, correct=True)
+        click(at, results, "next deal", label="SOURCE NEXT DEAL")
+    answer(at, results, correct=False)
+    click(at, results, "next deal", label="RE-EVALUATE MARKET")
+
+    # Shop: failed and successful purchases of each kind
+    click(at, results, "buy office (insufficient)", key="btn_The Penthouse")
+    player(at).balance = 1_000_000
+    click(at, results, "buy office", key="btn_The Bullpen")
+    click(at, results, "hire", key="hire_The Quant")
+    click(at, results, "hire", key="hire_Risk Manager")
+
+    # Lifelines
+    click(at, results, "quant lifeline", label="📉 Quant Algo")
+    click(at, results, "hedge lifeline", label="🛡️ Hedge Position")
+
+    # Miss a full window in a row to trip the Risk of Ruin protocol
+    while player(at).phase != "demoted":
+        answer(at, results, correct=False)
+        if player(at).phase == "answered":
+            click(at, results, "next deal", label="RE-EVALUATE MARKET")
+    click(at, results, "recover", label="BEGIN RECOVERY")
+
+    by_name = {}
+    for name, delta, elapsed in results:
+        entry = by_name.setdefault(name, {"scopes": set(), "times": [], "problems": []})
+        entry["scopes"].update(delta)
+        entry["times"].append(elapsed)
+        entry["problems"].extend(check(name, delta))
+
+    width = max(len(name) for name in by_name)
+    failed = 0
+    for name, entry in by_name.items():
+        median_ms = statistics.median(entry["times"]) * 1000
+        scopes = ", ".join(sorted(entry["scopes"])) or "-"
+        print(f"{name:<{width}}  {median_ms:7.2f} ms  {scopes}")
+        for problem in sorted(set(entry["problems"])):
+            failed += 1
+            print(f"{'':<{width}}  <-- {problem}")
+
+    if failed:
+        print(f"FAIL: {failed} problem(s) across {len(results)} interactions")
+        return 1
+    print(f"OK: {len(results)} interactions, each within its rerun scope")
+    return 0
+
+
+if __name__ == "__main__":
+    # Offline, and the player database, answer log and image cache out of the working tree
+    scratch = tempfile.mkdtemp(prefix="deca-rerun-")
+    os.environ.setdefault("DECA_DB_PATH", os.path.join(scratch, "players.db"))
+    os.environ.setdefault("DECA_EVENTS_DIR", os.path.join(scratch, "events"))
+    os.environ.setdefault("DECA_ASSET_DIR", os.path.join(scratch, "assets"))
+    os.environ["DECA_OFFLINE"] = "1"
+    sys.exit(main())
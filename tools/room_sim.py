@@ -0,0 +1,324 @@
+"""Simulated clients for the live rooms: many rooms, dozens of players each.
+
+Drives a RoomStore directly, the way the Live Rooms panel does (poll,
+advance, snapshot; answer through the engine), from worker threads that
+each own a slice of the clients, so polls and answers from different rooms
+interleave as they do on one Streamlit server. Every client polls on its
+own interval, waits a random reaction time once a question shows and
+answers at a set accuracy. Rooms play full matches at compressed timings.
+
+Reports poll and answer latency (p50/p95/p99, lock waits included), how
+often a poll found a new version (the only polls that have anything new to
+draw), and how late clients first saw each question after it opened. It
+also checks the outcome: every member of a room saw the same question in
+each round, and each member's room points equal what the engine paid them.
+Exits non-zero on any mismatch.
+
+Then it times the Live Rooms panel itself: a few AppTest sessions sit in
+one room of the app's own RoomStore (resources.py) next to simulated
+members, and every poll's room fragment time (``st.session_state.runs``)
+is reported split by whether the poll found a new version. Everything runs
+offline, with the player database and answer log in a temp directory.
+
+Run from the repo root:
+
+    python -m tools.room_sim
+    python -m tools.room_sim --rooms 60 --players 40 --workers 32
+    python -m tools.room_sim --out before.json
+    python -m tools.room_sim --out after.json --compare before.json
+    python -m tools.room_sim --render-clients 0   # skip the panel timing
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+from game_data import questions_db
+from question_bank import CompiledBank, QuestionBank
+from rooms import RoomStore
+from tools.load_test import git_commit, percentiles
+from tools.rerun_budget import APP
+
+
+class Client:
+    """One simulated browser tab in a room."""
+
+    def __init__(self, player_id, player, code, rng):
+        self.player_id = player_id
+        self.player = player
+        self.code = code
+        self.rng = rng
+        self.next_poll = 0.0
+        self.seen_version = -1
+        self.answer_at = None   # When this client clicks, once the round's question shows
+        self.answered = 0       # Last round answered
+        self.qids = {}          # round -> qid seen
+
+
+def play(clients, store, args, stats, lock, done):
+    polls, redraws, poll_s, answer_s, lag_s = 0, 0, [], [], []
+    while not done.is_set():
+        now = time.time()
+        for client in clients:
+            if now < client.next_poll:
+                continue
+            client.next_poll = now + args.poll
+            room = store.get(client.code)
+            start = time.perf_counter()
+            room.advance()
+            snap = room.snapshot()
+            poll_s.append(time.perf_counter() - start)
+            polls += 1
+            if snap.version != client.seen_version:
+                client.seen_version = snap.version
+                redraws += 1
+            if snap.phase != "open" or client.answered == snap.round:
+                continue
+            if snap.round not in client.qids:
+                client.qids[snap.round] = snap.qid
+                lag_s.append(max(time.time() - snap.opens_at, 0.0))
+                client.answer_at = time.time() + client.rng.uniform(0.1, args.think)
+            if time.time() < client.answer_at:
+                continue
+            q = store.engine.bank[snap.qid]
+            if client.rng.random() < args.accuracy:
+                option = q.answer
+            else:
+                option = client.rng.choice([o for o in q.options if o != q.answer])
+            start = time.perf_counter()
+            room.answer(client.player_id, client.player, option)
+            answer_s.append(time.perf_counter() - start)
+            client.answered = snap.round
+        next_poll = min(client.next_poll for client in clients)
+        time.sleep(max(min(next_poll - time.time(), args.poll), 0.001))
+    with lock:
+        stats["polls"] += polls
+        stats["redraws"] += redraws
+        stats["poll"].extend(poll_s)
+        stats["answer"].extend(answer_s)
+        stats["lag"].extend(lag_s)
+
+
+def check(store, codes, clients):
+    errors = []
+    by_room = {}
+    for client in clients:
+        by_room.setdefault(client.code, []).append(client)
+    for code in codes:
+        room = store.get(code)
+        snap = room.snapshot()
+        if snap.phase != "final" or snap.round != store.rounds:
+            errors.append(f"{code}: ended in {snap.phase} after round {snap.round}")
+        members = by_room[code]
+        for rnd in range(1, store.rounds + 1):
+            seen = {client.qids.get(rnd) for client in members}
+            if len(seen) != 1 or None in seen:
+                errors.append(f"{code}: round {rnd} showed questions {sorted(map(str, seen))}")
+        points = {s.player_id: s.points for s in snap.standings}
+        for client in members:
+            # Players only ever earned in their room, so the two must agree
+            if points.get(client.player_id) != client.player.balance:
+                errors.append(f"{code}: {client.player_id} has {points.get(client.player_id)} points "
+                              f"but was paid {client.player.balance}")
+    return errors
+
+
+def measure_render(args):
+    """Room fragment seconds per AppTest poll, as (changed, unchanged) lists.
+
+    The app reads its settings on import, so main() points DECA_ROOM_* at
+    the simulated timings before resources is imported here.
+    """
+    from streamlit.testing.v1 import AppTest
+
+    from resources import load_room_store, load_session_pool
+
+    sessions = [AppTest.from_file(APP, default_timeout=60).run() for _ in range(args.render_clients)]
+    store, pool = load_room_store(), load_session_pool()  # The ones the sessions use
+    rng = random.Random(args.seed)
+    ids = [at.session_state.player_id for at in sessions]
+    room = store.create(ids[0], "viewer 0")
+    for i, player_id in enumerate(ids[1:], 1):
+        room.join(player_id, f"viewer {i}")
+    bots = {}
+    for i in range(args.players - len(ids)):
+        player_id = f"bot{i:04d}"
+        room.join(player_id, f"Trader {i}")
+        bots[player_id] = store.engine.new_player()
+    for at in sessions:
+        at.session_state["room"] = room.code
+    room.start(ids[0])
+
+    changed, unchanged = [], []
+    seen = [-1] * len(sessions)
+    answer_at = {}  # (player_id, round) -> when that member clicks
+    deadline = time.time() + store.countdown_seconds + store.rounds * (store.round_seconds
+                                                                       + store.reveal_seconds) + 30
+    while room.snapshot().phase != "final" and time.time() < deadline:
+        for i, at in enumerate(sessions):
+            before = at.session_state.runs.get("room", (0, 0.0))[1]
+            at.run()
+            if at.exception:
+                raise RuntimeError(at.exception[0].message)
+            seconds = at.session_state.runs["room"][1] - before
+            version = room.snapshot().version
+            (changed if version != seen[i] else unchanged).append(seconds)
+            seen[i] = version
+        # Everyone answers at their own reaction time; viewers answer like bots
+        snap = room.snapshot()
+        if snap.phase != "open":
+            continue
+        q = store.engine.bank[snap.qid]
+        for player_id in list(bots) + ids:
+            when = answer_at.setdefault((player_id, snap.round), snap.opens_at + rng.uniform(0.1, args.think))
+            if time.time() < when or any(r.player_id == player_id for r in snap.results):
+                continue
+            option = q.answer if rng.random() < args.accuracy else rng.choice(q.options)
+            room.answer(player_id, bots[player_id] if player_id in bots else pool.get(player_id), option)
+    return changed, unchanged
+
+
+def run(args):
+    from engine import GameEngine  # Reads the settings main() set
+
+    bank = CompiledBank(args.bank) if args.bank else QuestionBank(questions_db)
+    engine = GameEngine(bank, rng=random.Random(args.seed))
+    store = RoomStore(engine, rounds=args.rounds, round_seconds=args.round_seconds,
+                      reveal_seconds=args.reveal_seconds, countdown_seconds=args.countdown,
+                      max_players=args.players, rng=random.Random(args.seed))
+    rng = random.Random(args.seed)
+
+    clients, codes = [], []
+    for r in range(args.rooms):
+        room = None
+        for p in range(args.players):
+            player_id = f"{r:04d}{p:04d}"
+            if room is None:
+                room = store.create(player_id)
+                codes.append(room.code)
+            else:
+                room.join(player_id)
+            clients.append(Client(player_id, engine.new_player(), room.code, random.Random(rng.random())))
+        room.start(f"{r:04d}0000")
+    rng.shuffle(clients)  # Each worker serves clients from many rooms
+
+    stats = {"polls": 0, "redraws": 0, "poll": [], "answer": [], "lag": []}
+    lock = threading.Lock()
+    done = threading.Event()
+    threads = [threading.Thread(target=play, args=(clients[i::args.workers], store, args, stats, lock, done),
+                                name=f"room-sim-{i}") for i in range(args.workers)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    deadline = time.time() + args.countdown + args.rounds * (args.round_seconds + args.reveal_seconds) + 30
+    while time.time() < deadline and any(store.get(code).snapshot().phase != "final" for code in codes):
+        time.sleep(0.1)
+    done.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    changed, unchanged = measure_render(args) if args.render_clients else ([], [])
+
+    return {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": vars(args),
+        "rooms": args.rooms,
+        "clients": len(clients),
+        "elapsed_seconds": elapsed,
+        "polls": stats["polls"],
+        "polls_per_sec": stats["polls"] / elapsed,
+        "redraw_ratio": stats["redraws"] / max(stats["polls"], 1),
+        "poll_latency": percentiles(stats["poll"]),
+        "answer_latency": percentiles(stats["answer"]),
+        "question_lag": percentiles(stats["lag"]),
+        "render_changed": percentiles(changed),
+        "render_unchanged": percentiles(unchanged),
+        "errors": check(store, codes, clients),
+    }
+
+
+def show(report, baseline=None):
+    def delta(path):
+        if baseline is None:
+            return ""
+        old, new = baseline, report
+        for key in path:
+            old, new = (old or {}).get(key), (new or {}).get(key)
+        if not old or new is None:
+            return ""
+        return f"  ({(new - old) / old:+.0%} vs {baseline.get('commit') or 'baseline'})"
+
+    config = report["config"]
+    print(f"{report['rooms']} rooms x {config['players']} players, {config['rounds']} rounds in "
+          f"{report['elapsed_seconds']:.1f}s ({config['workers']} workers, commit {report['commit'] or '?'})")
+    print(f"polls: {report['polls']:,} ({report['polls_per_sec']:,.0f}/s), "
+          f"{report['redraw_ratio']:.0%} found a new version{delta(['polls_per_sec'])}")
+    for label, key in (("poll", "poll_latency"), ("answer", "answer_latency"), ("q. lag", "question_lag")):
+        stats = report[key]
+        print(f"{label:<7} p50 {stats['p50_ms']:8.3f} ms  p95 {stats['p95_ms']:8.3f} ms  "
+              f"p99 {stats['p99_ms']:8.3f} ms{delta([key, 'p99_ms'])}")
+    if config["render_clients"]:
+        print(f"\nroom panel render, {config['render_clients']} viewers in a room of {config['players']}:")
+        for label, key in (("new version", "render_changed"), ("unchanged", "render_unchanged")):
+            stats = report[key] or {"count": 0, "p50_ms": 0.0, "p95_ms": 0.0}
+            print(f"{label:<12} {stats['count']:>5} polls  p50 {stats['p50_ms']:7.3f} ms  "
+                  f"p95 {stats['p95_ms']:7.3f} ms{delta([key, 'p50_ms'])}")
+    if report["errors"]:
+        print(f"\n{len(report['errors'])} consistency error(s), first: {report['errors'][0]}")
+    else:
+        print("\nOK: every member saw the same questions and was scored what the engine paid")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rooms", type=int, default=40)
+    parser.add_argument("--players", type=int, default=32, help="players per room")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--round-seconds", type=float, default=4.0)
+    parser.add_argument("--reveal-seconds", type=float, default=1.0)
+    parser.add_argument("--countdown", type=float, default=1.0, help="seconds before round 1")
+    parser.add_argument("--poll", type=float, default=0.25, help="seconds between a client's polls")
+    parser.add_argument("--think", type=float, default=2.5, help="max reaction time (s)")
+    parser.add_argument("--accuracy", type=float, default=0.7)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--render-clients", type=int, default=3, help="AppTest sessions timing the panel (0 = skip)")
+    parser.add_argument("--bank", help="compiled bank file (default: the built-in questions)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", default=None, help="results JSON (default .cache/room_sim/<commit>.json)")
+    parser.add_argument("--compare", help="previous results JSON to diff against")
+    args = parser.parse_args(argv)
+
+    # The app's room gets the simulated timings; everything else stays offline
+    # and out of the working tree
+    scratch = tempfile.mkdtemp(prefix="deca-rooms-")
+    os.environ.setdefault("DECA_DB_PATH", os.path.join(scratch, "players.db"))
+    os.environ.setdefault("DECA_ASSET_DIR", os.path.join(scratch, "assets"))
+    os.environ.setdefault("DECA_EVENTS_DIR", os.path.join(scratch, "events"))
+    os.environ["DECA_OFFLINE"] = "1"
+    os.environ["DECA_ROOM_ROUNDS"] = str(args.rounds)
+    os.environ["DECA_ROOM_ROUND_SECONDS"] = str(args.round_seconds)
+    os.environ["DECA_ROOM_REVEAL_SECONDS"] = str(args.reveal_seconds)
+    os.environ["DECA_ROOM_MAX_PLAYERS"] = str(args.players)
+
+    report = run(args)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    show(report, baseline)
+
+    out = args.out or os.path.join(".cache", "room_sim", f"{report['commit'] or 'results'}.json")
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nresults written to {out}")
+    return 1 if report["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())